@@ -0,0 +1,53 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import io
+import os
+import tempfile
+
+from basemkit.basetest import Basetest
+
+from wikibot3rd.archive import BackupArchive
+
+
+class TestArchive(Basetest):
+    """
+    test the single file backup archive
+    """
+
+    def testArchiveRoundTrip(self):
+        """
+        test writing and streaming back archives of all supported formats
+        """
+        pages = {"Main Page": "Welcome", "Sub/Page": "sub", "Köln": "Dom ✅"}
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for extension in [".tar.gz", ".tar.xz", ".zip"]:
+                path = f"{tmpdir}/backup{extension}"
+                with BackupArchive(path, "w") as archive:
+                    for revid, (title, text) in enumerate(pages.items()):
+                        archive.add_page(title, text, revid=revid, sha1=f"sha{revid}")
+                    image = b"\x89PNG" * 10
+                    archive.add_file("images/Logo.png", io.BytesIO(image), len(image))
+                self.assertTrue(BackupArchive.is_archive(path))
+                self.assertFalse(os.path.exists(f"{path}.tmp"))
+                archive = BackupArchive(path)
+                self.assertEqual(pages, dict(archive.iter_pages()))
+                index = archive.get_index()
+                self.assertEqual(list(pages.keys()), list(index.keys()))
+                self.assertEqual("pages/Sub/Page.wiki", index["Sub/Page"]["path"])
+                self.assertEqual(2, index["Köln"]["revid"])
+                self.assertEqual(len("Dom ✅".encode("utf-8")), index["Köln"]["size"])
+            # failed archives are discarded
+            path = f"{tmpdir}/failed.zip"
+            with self.assertRaises(ValueError):
+                with BackupArchive(path, "w") as archive:
+                    archive.add_page("A", "a")
+                    raise ValueError("interrupted")
+            self.assertEqual(
+                [], [name for name in os.listdir(tmpdir) if "failed" in name]
+            )
+            with self.assertRaises(ValueError):
+                BackupArchive(f"{tmpdir}/backup.rar", "w")
@@ -0,0 +1,93 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import os
+import sqlite3
+import tempfile
+
+from basemkit.basetest import Basetest
+
+from wikibot3rd.backupindex import BackupIndex, IndexEntry
+
+
+class TestBackupIndex(Basetest):
+    """
+    test the index of a backup directory
+    """
+
+    def testBackupIndex(self):
+        """
+        test scanning, updating and filtering the index
+        """
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for title in ["Main Page", "Sub/Page", "Property:Name"]:
+                path = os.path.join(tmpdir, f"{title}.wiki")
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "w") as wikiFile:
+                    wikiFile.write(title)
+            os.utime(os.path.join(tmpdir, "Main Page.wiki"), (1000, 1000))
+            self.assertFalse(BackupIndex.exists(tmpdir))
+            index = BackupIndex(tmpdir)
+            self.assertFalse(index.is_complete())
+            self.assertEqual(3, index.scan())
+            self.assertTrue(index.is_complete())
+            self.assertEqual(0, index.scan())
+            entry = index.get("Sub/Page")
+            self.assertEqual(os.path.join("Sub", "Page.wiki"), entry.path)
+            self.assertEqual(len("Sub/Page"), entry.size)
+            index.update_file(
+                "Property:Name", "Property:Name.wiki", ns=102, sha1="abc", revid=7
+            )
+            self.assertTrue(index.is_current("Property:Name", 7))
+            self.assertFalse(index.is_current("Property:Name", 8))
+            self.assertFalse(index.is_current("Sub/Page", None))
+            index.update(IndexEntry("Gone", "Gone.wiki", ns=0, mtime=2000))
+            index.close()
+            self.assertTrue(BackupIndex.exists(tmpdir))
+            index = BackupIndex(tmpdir)
+            titles = [entry.title for entry in index.iter_entries()]
+            self.assertEqual(["Gone", "Main Page", "Property:Name", "Sub/Page"], titles)
+            self.assertEqual(
+                ["Property:Name"],
+                [entry.title for entry in index.iter_entries(namespaces=[102])],
+            )
+            self.assertEqual("abc", index.get("Property:Name").sha1)
+            self.assertEqual(1, index.count(prefix="Sub/"))
+            self.assertEqual(0, index.count(prefix="sub/"))
+            self.assertEqual(3, index.count(since=1500))
+            self.assertEqual(2, index.count(since=3000))
+            self.assertIsNone(index.get("Missing"))
+            self.assertTrue(index.is_complete())
+            # a file that is gone is not current
+            index.update(IndexEntry("Gone", "Gone.wiki", revid=3))
+            self.assertFalse(index.is_current("Gone", 3))
+            index.close()
+
+    def testIndexMigration(self):
+        """
+        test that an index without revision ids is extended and scanned again
+        """
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for title in ["A", "B"]:
+                with open(os.path.join(tmpdir, f"{title}.wiki"), "w") as wikiFile:
+                    wikiFile.write(title)
+            connection = sqlite3.connect(os.path.join(tmpdir, BackupIndex.fileName))
+            connection.execute(
+                "CREATE TABLE pages (title TEXT PRIMARY KEY, path TEXT NOT NULL, ns INTEGER, size INTEGER, mtime REAL, sha1 TEXT)"
+            )
+            connection.execute(
+                "INSERT INTO pages VALUES ('A', 'A.wiki', 0, 1, 0.0, 'abc')"
+            )
+            connection.commit()
+            connection.close()
+            index = BackupIndex(tmpdir)
+            self.assertEqual("abc", index.get("A").sha1)
+            self.assertIsNone(index.get("A").revid)
+            # the partial index has not been scanned yet
+            self.assertFalse(index.is_complete())
+            self.assertEqual(1, index.scan())
+            self.assertEqual(2, index.count())
+            index.close()
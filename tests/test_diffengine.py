@@ -0,0 +1,101 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import difflib
+
+from basemkit.basetest import Basetest
+
+from wikibot3rd.diffengine import DiffEngine
+
+
+class TestDiffEngine(Basetest):
+    """
+    test the line based diff engine
+    """
+
+    def testUnifiedDiff(self):
+        """
+        test that the diff matches difflib's unified diff
+        """
+        cases = [
+            ("a\nb\nc", "a\nb\nc"),
+            ("a\nb\nc", "a\nx\nc"),
+            ("", "a\nb"),
+            ("a\nb", ""),
+            ("a\nb\nc\nd\ne\nf\ng\nh", "a\nB\nc\nd\ne\nf\nG\nh"),
+            ("a\nb\nc", "x\na\nb\nc\ny"),
+            ("a\nb\nc\nd", "a\nd"),
+        ]
+        for n in [0, 1, 3]:
+            for text, new_text in cases:
+                expected = list(
+                    difflib.unified_diff(
+                        text.split("\n"), new_text.split("\n"), n=n, lineterm=""
+                    )
+                )
+                diff_engine = DiffEngine(n=n, forHuman=False)
+                lines = list(diff_engine.iter_diff(text, new_text))
+                self.assertEqual(expected, lines, f"{text!r}->{new_text!r} n={n}")
+
+    def testLargePage(self):
+        """
+        test diffing a large page with a single changed line
+        """
+        text = "\n".join(f"|row {i}||{i * 7}" for i in range(100000))
+        new_text = text.replace("|row 50000||", "|row 50000 changed||")
+        diff = DiffEngine(n=1).get_diff(text, new_text)
+        if self.debug:
+            print(diff)
+        self.assertEqual(
+            [
+                " |row 49999||349993",
+                "-|row 50000||350000",
+                "+|row 50000 changed||350000",
+                " |row 50001||350007",
+            ],
+            diff.split("\n"),
+        )
+
+    def testMaxLines(self):
+        """
+        test limiting the number of diff lines
+        """
+        text = "\n".join(str(i) for i in range(100))
+        new_text = "\n".join(f"{i}!" for i in range(100))
+        diff_engine = DiffEngine(n=1, max_lines=10)
+        lines = list(diff_engine.iter_diff(text, new_text))
+        self.assertEqual(11, len(lines))
+        self.assertEqual(DiffEngine.truncated, lines[-1])
+        # headers and content lines with dashes are kept apart
+        diff = DiffEngine(n=0).get_diff("a\n----\nb", "a\n----\nc")
+        self.assertEqual("-b\n+c", diff)
+        diff = DiffEngine(n=1).get_diff("----\nb", "----\nc")
+        self.assertEqual(" ----\n-b\n+c", diff)
+
+    def testMerge(self):
+        """
+        test the three-way merge of local and remote changes
+        """
+        base = "a\nb\nc\nd\ne\nf"
+        test_params = [
+            # (local, remote, expected)
+            (base.replace("b", "B"), base.replace("e", "E"), "a\nB\nc\nd\nE\nf"),
+            (base.replace("b", "B"), base, base.replace("b", "B")),
+            (base, base.replace("e", "E"), base.replace("e", "E")),
+            ("x\n" + base, base + "\ny", "x\n" + base + "\ny"),
+            # the same change on both sides
+            (
+                base.replace("b", "B"),
+                base.replace("b", "B").replace("f", "F"),
+                "a\nB\nc\nd\ne\nF",
+            ),
+            # changes of the same or adjacent lines conflict
+            (base.replace("b", "B"), base.replace("b", "X"), None),
+            (base.replace("b", "B"), base.replace("c", "C"), None),
+        ]
+        for local, remote, expected in test_params:
+            with self.subTest(local=local, remote=remote):
+                self.assertEqual(expected, DiffEngine.merge(base, local, remote))
@@ -0,0 +1,73 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import tempfile
+
+from basemkit.basetest import Basetest
+
+from wikibot3rd.editrules import EditRule, RuleEngine
+
+
+class TestEditRules(Basetest):
+    """
+    test the compiled multi rule edit engine
+    """
+
+    def testRequiredLiteral(self):
+        """
+        test extracting the literal every match of a pattern contains
+        """
+        cases = {
+            "Apples": "Apples",
+            r"\[\[Category:Spam\]\]": "[[Category:Spam]]",
+            r"colou?r": "colo",
+            r"ab+c": "ab",
+            r"(?:foo|bar)baz": "baz",
+            r"\bhttp://[a-z]+\.example\.org": ".example.org",
+            r"\x41pple": "pple",
+            r"(\w+)\1 end": " end",
+            r"foo|bar": None,
+            r"(?i)apples": None,
+            r".*": None,
+            r"[abc]{2,3}x?": None,
+        }
+        for pattern, expected in cases.items():
+            self.assertEqual(
+                expected, RuleEngine.get_required_literal(pattern), pattern
+            )
+
+    def testRuleEngine(self):
+        """
+        test applying a rules file in one pass
+        """
+        rules_yaml = """rules:
+- search: '\\[\\[Category:Fruit\\]\\]'
+  replace: '[[Category:Food]]'
+- search: 'Apples? \\((\\d+)\\)'
+  replace: 'Peaches (\\1)'
+- search: 'C:\\temp'
+  replace: 'D:\\data'
+  literal: true
+- search: 'banana'
+  replace: 'Banana'
+  ignoreCase: true
+"""
+        with tempfile.NamedTemporaryFile("w", suffix=".yaml") as rules_file:
+            rules_file.write(rules_yaml)
+            rules_file.flush()
+            engine = RuleEngine.of_yaml_file(rules_file.name)
+        self.assertEqual(4, len(engine.rules))
+        text = "Apple (1) and Apples (2) in C:\\temp BANANA [[Category:Fruit]]"
+        expected = "Peaches (1) and Peaches (2) in D:\\data Banana [[Category:Food]]"
+        self.assertEqual(expected, engine(text))
+        self.assertEqual("nothing to do", engine("nothing to do"))
+        self.assertEqual({0: 1, 1: 2, 2: 1, 3: 1}, dict(engine.hits))
+        self.assertIn("rule 2 Apples? \\((\\d+)\\): 2", engine.get_summary())
+        # later rules see the result of earlier ones
+        engine = RuleEngine(
+            [EditRule(search="a", replace="b"), EditRule(search="bb", replace="c")]
+        )
+        self.assertEqual("c", engine("ab"))
@@ -0,0 +1,52 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import tempfile
+
+from basemkit.basetest import Basetest
+
+from wikibot3rd.journal import JobJournal
+
+
+class TestJournal(Basetest):
+    """
+    test the persistent job journal
+    """
+
+    def setUp(self, debug=False, profile=True):
+        Basetest.setUp(self, debug=debug, profile=profile)
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.dbPath = f"{self.tmpdir.name}/journal.db"
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+        Basetest.tearDown(self)
+
+    def testJournal(self):
+        """
+        test recording, resuming and retrying a job
+        """
+        titles = ["A", "B", "C", "D"]
+        journal = JobJournal(self.dbPath, "wikipush_source_target")
+        self.assertEqual(titles, journal.start(titles))
+        journal.mark("A", True)
+        journal.mark("B", False, "timeout")
+        journal.close()
+        # the job was interrupted - resume it with a new journal instance
+        journal = JobJournal(self.dbPath, "wikipush_source_target")
+        pending = journal.start(["X"], resume=True, maxAttempts=2)
+        self.assertEqual(["B", "C", "D"], pending)
+        for title in pending:
+            journal.mark(title, title != "B", "timeout" if title == "B" else None)
+        # B has been tried twice now
+        self.assertEqual(["B"], journal.get_failed(maxAttempts=3))
+        self.assertEqual([], journal.get_failed(maxAttempts=2))
+        self.assertEqual({"done": 3, "failed": 1}, journal.get_counts())
+        # a new job without resume starts from scratch
+        other = JobJournal(self.dbPath, "wikibackup_source")
+        self.assertEqual(["Y"], other.start(["Y"], resume=True))
+        self.assertEqual(["X"], journal.start(["X"]))
+        self.assertEqual({"pending": 1}, journal.get_counts())
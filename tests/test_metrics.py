@@ -0,0 +1,90 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import csv
+import json
+import tempfile
+from unittest.mock import MagicMock
+
+from basemkit.basetest import Basetest
+
+from wikibot3rd.metrics import PerformanceReport
+
+
+class TestMetrics(Basetest):
+    """
+    test the per page performance report
+    """
+
+    def testPerformanceReport(self):
+        """
+        test collecting page metrics and saving the report as JSON and CSV
+        """
+        report = PerformanceReport()
+        response = MagicMock()
+        response.request.body = "action=edit"
+        response.content = b"x" * 100
+        for i in range(1, 101):
+            with report.page(f"Page{i}"):
+                report.add_latency("fetch", i / 1000)
+                report.add_latency("edit", i / 100)
+                report.on_response(response)
+                report.set_outcome("created" if i % 10 else "failed")
+                if i == 100:
+                    report.count_retry()
+        # a skipped page has no latencies and does not affect the percentiles
+        with report.page("Skipped"):
+            report.set_outcome("skipped")
+        # calls of a batched lookup are attributed to the batch
+        with report.batch("batch 1"):
+            report.add_latency("fetch", 0.5)
+            report.on_response(response)
+        # calls outside of a page are only counted in the totals
+        streamed = MagicMock()
+        streamed.request.body = None
+        streamed.headers = {"Content-Length": "1000"}
+        report.on_response(streamed, stream=True)
+        report.finish()
+        summary = report.get_summary()
+        self.assertEqual(101, summary["pages"])
+        self.assertEqual(
+            {"created": 90, "failed": 10, "skipped": 1}, summary["outcomes"]
+        )
+        self.assertEqual(1, summary["skipped"])
+        self.assertEqual(100, summary["edit_latency"]["count"])
+        self.assertEqual(102, summary["api_calls"])
+        self.assertEqual(101 * 111 + 1000, summary["bytes"])
+        self.assertEqual(1, summary["batches"])
+        self.assertEqual(1, summary["batch_api_calls"])
+        self.assertEqual(111, summary["batch_bytes"])
+        self.assertAlmostEqual(0.5, summary["batch_latency"])
+        self.assertIn("1 batch lookups with 1 API calls", report.as_text())
+        self.assertIn("101 pages (1 skipped)", report.as_text())
+        self.assertEqual(1, summary["retries"])
+        self.assertAlmostEqual(0.5, summary["edit_latency"]["p50"])
+        self.assertAlmostEqual(0.95, summary["edit_latency"]["p95"])
+        self.assertAlmostEqual(0.099, summary["fetch_latency"]["p99"])
+        self.assertEqual(1, report.pages[99].retries)
+        self.assertIsNone(report.pages[-1].edit_latency)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            json_path = f"{tmpdir}/report.json"
+            report.save(json_path)
+            with open(json_path) as json_file:
+                saved = json.load(json_file)
+            self.assertEqual(101, len(saved["pages"]))
+            self.assertEqual(102, saved["summary"]["api_calls"])
+            self.assertEqual("batch 1", saved["batches"][0]["title"])
+            csv_path = f"{tmpdir}/report.csv"
+            report.save(csv_path)
+            with open(csv_path, newline="") as csv_file:
+                rows = list(csv.DictReader(csv_file))
+            # one row per page and batch, the total and the percentiles
+            self.assertEqual(106, len(rows))
+            self.assertEqual("", rows[100]["edit_latency"])
+            self.assertEqual("batch", rows[101]["outcome"])
+            self.assertEqual("total", rows[102]["title"])
+            self.assertEqual("p95", rows[104]["title"])
+            self.assertEqual("0.95", rows[104]["edit_latency"])
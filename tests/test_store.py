@@ -0,0 +1,73 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import hashlib
+import io
+import os
+import tempfile
+
+from basemkit.basetest import Basetest
+
+from wikibot3rd.store import ContentStore
+
+
+class TestStore(Basetest):
+    """
+    test the content addressed backup store
+    """
+
+    def testStore(self):
+        """
+        test storing deduplicated objects and snapshots
+        """
+        with tempfile.TemporaryDirectory() as tmpdir:
+            store = ContentStore(f"{tmpdir}/store")
+            self.assertFalse(ContentStore.is_store(store.path))
+            self.assertEqual({"pages": {}, "images": {}}, store.load_snapshot())
+            text = "Dom ✅"
+            sha1 = store.put(text)
+            self.assertEqual(hashlib.sha1(text.encode("utf-8")).hexdigest(), sha1)
+            self.assertEqual(sha1, store.put(text))
+            self.assertEqual(1, len(os.listdir(store.objectsPath)))
+            self.assertTrue(store.has(sha1))
+            self.assertFalse(store.has(None))
+            self.assertEqual(text, store.get(sha1))
+            image = b"\x89PNG" * 1000
+            imageSha1 = store.put_file(io.BytesIO(image))
+            self.assertEqual(image, store.get_bytes(imageSha1))
+            store.save_snapshot({"pages": {"A": {"sha1": sha1}}}, name="1")
+            store.save_snapshot(
+                {"pages": {"A": {"sha1": sha1}, "B": {"sha1": sha1}}}, name="2"
+            )
+            self.assertTrue(ContentStore.is_store(store.path))
+            self.assertEqual(["1", "2"], store.get_snapshots())
+            self.assertEqual(["A", "B"], list(store.load_snapshot()["pages"]))
+            snapshot = store.load_snapshot("1")
+            self.assertEqual({"A": {"sha1": sha1}}, snapshot["pages"])
+            self.assertEqual({}, snapshot["images"])
+
+    def testHistory(self):
+        """
+        test the revision history log
+        """
+        with tempfile.TemporaryDirectory() as tmpdir:
+            store = ContentStore(f"{tmpdir}/store")
+            self.assertEqual({}, store.get_latest_revisions())
+            store.append_history(
+                [
+                    {"title": "A", "revid": 1, "sha1": store.put("a1")},
+                    {"title": "B", "revid": 2, "sha1": store.put("b")},
+                    {"title": "A", "revid": 3, "sha1": store.put("a3")},
+                ]
+            )
+            # simulate an interrupted write
+            with open(store.historyPath, "a") as historyFile:
+                historyFile.write('{"title": "A", "rev')
+            store.append_history([{"title": "B", "revid": 4, "sha1": store.put("b4")}])
+            self.assertEqual(4, len(list(store.iter_history())))
+            latest = store.get_latest_revisions()
+            self.assertEqual("a3", store.get(latest["A"]["sha1"]))
+            self.assertEqual(4, latest["B"]["revid"])
@@ -0,0 +1,68 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+from unittest.mock import MagicMock, patch
+
+import requests
+from basemkit.basetest import Basetest
+from mwclient.errors import APIError
+
+from wikibot3rd.throttle import AdaptiveThrottle
+
+
+class TestThrottle(Basetest):
+    """
+    test the adaptive rate control
+    """
+
+    def testBackoffAndRampUp(self):
+        """
+        test backing off on ratelimited errors and ramping up on fast responses
+        """
+        throttle = AdaptiveThrottle(delay=0.5, maxRate=10, jitter=0)
+        responses = [
+            APIError("ratelimited", "You've exceeded your rate limit", None),
+            APIError("ratelimited", "You've exceeded your rate limit", None),
+            "ok",
+        ]
+
+        def request():
+            response = responses.pop(0)
+            if isinstance(response, Exception):
+                raise response
+            return response
+
+        with patch("wikibot3rd.throttle.time.sleep") as sleep:
+            self.assertEqual("ok", throttle.call(request))
+            waits = [call.args[0] for call in sleep.call_args_list]
+        # exponential backoff
+        self.assertEqual([1.0, 2.0], waits)
+        self.assertEqual(2, throttle.retries)
+        slow_delay = throttle.delay
+        self.assertGreater(slow_delay, 0.5)
+        for _i in range(30):
+            throttle.call(lambda: "ok")
+        # back to the ceiling of 10 requests per second
+        self.assertAlmostEqual(0.1, throttle.delay)
+
+    def testRetryAfter(self):
+        """
+        test honouring the Retry-After header and giving up on other errors
+        """
+        throttle = AdaptiveThrottle(maxRetries=1, jitter=0)
+        response = MagicMock()
+        response.status_code = 429
+        response.headers = {"Retry-After": "7"}
+        error = requests.exceptions.HTTPError(response=response)
+        func = MagicMock(side_effect=[error, error])
+        with patch("wikibot3rd.throttle.time.sleep") as sleep:
+            with self.assertRaises(requests.exceptions.HTTPError):
+                throttle.call(func)
+            sleep.assert_called_once_with(7.0)
+        func = MagicMock(side_effect=APIError("protectedpage", "protected", None))
+        with self.assertRaises(APIError):
+            throttle.call(func)
+        self.assertEqual(1, func.call_count)
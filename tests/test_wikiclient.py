@@ -4,9 +4,12 @@ Created on 2020-11-02
 @author: wf
 """
 
+import io
+from unittest.mock import MagicMock
+
 from basemkit.basetest import Basetest
 
-from wikibot3rd.wikiclient import WikiClient
+from wikibot3rd.wikiclient import PageContent, WikiClient
 
 
 class TestWikiClient(Basetest):
@@ -96,3 +99,334 @@ class TestWikiClient(Basetest):
                 print("✅" if page.exists else "❌", end="")
             print()
         pass
+
+    def testGetPageContents(self):
+        """
+        test batched retrieval of page contents with title normalization
+        and continuation
+        """
+        client = WikiClient(MagicMock())
+        client.site = MagicMock()
+        client.site.rights = []
+        responses = [
+            {
+                "continue": {"rvcontinue": "2|3", "continue": "||"},
+                "query": {
+                    "normalized": [{"from": "main Page", "to": "Main Page"}],
+                    "pages": {
+                        "1": {
+                            "pageid": 1,
+                            "ns": 0,
+                            "title": "Main Page",
+                            "revisions": [
+                                {
+                                    "revid": 10,
+                                    "timestamp": "2026-01-01T00:00:00Z",
+                                    "slots": {"main": {"sha1": "abc", "*": "Welcome"}},
+                                }
+                            ],
+                        },
+                        "2": {"pageid": 2, "ns": 10, "title": "Template:Info"},
+                        "-1": {"ns": 0, "title": "Missing", "missing": ""},
+                    },
+                },
+            },
+            {
+                "query": {
+                    "pages": {
+                        "2": {
+                            "pageid": 2,
+                            "ns": 10,
+                            "title": "Template:Info",
+                            "revisions": [
+                                {
+                                    "revid": 20,
+                                    "timestamp": "2026-01-02T00:00:00Z",
+                                    "sha1": "def",
+                                    "*": "{{{1}}}",
+                                }
+                            ],
+                        }
+                    }
+                }
+            },
+        ]
+        client.site.api.side_effect = responses
+        titles = ["main Page", "Template:Info", "Missing"]
+        page_contents = client.get_page_contents(titles)
+        self.assertEqual(2, client.site.api.call_count)
+        self.assertEqual(titles, list(page_contents.keys()))
+        main_page = page_contents["main Page"]
+        self.assertTrue(main_page.exists)
+        self.assertEqual("Welcome", main_page.content)
+        self.assertEqual("abc", main_page.sha1)
+        self.assertEqual(10, main_page.revid)
+        template = page_contents["Template:Info"]
+        self.assertEqual("{{{1}}}", template.content)
+        self.assertEqual(10, template.ns)
+        self.assertEqual("def", template.sha1)
+        self.assertFalse(page_contents["Missing"].exists)
+        self.assertIsNone(page_contents["Missing"].content)
+        _args, kwargs = client.site.api.call_args
+        self.assertEqual("2|3", kwargs["rvcontinue"])
+
+    def testGetImageInfos(self):
+        """
+        test batched image info lookup and the sha1 search
+        """
+        client = WikiClient(MagicMock())
+        client.site = MagicMock()
+        client.site.rights = ["apihighlimits"]
+        client.site.api.side_effect = [
+            {
+                "query": {
+                    "pages": {
+                        "1": {
+                            "pageid": 1,
+                            "ns": 6,
+                            "title": "File:A.png",
+                            "imageinfo": [{"sha1": "abc", "size": 3}],
+                        },
+                        "-1": {"ns": 6, "title": "File:B.png", "missing": ""},
+                    }
+                }
+            },
+            {"query": {"allimages": [{"name": "C.png", "title": "File:C.png"}]}},
+        ]
+        image_infos = client.get_image_infos(["File:A.png", "File:B.png"])
+        self.assertEqual("abc", image_infos["File:A.png"]["sha1"])
+        self.assertIsNone(image_infos["File:B.png"])
+        self.assertEqual(["File:C.png"], client.find_images_by_sha1("abc"))
+        _args, kwargs = client.site.api.call_args
+        self.assertEqual("abc", kwargs["aisha1"])
+
+    def testGetPageDependencies(self):
+        """
+        test the batched lookup of the pages a page depends on
+        """
+        client = WikiClient(MagicMock())
+        client.site = MagicMock()
+        client.site.rights = []
+        client.site.api.return_value = {
+            "query": {
+                "pages": {
+                    "1": {
+                        "pageid": 1,
+                        "ns": 0,
+                        "title": "Berlin",
+                        "templates": [{"ns": 10, "title": "Template:City"}],
+                        "images": [{"ns": 6, "title": "File:Berlin.png"}],
+                        "links": [{"ns": 102, "title": "Property:Population"}],
+                    },
+                    "-1": {"ns": 0, "title": "Missing", "missing": ""},
+                }
+            }
+        }
+        dependencies = client.get_page_dependencies(
+            ["Berlin", "Missing"], link_namespaces=[102, 106]
+        )
+        self.assertEqual(
+            ["Template:City", "File:Berlin.png", "Property:Population"],
+            dependencies["Berlin"],
+        )
+        self.assertIsNone(dependencies["Missing"])
+        _args, kwargs = client.site.api.call_args
+        self.assertEqual("templates|images|links", kwargs["prop"])
+        self.assertEqual("102|106", kwargs["plnamespace"])
+
+    def testGetPageInfos(self):
+        """
+        test the bulk existence and metadata lookup
+        """
+        client = WikiClient(MagicMock())
+        client.site = MagicMock()
+        client.site.rights = []
+        client.site.api.return_value = {
+            "query": {
+                "pages": {
+                    "7": {
+                        "pageid": 7,
+                        "ns": 0,
+                        "title": "Berlin",
+                        "contentmodel": "wikitext",
+                        "lastrevid": 70,
+                        "length": 1234,
+                    },
+                    "-1": {"ns": 0, "title": "Missing", "missing": ""},
+                }
+            }
+        }
+        page_infos = client.get_page_infos(["Berlin", "Missing"])
+        berlin = page_infos["Berlin"]
+        self.assertTrue(berlin.exists)
+        self.assertEqual(70, berlin.lastrevid)
+        self.assertEqual(1234, berlin.length)
+        self.assertEqual("wikitext", berlin.contentmodel)
+        self.assertFalse(page_infos["Missing"].exists)
+        self.assertEqual(1, client.site.api.call_count)
+
+    def testGetPageRevisions(self):
+        """
+        test getting the revisions of a page following continuations
+        """
+        client = WikiClient(MagicMock())
+        client.site = MagicMock()
+        client.site.rights = []
+        client.site.api.side_effect = [
+            {
+                "continue": {"rvcontinue": "20261002|71", "continue": "||"},
+                "query": {
+                    "pages": {
+                        "7": {
+                            "pageid": 7,
+                            "title": "Berlin",
+                            "revisions": [
+                                {
+                                    "revid": 70,
+                                    "user": "Alice",
+                                    "timestamp": "2026-10-01T00:00:00Z",
+                                    "slots": {"main": {"sha1": "s70", "*": "v1"}},
+                                }
+                            ],
+                        }
+                    }
+                },
+            },
+            {
+                "query": {
+                    "pages": {
+                        "7": {
+                            "pageid": 7,
+                            "title": "Berlin",
+                            "revisions": [
+                                {
+                                    "revid": 71,
+                                    "parentid": 70,
+                                    "user": "Bob",
+                                    "comment": "fix",
+                                    "slots": {"main": {"sha1": "s71", "*": "v2"}},
+                                }
+                            ],
+                        }
+                    }
+                }
+            },
+        ]
+        revisions = client.get_page_revisions("Berlin", start_revid=70)
+        # the revisions are streamed
+        client.site.api.assert_not_called()
+        revisions = list(revisions)
+        self.assertEqual([70, 71], [revision.revid for revision in revisions])
+        self.assertEqual(["v1", "v2"], [revision.content for revision in revisions])
+        self.assertEqual("Bob", revisions[1].user)
+        self.assertEqual("fix", revisions[1].comment)
+        kwargs = client.site.api.call_args_list[0].kwargs
+        self.assertEqual("newer", kwargs["rvdir"])
+        self.assertEqual(70, kwargs["rvstartid"])
+        self.assertEqual("20261002|71", client.site.api.call_args.kwargs["rvcontinue"])
+
+    def testExportRevisions(self):
+        """
+        test streaming and incrementally parsing a full history export
+        """
+        xml = """<mediawiki xmlns="http://www.mediawiki.org/xml/export-0.11/" version="0.11">
+  <siteinfo><sitename>Test</sitename></siteinfo>
+  <page>
+    <title>Berlin</title>
+    <ns>0</ns>
+    <id>7</id>
+    <revision>
+      <id>70</id>
+      <timestamp>2026-10-01T00:00:00Z</timestamp>
+      <contributor><username>Alice</username><id>1</id></contributor>
+      <comment>create</comment>
+      <text bytes="2" xml:space="preserve">v1</text>
+      <sha1>phoiac9h4m842xq45sp7s6u21eteeq1</sha1>
+    </revision>
+    <revision>
+      <id>71</id>
+      <parentid>70</parentid>
+      <timestamp>2026-10-02T00:00:00Z</timestamp>
+      <contributor><ip>127.0.0.1</ip></contributor>
+      <text bytes="0" xml:space="preserve" />
+    </revision>
+  </page>
+  <page>
+    <title>Köln</title>
+    <revision><id>80</id><text>Dom</text></revision>
+  </page>
+</mediawiki>"""
+        client = WikiClient(MagicMock())
+        client.site = MagicMock()
+        client.site.rights = []
+        client.site.scheme = "https"
+        client.site.host = "wiki.example.org"
+        client.site.path = "/w/"
+        client.site.ext = ".php"
+        response = client.site.connection.post.return_value
+        response.raw = io.BytesIO(xml.encode("utf-8"))
+        revisions = list(
+            client.export_revisions(["Berlin", "Köln"], offset="2026-09-01T00:00:00Z")
+        )
+        self.assertEqual(
+            [("Berlin", 70), ("Berlin", 71), ("Köln", 80)],
+            [(title, revision.revid) for title, revision in revisions],
+        )
+        first = revisions[0][1]
+        self.assertEqual("Alice", first.user)
+        self.assertEqual("create", first.comment)
+        self.assertEqual("v1", first.content)
+        # the base 36 sha1 of the export is converted to hex
+        self.assertEqual(40, len(first.sha1))
+        self.assertEqual(
+            int("phoiac9h4m842xq45sp7s6u21eteeq1", 36), int(first.sha1, 16)
+        )
+        second = revisions[1][1]
+        self.assertEqual(70, second.parentid)
+        self.assertEqual("127.0.0.1", second.user)
+        self.assertEqual("", second.content)
+        self.assertEqual("Dom", revisions[2][1].content)
+        args, kwargs = client.site.connection.post.call_args
+        self.assertEqual("https://wiki.example.org/w/index.php", args[0])
+        self.assertEqual("Berlin\nKöln", kwargs["data"]["pages"])
+        self.assertEqual("1", kwargs["data"]["history"])
+        self.assertEqual("2026-09-01T00:00:00Z", kwargs["data"]["offset"])
+        self.assertTrue(kwargs["stream"])
+        response.close.assert_called_once()
+
+    def testSavePageWithBase(self):
+        """
+        test that a save carries the base revision for edit conflict detection
+        """
+        client = WikiClient(MagicMock())
+        page = MagicMock()
+        client.get_page = MagicMock(return_value=page)
+        base = PageContent(
+            title="Test", exists=True, revid=42, timestamp="2026-10-17T00:00:00Z"
+        )
+        client.save_page("Test", "new", "summary", base=base)
+        page.edit.assert_called_once_with(
+            "new",
+            "summary",
+            section=None,
+            baserevid=42,
+            basetimestamp="2026-10-17T00:00:00Z",
+        )
+        missing = PageContent(title="Test")
+        self.assertEqual({"createonly": True}, missing.get_base_params())
+
+    def testDeletePage(self):
+        """
+        test deleting a page with a single API request
+        """
+        client = WikiClient(MagicMock())
+        client.site = MagicMock()
+        client.site.rights = []
+        client.site.get_token.return_value = "token+\\"
+        client.site.post.return_value = {"delete": {"title": "Spam", "logid": 1}}
+        result = client.delete_page("Spam", "cleanup")
+        self.assertEqual(1, result["logid"])
+        client.site.post.assert_called_once_with(
+            "delete", title="Spam", reason="cleanup", token="token+\\"
+        )
+        client.site.get_token.assert_called_once_with("csrf")
@@ -4,15 +4,32 @@ Created on 2020-10-29
 @author: wf
 """
 
+import hashlib
 import io
+import json
 import os
+import tempfile
+import threading
 import unittest
 import warnings
-from contextlib import redirect_stdout
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from git import Repo
+from mwclient.errors import APIError, EditError
 
 import wikibot3rd
 from tests.base_wiki_test import BaseWikiTest
-from wikibot3rd.wikipush import WikiPush
+from wikibot3rd.archive import BackupArchive
+from wikibot3rd.backupindex import BackupIndex
+from wikibot3rd.journal import JobJournal
+from wikibot3rd.manifest import BackupManifest
+from wikibot3rd.metrics import PerformanceReport
+from wikibot3rd.store import ContentStore
+from wikibot3rd.wikiclient import PageContent, PageInfo, Revision
+from wikibot3rd.wikipush import SyncState, WikiPush
+from wikibot3rd.wikitext import WikiMarkup
 
 
 class TestWikiPush(BaseWikiTest):
@@ -229,6 +246,1075 @@ class TestWikiPush(BaseWikiTest):
             print(diff)
         self.assertEqual(2, len(diff.split("\n")))
 
+    @staticmethod
+    def getMockWiki(pages: dict) -> MagicMock:
+        """
+        get a mocked WikiClient backed by the given pages dict
+
+        Args:
+            pages(dict): the page texts by page title - edits modify the dict
+        """
+
+        saved_sections = []
+
+        def save(title, text, section=None, baserevid=None, createonly=False):
+            if createonly and title in pages:
+                raise APIError("articleexists", "The page already exists", None)
+            if baserevid is not None and baserevid != get_revid(title):
+                raise APIError("editconflict", "Edit conflict", None)
+            saved_sections.append(section)
+            if section is None:
+                pages[title] = text
+                return
+            # replace the section like MediaWiki does
+            old_text = pages[title]
+            start, end = WikiMarkup.get_section_spans(old_text)[int(section)]
+            stripped = text.rstrip()
+            if end < len(old_text) and stripped:
+                stripped += "\n\n"
+            new_text = old_text[:start] + stripped + old_text[end:]
+            pages[title] = new_text.rstrip()
+
+        def get_page(title):
+            page = MagicMock()
+            page.name = title
+            page.exists = title in pages
+            page.namespace = 0
+            page.pageid = None
+            page.revision = get_revid(title) or 0
+            page.last_rev_time = None
+            page.text.side_effect = lambda: pages.get(title, "")
+
+            def edit(text, summary="", section=None, **kwargs):
+                save(
+                    title,
+                    text,
+                    section,
+                    kwargs.get("baserevid"),
+                    "createonly" in kwargs,
+                )
+
+            page.edit.side_effect = edit
+            page.delete.side_effect = lambda *args, **kwargs: pages.pop(title)
+            return page
+
+        def get_sha1(title):
+            text = pages.get(title)
+            if text is None:
+                return None
+            return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+        def get_revid(title):
+            # the revision id changes with the content
+            sha1 = get_sha1(title)
+            return int(sha1[:8], 16) if sha1 else None
+
+        def get_page_contents(titles, with_content=True, batch_size=None):
+            page_contents = {}
+            for title in titles:
+                text = pages.get(title)
+                page_contents[title] = PageContent(
+                    title=title,
+                    exists=text is not None,
+                    content=text if with_content else None,
+                    revid=get_revid(title),
+                    sha1=get_sha1(title),
+                )
+            return page_contents
+
+        def get_page_infos(titles, batch_size=None):
+            page_infos = {
+                title: PageInfo(
+                    title=title, exists=title in pages, lastrevid=get_revid(title)
+                )
+                for title in titles
+            }
+            return page_infos
+
+        def delete_page(title, reason=""):
+            if title not in pages:
+                raise APIError("missingtitle", "The page does not exist", None)
+            pages.pop(title)
+            return {"title": title, "reason": reason}
+
+        def edit_page_text(title, text, summary="", section=None, **params):
+            save(title, text, section, params.get("baserevid"), "createonly" in params)
+            return {"result": "Success", "title": title}
+
+        wiki = MagicMock()
+        wiki.getPage.side_effect = get_page
+        wiki.delete_page.side_effect = delete_page
+        wiki.edit_page_text.side_effect = edit_page_text
+        wiki.saved_sections = saved_sections
+        wiki.get_batch_size.return_value = 8
+        wiki.get_page_contents.side_effect = get_page_contents
+        wiki.get_page_infos.side_effect = get_page_infos
+        return wiki
+
+    def getMockWikiPush(
+        self, source_pages: dict = None, target_pages: dict = None
+    ) -> WikiPush:
+        """
+        get a WikiPush with mocked source and target wikis
+
+        Args:
+            source_pages(dict): the page texts of the source wiki by title
+            target_pages(dict): the page texts of the target wiki by title
+        """
+        wp = WikiPush(None, None)
+        wp.fromWikiId = "mocksource"
+        wp.toWikiId = "mocktarget"
+        wp.fromWiki = self.getMockWiki({} if source_pages is None else source_pages)
+        wp.toWiki = self.getMockWiki({} if target_pages is None else target_pages)
+        return wp
+
+    def testConcurrentWork(self):
+        """
+        test pushing pages with a bounded worker pool
+        """
+        pageTitles = [f"Page{i}" for i in range(20)]
+        missing = ["Page3", "Page17"]
+        source_pages = {
+            pageTitle: f"content of {pageTitle}"
+            for pageTitle in pageTitles
+            if pageTitle not in missing
+        }
+        for workers in [1, 4]:
+            target_pages = {}
+            wp = self.getMockWikiPush(source_pages, target_pages)
+            f = io.StringIO()
+            with redirect_stdout(f):
+                failed = wp.push(pageTitles, workers=workers, targetWorkers=2)
+            out = f.getvalue()
+            if self.debug:
+                print(out)
+            self.assertEqual(missing, failed)
+            # source pages are fetched in batches
+            self.assertEqual(3, wp.fromWiki.get_page_contents.call_count)
+            wp.fromWiki.getPage.assert_not_called()
+            self.assertEqual(source_pages, target_pages)
+            lines = out.strip().split("\n")
+            # one headline, one line per page and the counts
+            self.assertEqual(len(pageTitles) + 2, len(lines))
+            for pageTitle in pageTitles:
+                marker = "❌" if pageTitle in missing else "✅"
+                self.assertIn(f"): copying ... {pageTitle}{marker}", out)
+
+    def testSkipUnchanged(self):
+        """
+        test that only pages with a different content are pushed
+        """
+        source_pages = {"A": "same", "B": "new text", "C": "created"}
+        target_pages = {"A": "same", "B": "old text"}
+        wp = self.getMockWikiPush(source_pages, target_pages)
+        f = io.StringIO()
+        with redirect_stdout(f):
+            failed = wp.push(["A", "B", "C"], skipUnchanged=True)
+        self.assertEqual([], failed)
+        self.assertEqual(source_pages, target_pages)
+        self.assertEqual({"skipped": 1, "updated": 1, "created": 1}, wp.counts)
+        # the unchanged page is not written and no page is looked up one by one
+        wp.toWiki.getPage.assert_not_called()
+        titles = [call.args[0] for call in wp.toWiki.edit_page_text.call_args_list]
+        self.assertEqual(["B", "C"], titles)
+        self.assertIn("skipped: 1", f.getvalue())
+
+    def testPushImagesDedup(self):
+        """
+        test that images which already exist byte-for-byte on the target are not transferred
+        """
+        wp = self.getMockWikiPush()
+        images = []
+        for name, sha1 in [
+            ("File:Same.png", "s1"),
+            ("File:Renamed.png", "s2"),
+            ("File:New.png", None),
+        ]:
+            image = MagicMock()
+            image.name = name
+            image.imageinfo = {"comment": "test"}
+            if sha1:
+                image.imageinfo["sha1"] = sha1
+            images.append(image)
+        wp.fromWiki.get_image_infos.return_value = {"File:New.png": {"sha1": "s3"}}
+        wp.toWiki.get_image_infos.return_value = {
+            "File:Same.png": {"sha1": "s1"},
+            "File:Renamed.png": None,
+            "File:New.png": None,
+        }
+
+        def transfer_image(image, filename, description, ignore):
+            if filename == "Renamed.png":
+                raise Exception(["('duplicate', ['Other.png'])"])
+
+        wp.transferImage = MagicMock(side_effect=transfer_image)
+        f = io.StringIO()
+        with redirect_stdout(f):
+            wp.pushImages(images)
+        out = f.getvalue()
+        if self.debug:
+            print(out)
+        wp.fromWiki.get_image_infos.assert_called_once_with(["File:New.png"])
+        filenames = [call.args[1] for call in wp.transferImage.call_args_list]
+        self.assertEqual(["Renamed.png", "New.png"], filenames)
+        self.assertIn("copying image File:Same.png ...↔", out)
+        # copies under other names are reported by the upload without a lookup per image
+        wp.toWiki.find_images_by_sha1.assert_not_called()
+        self.assertIn("duplicate", out)
+
+    def testStreamingImageTransfer(self):
+        """
+        test streaming an image from the source to the target wiki without a download file
+        """
+        wp = self.getMockWikiPush()
+        wp.spool_size = 10
+        wp.chunk_size = 64
+        content = b"0123456789" * 20
+        image = MagicMock()
+        image.name = "File:Big.png"
+        image.imageinfo = {"comment": "big", "sha1": "big"}
+        writing = []
+        downloads = []
+
+        def download(destination):
+            downloads.append(bool(writing))
+            destination.write(content)
+
+        image.download.side_effect = download
+        wp.toWiki.get_image_infos.return_value = {"File:Big.png": None}
+        uploaded = []
+
+        def upload(imageFile, filename, description, ignore):
+            uploaded.append((filename, imageFile.read()))
+            return {"upload": {"result": "Success"}}
+
+        def call(func, *args, **kwargs):
+            # the first upload is retried after an overload
+            writing.append(func)
+            func(*args, **kwargs)
+            return func(*args, **kwargs)
+
+        wp.rate_control = MagicMock()
+        wp.rate_control.call.side_effect = call
+        wp.toWiki.site.upload.side_effect = upload
+        wp.downloadImage = MagicMock()
+        f = io.StringIO()
+        with redirect_stdout(f):
+            wp.pushImages([image])
+        self.assertIn("copying image File:Big.png ...✅", f.getvalue())
+        # the download is not part of the write and is not repeated on a retry
+        self.assertEqual([False], downloads)
+        self.assertEqual([("Big.png", content), ("Big.png", content)], uploaded)
+        self.assertEqual(64, wp.toWiki.site.chunk_size)
+        wp.downloadImage.assert_not_called()
+
+    def testClosure(self):
+        """
+        test pushing the dependency closure of pages in dependency order
+        """
+        graph = {
+            "Berlin": ["Template:City", "File:Berlin.png", "Property:Population"],
+            "Template:City": ["Module:Infobox", "Template:City", "Form:City"],
+            "Module:Infobox": ["Template:Missing"],
+            "Form:City": ["Template:City"],
+            "File:Berlin.png": [],
+            "Property:Population": [],
+            "Template:Missing": None,
+        }
+        wp = self.getMockWikiPush()
+        lookups = []
+
+        def get_page_dependencies(titles, link_namespaces=None, batch_size=None):
+            lookups.append(list(titles))
+            return {title: graph[title] for title in titles}
+
+        wp.fromWiki.get_page_dependencies.side_effect = get_page_dependencies
+        closure = wp.get_closure(["Berlin"])
+        self.assertEqual(
+            [
+                "Module:Infobox",
+                "Form:City",
+                "Template:City",
+                "File:Berlin.png",
+                "Property:Population",
+                "Berlin",
+            ],
+            closure,
+        )
+        # each page is looked up once level by level
+        self.assertEqual(4, len(lookups))
+        self.assertEqual(len(graph), sum(len(lookup) for lookup in lookups))
+
+    def testBulkPrecheck(self):
+        """
+        test that the existence of target pages is looked up in bulk before any writes
+        """
+        source_pages = {"A": "a", "B": "b", "C": "c"}
+        target_pages = {"A": "old a", "X": "x"}
+        wp = self.getMockWikiPush(source_pages, target_pages)
+        f = io.StringIO()
+        with redirect_stdout(f):
+            failed = wp.push(["A", "B", "C"])
+            self.assertEqual([], failed)
+            self.assertEqual({"exists": 1, "created": 2}, wp.counts)
+            # the existing page is not overwritten and the new pages are
+            # written without looking them up one by one
+            wp.toWiki.getPage.assert_not_called()
+            titles = [call.args[0] for call in wp.toWiki.edit_page_text.call_args_list]
+            self.assertEqual(["B", "C"], titles)
+            self.assertEqual("old a", target_pages["A"])
+            wp.nuke(["X", "Y"])
+            wp.edit(["Y"], modify=lambda text: text.upper())
+            wp.edit_wikison(["Y"], "City", "name", "Y")
+        wp.toWiki.getPage.assert_not_called()
+        # one lookup each for push, nuke, edit and edit_wikison
+        self.assertEqual(4, wp.toWiki.get_page_infos.call_count)
+        out = f.getvalue()
+        self.assertIn("deleting X ...👍", out)
+        self.assertIn("deleting Y ...👎", out)
+
+    def testPerformanceReport(self):
+        """
+        test collecting a performance report while pushing
+        """
+        source_pages = {f"Page{i}": f"content {i}" for i in range(5)}
+        target_pages = {"Page0": "old"}
+        wp = self.getMockWikiPush(source_pages, target_pages)
+        wp.enable_report(PerformanceReport())
+        with tempfile.TemporaryDirectory() as tmpdir:
+            f = io.StringIO()
+            with redirect_stdout(f):
+                wp.push(list(source_pages.keys()), workers=2)
+                wp.save_report(f"{tmpdir}/report.json")
+            self.assertIn("performance: 5 pages", f.getvalue())
+        outcomes = {page.title: page.outcome for page in wp.report.pages}
+        self.assertEqual("exists", outcomes["Page0"])
+        self.assertEqual("created", outcomes["Page4"])
+        # the batched source and target lookups are reported as a batch
+        self.assertEqual(["batch 1"], [batch.title for batch in wp.report.batches])
+        self.assertTrue(all(page.fetch_latency is None for page in wp.report.pages))
+        # only real writes are timed - the existing page is counted as skipped
+        edit_latencies = {page.title: page.edit_latency for page in wp.report.pages}
+        self.assertIsNone(edit_latencies["Page0"])
+        self.assertIsNotNone(edit_latencies["Page4"])
+        summary = wp.report.get_summary()
+        self.assertEqual(1, summary["skipped"])
+        self.assertEqual(4, summary["edit_latency"]["count"])
+
+    def testIncrementalBackup(self):
+        """
+        test that an incremental backup only downloads and writes changed pages
+        """
+        source_pages = {"A": "a", "B": "b", "Sub/C": "c"}
+        wp = self.getMockWikiPush(source_pages)
+        with tempfile.TemporaryDirectory() as backupPath:
+            f = io.StringIO()
+            with redirect_stdout(f):
+                wp.backup(list(source_pages.keys()), backupPath=backupPath)
+            index = BackupIndex(backupPath)
+            self.assertEqual("Sub/C.wiki", index.get("Sub/C").path)
+            self.assertEqual(3, index.count())
+            index.close()
+            # the index is the only record of the backed up revisions
+            self.assertFalse(os.path.exists(f"{backupPath}/{BackupManifest.fileName}"))
+            mtime = os.path.getmtime(f"{backupPath}/A.wiki")
+            source_pages["B"] = "b changed"
+            source_pages["D"] = "d"
+            wp.fromWiki.get_page_contents.reset_mock()
+            with redirect_stdout(f):
+                wp.backup(
+                    ["A", "B", "Sub/C", "D"], backupPath=backupPath, incremental=True
+                )
+            # only the changed and the new page are downloaded
+            wp.fromWiki.get_page_contents.assert_called_once_with(["B", "D"])
+            self.assertEqual(mtime, os.path.getmtime(f"{backupPath}/A.wiki"))
+            with open(f"{backupPath}/B.wiki") as wikiFile:
+                self.assertEqual("b changed", wikiFile.read())
+            index = BackupIndex(backupPath)
+            self.assertEqual(4, index.count())
+            index.close()
+            self.assertIn("downloading A ...↔", f.getvalue())
+
+    def testParallelBackupWithGit(self):
+        """
+        test a concurrent backup that stages only the written files in git
+        """
+        source_pages = {f"Page{i}": f"content {i}" for i in range(12)}
+        wp = self.getMockWikiPush(source_pages)
+        with tempfile.TemporaryDirectory() as backupPath:
+            f = io.StringIO()
+            with redirect_stdout(f):
+                wp.backup(
+                    list(source_pages.keys()),
+                    backupPath=backupPath,
+                    git=True,
+                    workers=4,
+                )
+                source_pages["Page3"] = "changed"
+                wp.backup(
+                    list(source_pages.keys()),
+                    backupPath=backupPath,
+                    git=True,
+                    workers=4,
+                )
+            repo = Repo(backupPath)
+            commits = list(repo.iter_commits())
+            self.assertEqual(2, len(commits))
+            self.assertEqual({"Page3.wiki"}, set(commits[0].stats.files.keys()))
+            # no temporary files are left behind
+            files = sorted(os.listdir(backupPath))
+            self.assertEqual(14, len(files))
+            self.assertIn(BackupIndex.fileName, files)
+            # the index is not committed
+            self.assertNotIn(BackupIndex.fileName, repo.untracked_files)
+            with redirect_stdout(f):
+                wp.backup(list(source_pages.keys()), backupPath=backupPath, git=True)
+            self.assertEqual(2, len(list(repo.iter_commits())))
+            self.assertIn("no changes to commit", f.getvalue())
+
+    def testArchiveBackupAndRestore(self):
+        """
+        test backing up to a single archive and restoring from it as a stream
+        """
+        source_pages = {"A": "a", "Sub/B": "b", "C": "c"}
+        target_pages = {}
+        wp = self.getMockWikiPush(source_pages, target_pages)
+        wp.toWiki.wikiUser.user = "tester"
+        with tempfile.TemporaryDirectory() as tmpdir:
+            f = io.StringIO()
+            with redirect_stdout(f):
+                wp.backup(
+                    ["A", "Sub/B", "C", "Missing"],
+                    backupPath=f"{tmpdir}/backup",
+                    backup_format="archive",
+                    workers=2,
+                )
+                archivePath = f"{tmpdir}/backup.tar.gz"
+                self.assertEqual(["backup.tar.gz"], os.listdir(tmpdir))
+                wp.restore(["Sub/B", "C"], backupPath=archivePath)
+                self.assertEqual({"Sub/B": "b", "C": "c"}, target_pages)
+                with patch.object(
+                    BackupArchive,
+                    "get_index",
+                    autospec=True,
+                    side_effect=BackupArchive.get_index,
+                ) as get_index:
+                    wp.restore(backupPath=archivePath)
+                # a full restore is a single pass over the archive
+                get_index.assert_not_called()
+            self.assertEqual(source_pages, target_pages)
+            self.assertIn("restoring 2 pages from", f.getvalue())
+            self.assertIn("restoring all pages from", f.getvalue())
+            self.assertIn("restored: 1, skipped: 2, failed: 0", f.getvalue())
+            # the default archive is written next to the backup directory without creating it
+            with (
+                patch.object(Path, "home", return_value=Path(tmpdir)),
+                redirect_stdout(io.StringIO()),
+            ):
+                wp.backup(["A"], backup_format="archive")
+            self.assertEqual(["mocksource.tar.gz"], os.listdir(f"{tmpdir}/wikibackup"))
+        # git versioning is only supported for file backups
+        argv = ["-s", "mocksource", "-p", "A", "--git", "--format", "archive"]
+        with redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+            wikibot3rd.wikipush.mainBackup(argv=argv)
+
+    def testStoreBackupAndRestore(self):
+        """
+        test backing up to a content addressed store and restoring a snapshot
+        """
+        source_pages = {"A": "same", "B": "same", "C": "c"}
+        target_pages = {}
+        wp = self.getMockWikiPush(source_pages, target_pages)
+        wp.toWiki.wikiUser.user = "tester"
+        with tempfile.TemporaryDirectory() as tmpdir:
+            storePath = f"{tmpdir}/store"
+            f = io.StringIO()
+            with redirect_stdout(f):
+                wp.backup(["A", "B", "C"], backupPath=storePath, backup_format="store")
+                store = ContentStore(storePath)
+                first = store.get_snapshots()[-1]
+                # A and B share a single object
+                objects = [
+                    name
+                    for _root, _dirs, names in os.walk(store.objectsPath)
+                    for name in names
+                ]
+                self.assertEqual(2, len(objects))
+                source_pages["C"] = "c2"
+                wp.fromWiki.get_page_contents.reset_mock()
+                wp.backup(["A", "B", "C"], backupPath=storePath, backup_format="store")
+                # only the changed page is downloaded
+                fetched = [
+                    call.args[0]
+                    for call in wp.fromWiki.get_page_contents.call_args_list
+                    if call.kwargs.get("with_content", True)
+                ]
+                self.assertEqual([["C"]], fetched)
+                self.assertEqual(2, len(store.get_snapshots()))
+                wp.restore(["C"], backupPath=storePath, snapshot=first)
+                self.assertEqual({"C": "c"}, target_pages)
+                wp.restore(backupPath=storePath)
+            self.assertEqual(source_pages, target_pages)
+            self.assertIn("restoring 3 pages from", f.getvalue())
+
+    def testGitFastImportBackup(self):
+        """
+        test streaming backups into a git repository with git fast-import
+        """
+        source_pages = {"A": "a", "Sub/B": "b"}
+        wp = self.getMockWikiPush(source_pages, {})
+        history = {
+            "A": [
+                Revision(
+                    1, timestamp="2026-10-01T00:00:00Z", user="Alice", content="a0"
+                ),
+                Revision(3, timestamp="2026-10-03T00:00:00Z", user="Bob", content="a"),
+            ],
+            "Sub/B": [
+                Revision(2, timestamp="2026-10-02T00:00:00Z", user="Carol", content="b")
+            ],
+        }
+        wp.fromWiki.get_page_revisions.side_effect = (
+            lambda title, start_revid=None: history[title]
+        )
+        with tempfile.TemporaryDirectory() as tmpdir:
+            f = io.StringIO()
+            with redirect_stdout(f):
+                repoPath = f"{tmpdir}/snapshots"
+                wp.backup(
+                    ["A", "Sub/B", "Missing"], backupPath=repoPath, backup_format="git"
+                )
+                repo = Repo(repoPath)
+                self.assertTrue(repo.bare)
+                tree = repo.head.commit.tree
+                self.assertEqual(b"b", (tree / "Sub/B.wiki").data_stream.read())
+                wp.backup(["A", "Sub/B"], backupPath=repoPath, backup_format="git")
+                self.assertIn("no changes to commit", f.getvalue())
+                source_pages["A"] = "a2"
+                wp.fromWiki.get_page_contents.reset_mock()
+                wp.backup(["A", "Sub/B"], backupPath=repoPath, backup_format="git")
+                commits = list(repo.iter_commits())
+                self.assertEqual(2, len(commits))
+                self.assertEqual(["A"], wp.fromWiki.get_page_contents.call_args.args[0])
+                tree = repo.head.commit.tree
+                self.assertEqual(b"a2", (tree / "A.wiki").data_stream.read())
+                repoPath = f"{tmpdir}/revisions"
+                wp.backup(
+                    ["A", "Sub/B"],
+                    backupPath=repoPath,
+                    backup_format="git",
+                    revisions=True,
+                )
+                commits = list(Repo(repoPath).iter_commits())
+                self.assertEqual(
+                    ["Bob", "Carol", "Alice"],
+                    [commit.author.name for commit in commits],
+                )
+                self.assertEqual(1790812800 + 2 * 86400, commits[0].authored_date)
+                self.assertEqual(
+                    b"a0", (commits[-1].tree / "A.wiki").data_stream.read()
+                )
+                # image files are recorded apart from the pages
+                image = MagicMock()
+                image.name = "File:Logo.png"
+                image.imageinfo = {"sha1": "logo"}
+                image.download.side_effect = lambda imageFile: imageFile.write(b"png")
+                page = MagicMock()
+                page.images.return_value = [image]
+                wp.fromWiki.getPage.side_effect = lambda pageTitle: page
+                repoPath = f"{tmpdir}/images"
+                wp.backup(
+                    ["A"], backupPath=repoPath, backup_format="git", withImages=True
+                )
+                repo = Repo(repoPath)
+                tree = repo.head.commit.tree
+                self.assertEqual(b"png", (tree / "images/Logo.png").data_stream.read())
+                manifest = BackupManifest.load(repo.git_dir)
+                self.assertEqual(["A"], list(manifest.entries))
+                self.assertEqual("logo", manifest.get_image("images/Logo.png").sha1)
+            # a checkout would go stale since fast-import only moves the branch
+            checkoutPath = f"{tmpdir}/checkout"
+            Repo.init(checkoutPath)
+            with self.assertRaises(ValueError), redirect_stdout(io.StringIO()):
+                wp.backup(["A"], backupPath=checkoutPath, backup_format="git")
+
+    def testHistoryBackup(self):
+        """
+        test the incremental full history backup to a content store
+        """
+        source_pages = {"A": "a2", "B": "b"}
+        page_histories = {
+            "A": [
+                Revision(1, timestamp="2026-10-01T00:00:00Z", content="a1"),
+                Revision(3, timestamp="2026-10-03T00:00:00Z", content="a2"),
+            ],
+            "B": [Revision(2, timestamp="2026-10-02T00:00:00Z", content="b")],
+        }
+        exports = []
+
+        def export_revisions(titles, history=True, offset=None):
+            exports.append((titles, offset))
+            for title in titles:
+                for revision in page_histories.get(title, []):
+                    if offset is None or revision.timestamp > offset:
+                        yield title, revision
+
+        target_pages = {}
+        wp = self.getMockWikiPush(source_pages, target_pages)
+        wp.toWiki.wikiUser.user = "tester"
+        wp.fromWiki.export_revisions.side_effect = export_revisions
+        with tempfile.TemporaryDirectory() as tmpdir:
+            storePath = f"{tmpdir}/store"
+            f = io.StringIO()
+            with redirect_stdout(f):
+                wp.backup(
+                    ["A", "B", "Missing"],
+                    backupPath=storePath,
+                    backup_format="store",
+                    revisions=True,
+                )
+                store = ContentStore(storePath)
+                self.assertEqual(3, len(list(store.iter_history())))
+                page_histories["B"].append(
+                    Revision(4, timestamp="2026-10-04T00:00:00Z", content="b2")
+                )
+                source_pages["B"] = "b2"
+                exports.clear()
+                image = MagicMock()
+                image.name = "File:Logo.png"
+                image.imageinfo = {"sha1": None}
+                image.download.side_effect = lambda imageFile: imageFile.write(b"png")
+                page = MagicMock()
+                page.images.return_value = [image]
+                wp.fromWiki.getPage.side_effect = lambda pageTitle: page
+                with patch.object(ContentStore, "iter_history") as iter_history:
+                    wp.backup(
+                        ["A", "B"],
+                        backupPath=storePath,
+                        backup_format="store",
+                        revisions=True,
+                        withImages=True,
+                        workers=2,
+                    )
+                # the latest revisions are taken from the snapshot instead of the history log
+                iter_history.assert_not_called()
+                # only revisions after the oldest latest revision are exported
+                self.assertEqual([(["A", "B"], "2026-10-02T00:00:00Z")], exports)
+                imageSha1 = store.load_snapshot()["images"]["Logo.png"]
+                self.assertEqual(b"png", store.get_bytes(imageSha1))
+                records = list(store.iter_history())
+                self.assertEqual([1, 3, 2, 4], [record["revid"] for record in records])
+                self.assertEqual("a1", store.get(records[0]["sha1"]))
+                wp.restore(backupPath=storePath)
+            self.assertEqual(source_pages, target_pages)
+            self.assertIn("✅ 1 revisions", f.getvalue())
+
+    def testChangeAwareRestore(self):
+        """
+        test that restore only writes pages that differ from the target wiki
+        """
+        source_pages = {"A": "a", "Sub/B": "b", "C": "c"}
+        target_pages = {"A": "a", "Sub/B": "old"}
+        wp = self.getMockWikiPush(source_pages, target_pages)
+        wp.toWiki.wikiUser.user = "tester"
+        with tempfile.TemporaryDirectory() as tmpdir:
+            f = io.StringIO()
+            with redirect_stdout(f):
+                wp.backup(["A", "Sub/B", "C"], backupPath=tmpdir)
+                wp.toWiki.getPage.reset_mock()
+                wp.restore(backupPath=tmpdir, workers=2)
+            self.assertEqual(source_pages, target_pages)
+            # the pages are written based on the batched lookup without a page lookup
+            wp.toWiki.getPage.assert_not_called()
+            calls = wp.toWiki.edit_page_text.call_args_list
+            restored = {call.args[0]: call.kwargs for call in calls}
+            self.assertEqual(["C", "Sub/B"], sorted(restored))
+            self.assertEqual({"createonly": True}, restored["C"])
+            self.assertIn("baserevid", restored["Sub/B"])
+            self.assertEqual({"restored": 2, "skipped": 1}, dict(wp.counts))
+            self.assertIn("restored: 2, skipped: 1, failed: 0", f.getvalue())
+
+    def testIndexedRestore(self):
+        """
+        test restoring from the backup index with a title prefix filter
+        """
+        source_pages = {"A": "a", "Sub/B": "b", "Sub/C": "c"}
+        target_pages = {"Sub/B": "b"}
+        wp = self.getMockWikiPush(source_pages, target_pages)
+        wp.toWiki.wikiUser.user = "tester"
+        with tempfile.TemporaryDirectory() as tmpdir:
+            f = io.StringIO()
+            with redirect_stdout(f):
+                wp.backup(["A", "Sub/B", "Sub/C"], backupPath=tmpdir)
+                self.assertTrue(BackupIndex.exists(tmpdir))
+                with patch("builtins.open", wraps=open) as opened:
+                    wp.restore(backupPath=tmpdir, prefix="Sub/")
+                read = [
+                    os.path.basename(call.args[0]) for call in opened.call_args_list
+                ]
+                # the unchanged page is skipped based on the indexed sha1
+                self.assertEqual(["C.wiki"], read)
+                self.assertEqual({"Sub/B": "b", "Sub/C": "c"}, target_pages)
+                # backups without an index are indexed once
+                os.remove(os.path.join(tmpdir, BackupIndex.fileName))
+                wp.restore(backupPath=tmpdir)
+            self.assertEqual(source_pages, target_pages)
+            self.assertIn("indexing", f.getvalue())
+            self.assertIn("restored: 1, skipped: 2, failed: 0", f.getvalue())
+
+    def testRestoreAfterPartialBackup(self):
+        """
+        test that files of earlier backups are restored after a backup of
+        only the recently modified pages into the same directory
+        """
+        source_pages = {"New": "new"}
+        target_pages = {}
+        wp = self.getMockWikiPush(source_pages, target_pages)
+        wp.toWiki.wikiUser.user = "tester"
+        for legacy_index in [False, True]:
+            target_pages.clear()
+            with tempfile.TemporaryDirectory() as tmpdir:
+                for title in ["Old1", "Old2", "Old3"]:
+                    with open(f"{tmpdir}/{title}.wiki", "w") as wikiFile:
+                        wikiFile.write(title.lower())
+                if legacy_index:
+                    # an index that was filled only with the pages of a single run
+                    wp.writeAtomic(f"{tmpdir}/New.wiki", "new")
+                    index = BackupIndex(tmpdir)
+                    index.update_file("New", "New.wiki")
+                    index.close()
+                else:
+                    with redirect_stdout(io.StringIO()):
+                        wp.backup(["New"], backupPath=tmpdir)
+                f = io.StringIO()
+                with redirect_stdout(f):
+                    wp.restore(backupPath=tmpdir)
+                self.assertIn("restoring 4 pages", f.getvalue())
+                self.assertEqual(
+                    {"New": "new", "Old1": "old1", "Old2": "old2", "Old3": "old3"},
+                    target_pages,
+                )
+
+    def testConcurrentNuke(self):
+        """
+        test deleting pages concurrently with a results file
+        """
+        target_pages = {f"Spam{i}": "spam" for i in range(6)}
+        wp = self.getMockWikiPush({}, target_pages)
+        titles = list(target_pages.keys()) + ["Missing"]
+        delete_page = wp.toWiki.delete_page.side_effect
+
+        def flaky_delete(title, reason=""):
+            if title == "Spam4":
+                raise Exception("permission denied")
+            if title == "Spam5":
+                target_pages.pop(title)
+                raise APIError("missingtitle", "The page does not exist", None)
+            return delete_page(title, reason)
+
+        wp.toWiki.delete_page.side_effect = flaky_delete
+        with tempfile.TemporaryDirectory() as tmpdir:
+            resultsPath = f"{tmpdir}/results.json"
+            f = io.StringIO()
+            with redirect_stdout(f):
+                dry_run = wp.nuke(titles)
+                self.assertEqual(["Missing"], dry_run["missing"])
+                self.assertEqual(6, len(dry_run["exists"]))
+                wp.toWiki.delete_page.assert_not_called()
+                wp.nuke(titles, force=True, workers=3, resultsPath=resultsPath)
+            with open(resultsPath) as resultsFile:
+                results = json.load(resultsFile)
+        self.assertEqual([f"Spam{i}" for i in range(4)], results["deleted"])
+        self.assertEqual(["Spam5", "Missing"], results["missing"])
+        self.assertEqual(["Spam4"], results["failed"])
+        self.assertEqual({"Spam4": "spam"}, target_pages)
+        wp.toWiki.getPage.assert_not_called()
+        self.assertIn("pages/s", f.getvalue())
+
+    def testConcurrentWrites(self):
+        """
+        test that writes overlap up to the number of workers of the run even if a
+        smaller write limit was used by a run before
+        """
+        target_pages = {f"Spam{i}": "spam" for i in range(3)}
+        wp = self.getMockWikiPush({}, target_pages)
+        delete_page = wp.toWiki.delete_page.side_effect
+        # all three deletes have to be running at the same time to pass
+        barrier = threading.Barrier(3, timeout=5)
+
+        def concurrent_delete(title, reason=""):
+            barrier.wait()
+            return delete_page(title, reason)
+
+        wp.toWiki.delete_page.side_effect = concurrent_delete
+        with redirect_stdout(io.StringIO()):
+            wp.nuke(list(target_pages.keys()), workers=1)
+            write_limit = wp.write_limit
+            result = wp.nuke(list(target_pages.keys()), force=True, workers=3)
+        # the write limit is sized for each run
+        self.assertIsNot(write_limit, wp.write_limit)
+        self.assertEqual(3, len(result["deleted"]))
+        self.assertEqual({}, target_pages)
+
+    def testJournalOptIn(self):
+        """
+        test that the command line opens a job journal only on request and closes it
+        """
+        wikis = {"mocksource": {"A": "a"}, "mocktarget": {}}
+        with (
+            tempfile.TemporaryDirectory() as tmpdir,
+            patch(
+                "wikibot3rd.wikipush.WikiClient.ofWikiId",
+                side_effect=lambda wikiId, debug=False: self.getMockWiki(wikis[wikiId]),
+            ),
+            patch.object(
+                WikiPush,
+                "open_journal",
+                autospec=True,
+                side_effect=WikiPush.open_journal,
+            ) as open_journal,
+            patch.object(
+                JobJournal, "close", autospec=True, side_effect=JobJournal.close
+            ) as close_journal,
+        ):
+            argv = ["-s", "mocksource", "-t", "mocktarget", "-p", "A"]
+            with redirect_stdout(io.StringIO()):
+                wikibot3rd.wikipush.mainPush(argv=argv)
+            open_journal.assert_not_called()
+            self.assertEqual("a", wikis["mocktarget"]["A"])
+            journalPath = f"{tmpdir}/push.db"
+            with redirect_stdout(io.StringIO()):
+                wikibot3rd.wikipush.mainPush(argv=argv + ["--journal", journalPath])
+            open_journal.assert_called_once()
+            close_journal.assert_called_once()
+            self.assertTrue(os.path.isfile(journalPath))
+
+    def testPipelinedEdit(self):
+        """
+        test that the pipelined edit shows the same results as the serial edit
+        """
+        target_pages = {f"Page{i:02d}": f"content {i}" for i in range(20)}
+        target_pages["Page03"] = "CONTENT 3"
+        page_titles = sorted(target_pages.keys()) + ["Missing"]
+
+        def modify(text):
+            return text.upper()
+
+        outputs = {}
+        edited = {}
+        for workers in [1, 4]:
+            for force in [False, True]:
+                pages = dict(target_pages)
+                wp = self.getMockWikiPush({}, pages)
+                f = io.StringIO()
+                with redirect_stdout(f):
+                    wp.edit(page_titles, modify=modify, force=force, workers=workers)
+                outputs[(workers, force)] = f.getvalue()
+                edited[(workers, force)] = pages
+                if workers > 1:
+                    # contents are prefetched in batches instead of page by page
+                    wp.toWiki.getPage.assert_not_called()
+                    self.assertEqual(3, wp.toWiki.get_page_contents.call_count)
+        for force in [False, True]:
+            self.assertEqual(outputs[(1, force)], outputs[(4, force)])
+            self.assertEqual(edited[(1, force)], edited[(4, force)])
+        self.assertIn("editing Page03 ...↔", outputs[(4, False)])
+        self.assertIn("editing Missing ...👎", outputs[(4, False)])
+        self.assertIn("editing Page05 ...✅", outputs[(4, True)])
+        self.assertEqual("CONTENT 5", edited[(4, True)]["Page05"])
+        self.assertEqual("content 5", edited[(4, False)]["Page05"])
+
+    def testSectionEdit(self):
+        """
+        test that only the changed section is saved
+        """
+        text = (
+            "lead\n\n== A ==\nApples\n\n== B ==\n{{City\n|name=Bonn\n}}\n\n== C ==\nc"
+        )
+        for workers in [1, 2]:
+            pages = {"Page": text, "Both": text}
+            wp = self.getMockWikiPush({}, pages)
+            f = io.StringIO()
+            with redirect_stdout(f):
+                wp.edit(
+                    ["Page"],
+                    modify=lambda text: text.replace("Apples", "Peaches"),
+                    force=True,
+                    workers=workers,
+                )
+                wp.edit(
+                    ["Both"],
+                    modify=lambda text: text.replace("A", "X").replace("c", "d"),
+                    force=True,
+                    workers=workers,
+                )
+            self.assertEqual(text.replace("Apples", "Peaches"), pages["Page"])
+            self.assertEqual(text.replace("A", "X").replace("c", "d"), pages["Both"])
+            self.assertEqual(["1", None], wp.toWiki.saved_sections)
+        pages = {"Bonn": text}
+        wp = self.getMockWikiPush({}, pages)
+        with redirect_stdout(io.StringIO()):
+            wp.edit_wikison(["Bonn"], "City", "name", "Bonn am Rhein", force=True)
+        self.assertEqual(text.replace("=Bonn", "=Bonn am Rhein"), pages["Bonn"])
+        self.assertEqual(["2"], wp.toWiki.saved_sections)
+
+    def testMergedEdit(self):
+        """
+        test that concurrent changes are merged on edit conflicts
+        """
+        text = "a\nb\nc\nd\ne"
+        for workers in [1, 2]:
+            for remote, expected in [
+                (text.replace("e", "E"), "a\nB\nc\nd\nE"),
+                # the same line was changed - the remote change is kept
+                (text.replace("b", "X"), text.replace("b", "X")),
+            ]:
+                pages = {"Page": text}
+
+                def modify(text):
+                    # simulate an edit by somebody else after the page was read
+                    pages["Page"] = remote
+                    return text.replace("b", "B")
+
+                wp = self.getMockWikiPush({}, pages)
+                f = io.StringIO()
+                with redirect_stdout(f):
+                    wp.edit(["Page"], modify=modify, force=True, workers=workers)
+                self.assertEqual(expected, pages["Page"])
+                merged = expected != remote
+                self.assertEqual(merged, "✅" in f.getvalue())
+                self.assertEqual(merged, "can't be merged" not in f.getvalue())
+        # a page created in the meantime is not overwritten
+        pages = {}
+        wp = self.getMockWikiPush({}, pages)
+
+        def create(text):
+            pages["New"] = "created by somebody else"
+            return "new"
+
+        with redirect_stdout(io.StringIO()):
+            wp.edit(["New"], modify=create, force=True, workers=2)
+        self.assertEqual("created by somebody else", pages["New"])
+
+    def testEditConflictErrors(self):
+        """
+        test that only edit conflicts are merged and other edit errors are re-raised
+        """
+        page = MagicMock()
+        test_params = [
+            (EditError(page, "pushed", "Edit conflict."), True),
+            (EditError(page, {"result": "Failure", "code": "editconflict"}), True),
+            (EditError(page, "pushed", "The text contains a spam link"), False),
+            (EditError(page, {"result": "Failure", "spamblacklist": "x.com"}), False),
+            (APIError("editconflict", "Edit conflict", None), True),
+            (APIError("ratelimited", "Rate limit", None), False),
+        ]
+        for ex, expected in test_params:
+            with self.subTest(ex=ex):
+                self.assertEqual(expected, WikiPush.is_edit_conflict(ex))
+        wp = self.getMockWikiPush({}, {"Page": "a"})
+        spam = EditError(page, "pushed", "The text contains a spam link")
+        save = MagicMock(side_effect=spam)
+        base = PageContent(title="Page", exists=True, content="a", revid=1)
+        with self.assertRaises(EditError) as context:
+            wp.save_merged(save, base, "b", "pushed")
+        self.assertIs(spam, context.exception)
+        # no retry and no merge with the latest revision
+        save.assert_called_once()
+        wp.toWiki.get_page_contents.assert_not_called()
+
+    def testSync(self):
+        """
+        test syncing the recent changes since the high-water mark
+        """
+        source_pages = {"A": "a", "B": "#REDIRECT [[C]]", "C": "c"}
+        target_pages = {"B": "b", "D": "d", "Old": "old"}
+        wp = self.getMockWikiPush(source_pages, target_pages)
+        since = "2026-10-01T00:00:00Z"
+        changes = [
+            {"type": "edit", "rcid": 5, "title": "Old", "timestamp": since},
+            {"type": "edit", "rcid": 6, "title": "A", "timestamp": since},
+            {
+                "type": "log",
+                "rcid": 7,
+                "title": "B",
+                "logtype": "move",
+                "logparams": {"target_ns": 0, "target_title": "C"},
+                "timestamp": "2026-10-02T00:00:00Z",
+            },
+            {
+                "type": "log",
+                "rcid": 8,
+                "title": "D",
+                "logtype": "delete",
+                "timestamp": "2026-10-03T00:00:00Z",
+            },
+            {
+                "type": "log",
+                "rcid": 9,
+                "title": "User:X",
+                "logtype": "newusers",
+                "timestamp": "2026-10-04T00:00:00Z",
+            },
+        ]
+        wp.fromWiki.get_recent_changes.return_value = changes
+        with tempfile.TemporaryDirectory() as tmpdir:
+            statePath = f"{tmpdir}/sync.yaml"
+            SyncState(
+                fromWikiId="mocksource", toWikiId="mocktarget", rcid=5, timestamp=since
+            ).save_to_yaml_file(statePath)
+            f = io.StringIO()
+            with redirect_stdout(f):
+                failed = wp.sync(statePath=statePath)
+            if self.debug:
+                print(f.getvalue())
+            self.assertEqual([], failed)
+            self.assertEqual(
+                {"A": "a", "B": "#REDIRECT [[C]]", "C": "c", "Old": "old"},
+                target_pages,
+            )
+            state = SyncState.load_from_yaml_file(statePath)
+            self.assertEqual(9, state.rcid)
+            self.assertEqual("2026-10-04T00:00:00Z", state.timestamp)
+
+    def testResumeAndRetry(self):
+        """
+        test resuming an interrupted push and retrying failed pages
+        """
+        source_pages = {f"Page{i}": f"content {i}" for i in range(6)}
+        target_pages = {}
+        with tempfile.TemporaryDirectory() as tmpdir:
+            journalPath = f"{tmpdir}/journal.db"
+            wp = self.getMockWikiPush(source_pages, target_pages)
+            wp.open_journal("wikipush", retries=1, journalPath=journalPath)
+            pageTitles = wp.journal_start(list(source_pages.keys()))
+            f = io.StringIO()
+            with redirect_stdout(f):
+                # the job gets interrupted after 3 pages
+                wp.push(pageTitles[:3])
+            self.assertEqual(3, len(target_pages))
+            # the first push attempt of Page4 fails
+            attempts = []
+            wp = self.getMockWikiPush(source_pages, target_pages)
+            edit_page_text = wp.toWiki.edit_page_text.side_effect
+
+            def flaky_edit_page_text(title, *args, **kwargs):
+                if title == "Page4" and not attempts:
+                    attempts.append(title)
+                    raise Exception("timeout")
+                return edit_page_text(title, *args, **kwargs)
+
+            wp.toWiki.edit_page_text.side_effect = flaky_edit_page_text
+            journal = wp.open_journal(
+                "wikipush", resume=True, retries=1, journalPath=journalPath
+            )
+            with redirect_stdout(f):
+                failed = wp.push([])
+                self.assertEqual(["Page4"], failed)
+                wp.retry_failed(wp.push)
+            self.assertEqual(source_pages, target_pages)
+            self.assertEqual({"done": 6}, journal.get_counts())
+
     def testDownload(self):
         """
         check the image download
@@ -1,7 +1,7 @@
 import mwclient
 from basemkit.basetest import Basetest
 
-from wikibot3rd.wikitext import WikiSON
+from wikibot3rd.wikitext import WikiMarkup, WikiSON
 
 
 class TestWikiSON(Basetest):
@@ -113,6 +113,36 @@ class TestWikiSON(Basetest):
                 wikison = WikiSON("test page", markup)
                 self.assertRaises(Exception, wikison.get, entity_type)
 
+    def test_get_section_edit(self):
+        """
+        tests finding the section that contains the changes of the wiki markup
+        """
+        markup = "lead\n\n== A ==\na\n\n=== A1 ===\na1\n\n== B ==\nb"
+        test_params = [
+            # (new markup, expected section edit)
+            (markup.replace("a1", "x1"), (2, "=== A1 ===\nx1\n\n")),
+            (markup.replace("lead", "LEAD"), (0, "LEAD\n\n")),
+            (markup.replace("\nb", "\nbb"), (3, "== B ==\nbb")),
+            (
+                markup.replace("\na\n", "\nx\n").replace("a1", "x1"),
+                (1, "== A ==\nx\n\n=== A1 ===\nx1\n\n"),
+            ),
+            # changes in several sections
+            (markup.replace("lead", "LEAD").replace("\nb", "\nbb"), None),
+            # the whitespace before the next heading would be normalized
+            (markup.replace("a1\n\n", "a1\n"), None),
+            (markup, None),
+        ]
+        for test_param in test_params:
+            with self.subTest(test_param=test_param):
+                new_markup, expected = test_param
+                section_edit = WikiMarkup.get_section_edit(markup, new_markup)
+                self.assertEqual(expected, section_edit)
+        # headings in comments make the section numbering ambiguous
+        markup = "x\n<!--\n== C ==\n-->\n== B ==\nb"
+        self.assertIsNone(WikiMarkup.get_section_spans(markup))
+        self.assertIsNone(WikiMarkup.get_section_edit(markup, markup + "b"))
+
     def test_issue_111(self):
         """
         test add --template option to wikiquery
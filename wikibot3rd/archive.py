@@ -0,0 +1,212 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import io
+import json
+import os
+import shutil
+import tarfile
+import threading
+import zipfile
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+
+class BackupArchive:
+    """
+    a single compressed archive of a wiki backup - pages are streamed into
+    the archive as pages/<title>.wiki members and an index member with the
+    path, revision id, sha1 and size of each page is added when the archive is closed
+    """
+
+    indexName = "index.json"
+    pagePrefix = "pages/"
+    imagePrefix = "images/"
+    # compression by file extension
+    compressions = {
+        ".tar.gz": "gz",
+        ".tgz": "gz",
+        ".tar.xz": "xz",
+        ".txz": "xz",
+        ".zip": "zip",
+    }
+
+    def __init__(self, path: str, mode: str = "r"):
+        """
+        constructor
+
+        Args:
+            path(str): the path of the archive file - the extension selects the compression
+            mode(str): "r" to read or "w" to write the archive
+        """
+        self.path = path
+        self.mode = mode
+        self.compression = self.get_compression(path)
+        if self.compression is None:
+            raise ValueError(
+                f"unsupported archive {path} - use one of {', '.join(self.compressions)}"
+            )
+        self.index: Dict[str, Dict[str, Any]] = {}
+        self.lock = threading.Lock()
+        self.tar = None
+        self.zip = None
+        if mode == "w":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            # the archive only replaces an existing one when it is complete
+            self.tmpPath = f"{path}.tmp"
+            if self.compression == "zip":
+                self.zip = zipfile.ZipFile(
+                    self.tmpPath, "w", compression=zipfile.ZIP_DEFLATED
+                )
+            else:
+                self.tar = tarfile.open(self.tmpPath, f"w|{self.compression}")
+
+    @classmethod
+    def get_compression(cls, path: str) -> Optional[str]:
+        """
+        get the compression for the given archive path
+
+        Args:
+            path(str): the path of the archive
+
+        Returns:
+            str: gz, xz or zip - None if the path is not an archive
+        """
+        for extension, compression in cls.compressions.items():
+            if path.lower().endswith(extension):
+                return compression
+        return None
+
+    @classmethod
+    def is_archive(cls, path: str) -> bool:
+        """
+        check whether the given path is an existing backup archive
+
+        Args:
+            path(str): the path to check
+
+        Returns:
+            bool: True if the path is an archive file
+        """
+        return (
+            path is not None
+            and cls.get_compression(path) is not None
+            and os.path.isfile(path)
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close(complete=exc_type is None)
+
+    def add_file(self, name: str, fileobj, size: int):
+        """
+        stream the content of the given file object into the archive
+
+        Args:
+            name(str): the member name
+            fileobj(file): the file object to read the content from
+            size(int): the size of the content in bytes
+        """
+        with self.lock:
+            if self.zip is not None:
+                with self.zip.open(name, "w", force_zip64=True) as member:
+                    shutil.copyfileobj(fileobj, member)
+            else:
+                info = tarfile.TarInfo(name)
+                info.size = size
+                self.tar.addfile(info, fileobj)
+
+    def add_page(
+        self, title: str, text: str, revid: int = None, sha1: str = None
+    ) -> str:
+        """
+        add the text of the given page
+
+        Args:
+            title(str): the page title
+            text(str): the wiki markup of the page
+            revid(int): the revision id of the text
+            sha1(str): the sha1 of the text
+
+        Returns:
+            str: the member name
+        """
+        name = f"{self.pagePrefix}{title}.wiki"
+        data = text.encode("utf-8")
+        self.add_file(name, io.BytesIO(data), len(data))
+        with self.lock:
+            self.index[title] = {
+                "path": name,
+                "revid": revid,
+                "sha1": sha1,
+                "size": len(data),
+            }
+        return name
+
+    def close(self, complete: bool = True):
+        """
+        close the archive - when writing the index member is added and
+        the archive file is moved into place
+
+        Args:
+            complete(bool): False if writing failed and the archive should be discarded
+        """
+        if self.mode == "w":
+            if complete:
+                data = json.dumps({"pages": self.index}, indent=1).encode("utf-8")
+                self.add_file(self.indexName, io.BytesIO(data), len(data))
+            if self.zip is not None:
+                self.zip.close()
+            if self.tar is not None:
+                self.tar.close()
+            if complete:
+                os.replace(self.tmpPath, self.path)
+            else:
+                os.unlink(self.tmpPath)
+
+    def get_index(self) -> Dict[str, Dict[str, Any]]:
+        """
+        read the index of the archive - for tar archives this is a streaming
+        pass over the archive since the index member is the last one
+
+        Returns:
+            dict: the index entries by page title in archive order
+        """
+        if self.compression == "zip":
+            with zipfile.ZipFile(self.path) as zip_file:
+                records = json.loads(zip_file.read(self.indexName))
+        else:
+            records = {"pages": {}}
+            with tarfile.open(self.path, f"r|{self.compression}") as tar:
+                for member in tar:
+                    if member.name == self.indexName:
+                        records = json.loads(tar.extractfile(member).read())
+        return records["pages"]
+
+    def iter_pages(self) -> Iterator[Tuple[str, str]]:
+        """
+        stream the pages of the archive without extracting it
+
+        Yields:
+            Tuple[str, str]: the title and wiki markup of each page in archive order
+        """
+        suffix = ".wiki"
+        if self.compression == "zip":
+            with zipfile.ZipFile(self.path) as zip_file:
+                for info in zip_file.infolist():
+                    name = info.filename
+                    if name.startswith(self.pagePrefix) and name.endswith(suffix):
+                        title = name[len(self.pagePrefix) : -len(suffix)]
+                        yield title, zip_file.read(info).decode("utf-8")
+        else:
+            with tarfile.open(self.path, f"r|{self.compression}") as tar:
+                for member in tar:
+                    name = member.name
+                    if name.startswith(self.pagePrefix) and name.endswith(suffix):
+                        title = name[len(self.pagePrefix) : -len(suffix)]
+                        text = tar.extractfile(member).read().decode("utf-8")
+                        yield title, text
@@ -0,0 +1,313 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import os
+import sqlite3
+import threading
+from dataclasses import astuple, dataclass, fields
+from typing import Iterator, List, Optional, Tuple
+
+
+@dataclass
+class IndexEntry:
+    """
+    a backup file of a page and the revision it has been backed up from
+    """
+
+    title: str
+    # path of the backup file relative to the backup directory
+    path: str
+    ns: Optional[int] = None
+    size: Optional[int] = None
+    # modification time of the backup file in seconds since the epoch
+    mtime: Optional[float] = None
+    sha1: Optional[str] = None
+    revid: Optional[int] = None
+
+
+class BackupIndex:
+    """
+    SQLite index of the files of a backup directory so that a restore can
+    stream and filter the page titles without scanning the directory tree
+    and an incremental backup can tell which pages have changed
+
+    files that were in the directory before the index was created are added
+    by a single scan - after it the index is complete as long as the
+    directory is only written by wikibackup
+    """
+
+    fileName = ".wikiindex.db"
+    fetchSize = 1000
+
+    def __init__(self, backupPath: str):
+        """
+        constructor
+
+        Args:
+            backupPath(str): the backup directory
+        """
+        self.backupPath = backupPath
+        self.lock = threading.Lock()
+        os.makedirs(backupPath, exist_ok=True)
+        self.connection = sqlite3.connect(self.dbPath, check_same_thread=False)
+        self.connection.execute("""CREATE TABLE IF NOT EXISTS pages (
+            title TEXT PRIMARY KEY,
+            path TEXT NOT NULL,
+            ns INTEGER,
+            size INTEGER,
+            mtime REAL,
+            sha1 TEXT,
+            revid INTEGER
+            )""")
+        columns = [
+            row[1] for row in self.connection.execute("PRAGMA table_info(pages)")
+        ]
+        if "revid" not in columns:
+            self.connection.execute("ALTER TABLE pages ADD COLUMN revid INTEGER")
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS pages_mtime ON pages (mtime)"
+        )
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+        )
+        self.connection.commit()
+        self.columns = ",".join(field.name for field in fields(IndexEntry))
+
+    @property
+    def dbPath(self) -> str:
+        """
+        the path of the index database
+        """
+        return os.path.join(self.backupPath, self.fileName)
+
+    @classmethod
+    def exists(cls, backupPath: str) -> bool:
+        """
+        check whether the given backup directory has an index
+
+        Args:
+            backupPath(str): the backup directory
+
+        Returns:
+            bool: True if the index database exists
+        """
+        return os.path.isfile(os.path.join(backupPath, cls.fileName))
+
+    def update(self, entry: IndexEntry):
+        """
+        add or replace the given entry - call commit to persist the changes
+
+        Args:
+            entry(IndexEntry): the entry
+        """
+        with self.lock:
+            self.connection.execute(
+                f"INSERT OR REPLACE INTO pages ({self.columns}) VALUES (?,?,?,?,?,?,?)",
+                astuple(entry),
+            )
+
+    def update_file(
+        self,
+        title: str,
+        path: str,
+        ns: int = None,
+        sha1: str = None,
+        revid: int = None,
+    ) -> IndexEntry:
+        """
+        add or replace the entry for the given backup file with its current size and modification time
+
+        Args:
+            title(str): the page title
+            path(str): the path of the backup file relative to the backup directory
+            ns(int): the namespace of the page
+            sha1(str): the sha1 of the content
+            revid(int): the revision id the content has been backed up from
+
+        Returns:
+            IndexEntry: the entry
+        """
+        stat = os.stat(os.path.join(self.backupPath, path))
+        entry = IndexEntry(
+            title,
+            path,
+            ns=ns,
+            size=stat.st_size,
+            mtime=stat.st_mtime,
+            sha1=sha1,
+            revid=revid,
+        )
+        self.update(entry)
+        return entry
+
+    def commit(self):
+        """
+        persist the changes
+        """
+        with self.lock:
+            self.connection.commit()
+
+    def close(self):
+        """
+        commit and close the index
+        """
+        self.commit()
+        self.connection.close()
+
+    def is_complete(self) -> bool:
+        """
+        check whether the index covers the files that were in the backup
+        directory before it was created
+
+        Returns:
+            bool: True if the backup directory has been scanned
+        """
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT value FROM meta WHERE key='complete'"
+            ).fetchone()
+        return row is not None and row[0] == "1"
+
+    def scan(self) -> int:
+        """
+        add the .wiki files of the backup directory that are not in the index yet
+        e.g. of backups made before there was an index and mark the index as complete
+
+        Returns:
+            int: the number of entries added
+        """
+        added = 0
+        for path, _subdirs, files in os.walk(self.backupPath):
+            for name in files:
+                if not name.endswith(".wiki"):
+                    continue
+                relPath = os.path.relpath(os.path.join(path, name), self.backupPath)
+                title = relPath[: -len(".wiki")].replace(os.sep, "/")
+                if self.get(title) is None:
+                    self.update_file(title, relPath)
+                    added += 1
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('complete', '1')"
+            )
+        self.commit()
+        return added
+
+    def get(self, title: str) -> Optional[IndexEntry]:
+        """
+        get the entry for the given page title
+
+        Args:
+            title(str): the page title
+
+        Returns:
+            IndexEntry: the entry or None if the page is not in the index
+        """
+        with self.lock:
+            row = self.connection.execute(
+                f"SELECT {self.columns} FROM pages WHERE title=?", (title,)
+            ).fetchone()
+        return IndexEntry(*row) if row is not None else None
+
+    def is_current(self, title: str, revid: int) -> bool:
+        """
+        check whether the given revision of the page is already backed up
+
+        Args:
+            title(str): the page title
+            revid(int): the latest revision id of the page
+
+        Returns:
+            bool: True if the index has the given revision and its file exists
+        """
+        entry = self.get(title)
+        current = (
+            entry is not None
+            and revid is not None
+            and entry.revid == revid
+            and os.path.isfile(os.path.join(self.backupPath, entry.path))
+        )
+        return current
+
+    @staticmethod
+    def get_condition(
+        namespaces: List[int] = None, prefix: str = None, since: float = None
+    ) -> Tuple[str, tuple]:
+        """
+        get the SQL condition for the given filters
+
+        Args:
+            namespaces(list): the namespace numbers to include - None for all
+            prefix(str): the title prefix to include - None for all
+            since(float): the minimum modification time - None for all
+
+        Returns:
+            Tuple[str, tuple]: the condition and its parameters
+        """
+        conditions = ["1=1"]
+        params = []
+        if namespaces:
+            conditions.append(f"ns IN ({','.join('?' * len(namespaces))})")
+            params.extend(namespaces)
+        if prefix:
+            conditions.append("substr(title,1,?)=?")
+            params.extend([len(prefix), prefix])
+        if since is not None:
+            conditions.append("mtime>=?")
+            params.append(since)
+        return " AND ".join(conditions), tuple(params)
+
+    def count(
+        self, namespaces: List[int] = None, prefix: str = None, since: float = None
+    ) -> int:
+        """
+        count the entries matching the given filters
+
+        Args:
+            namespaces(list): the namespace numbers to include - None for all
+            prefix(str): the title prefix to include - None for all
+            since(float): the minimum modification time - None for all
+
+        Returns:
+            int: the number of matching entries
+        """
+        condition, params = self.get_condition(namespaces, prefix, since)
+        with self.lock:
+            row = self.connection.execute(
+                f"SELECT count(*) FROM pages WHERE {condition}", params
+            ).fetchone()
+        return row[0]
+
+    def iter_entries(
+        self, namespaces: List[int] = None, prefix: str = None, since: float = None
+    ) -> Iterator[IndexEntry]:
+        """
+        stream the entries matching the given filters
+
+        Args:
+            namespaces(list): the namespace numbers to include - None for all
+            prefix(str): the title prefix to include - None for all
+            since(float): the minimum modification time - None for all
+
+        Yields:
+            IndexEntry: the matching entries in title order
+        """
+        condition, params = self.get_condition(namespaces, prefix, since)
+        # a separate connection is not affected by concurrent updates
+        connection = sqlite3.connect(self.dbPath)
+        try:
+            cursor = connection.execute(
+                f"SELECT {self.columns} FROM pages WHERE {condition} ORDER BY title",
+                params,
+            )
+            while True:
+                rows = cursor.fetchmany(self.fetchSize)
+                if not rows:
+                    break
+                for row in rows:
+                    yield IndexEntry(*row)
+        finally:
+            connection.close()
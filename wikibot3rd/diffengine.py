@@ -0,0 +1,226 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import difflib
+from typing import Iterator, List, Optional, Tuple
+
+# an opcode of difflib.SequenceMatcher: tag, i1, i2, j1, j2
+Opcode = Tuple[str, int, int, int, int]
+
+
+class DiffEngine:
+    """
+    line based unified diff for large pages - the lines are hashed to
+    integers first, the common prefix and suffix are trimmed so that only
+    the changed region is matched and the output is streamed with an
+    optional maximum number of lines
+    """
+
+    truncated = "..."
+
+    def __init__(
+        self, n: int = 1, forHuman: bool = True, max_lines: Optional[int] = None
+    ):
+        """
+        constructor
+
+        Args:
+            n(int): the number of context lines
+            forHuman(bool): if True leave out the file and hunk headers
+            max_lines(int): the maximum number of diff lines - None for no limit
+        """
+        self.n = n
+        self.forHuman = forHuman
+        self.max_lines = max_lines
+
+    @staticmethod
+    def get_opcodes(a: List[str], b: List[str]) -> List[Opcode]:
+        """
+        get the opcodes to turn the lines a into the lines b
+
+        Args:
+            a(list): the old lines
+            b(list): the new lines
+
+        Returns:
+            list: the opcodes
+        """
+        la, lb = len(a), len(b)
+        prefix = 0
+        limit = min(la, lb)
+        while prefix < limit and a[prefix] == b[prefix]:
+            prefix += 1
+        suffix = 0
+        limit -= prefix
+        while suffix < limit and a[la - 1 - suffix] == b[lb - 1 - suffix]:
+            suffix += 1
+        a_end, b_end = la - suffix, lb - suffix
+        opcodes = []
+        if prefix > 0:
+            opcodes.append(("equal", 0, prefix, 0, prefix))
+        if prefix == a_end and prefix == b_end:
+            pass
+        elif prefix == a_end:
+            opcodes.append(("insert", prefix, prefix, prefix, b_end))
+        elif prefix == b_end:
+            opcodes.append(("delete", prefix, a_end, prefix, prefix))
+        else:
+            # match hashes of the changed region only
+            ids = {}
+            a_ids = [ids.setdefault(line, len(ids)) for line in a[prefix:a_end]]
+            b_ids = [ids.setdefault(line, len(ids)) for line in b[prefix:b_end]]
+            matcher = difflib.SequenceMatcher(None, a_ids, b_ids)
+            for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+                opcodes.append(
+                    (tag, i1 + prefix, i2 + prefix, j1 + prefix, j2 + prefix)
+                )
+        if suffix > 0:
+            opcodes.append(("equal", a_end, la, b_end, lb))
+        return opcodes
+
+    @classmethod
+    def merge(cls, base: str, local: str, remote: str) -> Optional[str]:
+        """
+        three-way merge of the local and the remote changes of the given base text
+
+        Args:
+            base(str): the text both changes were made to
+            local(str): the text with the local changes
+            remote(str): the text with the remote changes
+
+        Returns:
+            str: the text with both changes or None if changes of the same or
+            adjacent lines differ
+        """
+        if local == remote or remote == base:
+            return local
+        if local == base:
+            return remote
+        a = base.split("\n")
+        changes = []
+        for text in [local, remote]:
+            b = text.split("\n")
+            for tag, i1, i2, j1, j2 in cls.get_opcodes(a, b):
+                if tag != "equal":
+                    changes.append((i1, i2, b[j1:j2]))
+        changes.sort(key=lambda change: (change[0], change[1]))
+        lines = []
+        pos = 0
+        previous = None
+        for change in changes:
+            i1, i2, new_lines = change
+            if previous is not None and i1 <= previous[1]:
+                if change == previous:
+                    # the same change was made locally and remotely
+                    continue
+                return None
+            lines.extend(a[pos:i1])
+            lines.extend(new_lines)
+            pos = i2
+            previous = change
+        lines.extend(a[pos:])
+        return "\n".join(lines)
+
+    @staticmethod
+    def get_groups(opcodes: List[Opcode], n: int) -> Iterator[List[Opcode]]:
+        """
+        group the given opcodes to hunks with up to n lines of context
+        like difflib.SequenceMatcher.get_grouped_opcodes
+
+        Args:
+            opcodes(list): the opcodes
+            n(int): the number of context lines
+
+        Yields:
+            list: the opcodes of a hunk
+        """
+        if not opcodes or (len(opcodes) == 1 and opcodes[0][0] == "equal"):
+            return
+        codes = list(opcodes)
+        tag, i1, i2, j1, j2 = codes[0]
+        if tag == "equal":
+            codes[0] = tag, max(i1, i2 - n), i2, max(j1, j2 - n), j2
+        tag, i1, i2, j1, j2 = codes[-1]
+        if tag == "equal":
+            codes[-1] = tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)
+        group = []
+        for tag, i1, i2, j1, j2 in codes:
+            # split at large unchanged ranges
+            if tag == "equal" and i2 - i1 > 2 * n:
+                group.append((tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)))
+                yield group
+                group = []
+                i1, j1 = max(i1, i2 - n), max(j1, j2 - n)
+            group.append((tag, i1, i2, j1, j2))
+        if group and not (len(group) == 1 and group[0][0] == "equal"):
+            yield group
+
+    @staticmethod
+    def get_range(start: int, stop: int) -> str:
+        """
+        get the unified diff notation of the given line range
+        """
+        beginning = start + 1
+        length = stop - start
+        if length == 1:
+            return f"{beginning}"
+        if not length:
+            beginning -= 1
+        return f"{beginning},{length}"
+
+    def iter_diff(self, text: str, newText: str) -> Iterator[str]:
+        """
+        stream the differences of the given texts
+
+        Args:
+            text(str): old text to compare the new text to
+            newText(str): new text
+
+        Yields:
+            str: the diff lines - the last line is the truncated marker if
+            there are more than max_lines lines
+        """
+        a = text.split("\n")
+        b = newText.split("\n")
+        count = 0
+        started = False
+        for group in self.get_groups(self.get_opcodes(a, b), self.n):
+            lines = []
+            if not self.forHuman:
+                if not started:
+                    lines.extend(["--- ", "+++ "])
+                    started = True
+                first, last = group[0], group[-1]
+                old_range = self.get_range(first[1], last[2])
+                new_range = self.get_range(first[3], last[4])
+                lines.append(f"@@ -{old_range} +{new_range} @@")
+            for line in lines:
+                yield line
+            for tag, i1, i2, j1, j2 in group:
+                if tag == "equal":
+                    changes = [" " + line for line in a[i1:i2]]
+                else:
+                    changes = ["-" + line for line in a[i1:i2]]
+                    changes.extend("+" + line for line in b[j1:j2])
+                for line in changes:
+                    if self.max_lines is not None and count >= self.max_lines:
+                        yield self.truncated
+                        return
+                    count += 1
+                    yield line
+
+    def get_diff(self, text: str, newText: str) -> str:
+        """
+        get the differences of the given texts
+
+        Args:
+            text(str): old text to compare the new text to
+            newText(str): new text
+
+        Returns:
+            str: difference string
+        """
+        return "\n".join(self.iter_diff(text, newText))
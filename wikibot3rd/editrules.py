@@ -0,0 +1,220 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import re
+import threading
+from collections import Counter
+from dataclasses import field
+from typing import List, Optional
+
+from basemkit.yamlable import lod_storable
+
+
+@lod_storable
+class EditRule:
+    """
+    a search and replace rule of wikiedit
+    """
+
+    search: str
+    replace: str = ""
+    # search and replace are plain text instead of a regular expression and a template
+    literal: bool = False
+    ignoreCase: bool = False
+
+
+@lod_storable
+class EditRules:
+    """
+    the rules of a wikiedit rules file
+    """
+
+    rules: List[EditRule] = field(default_factory=list)
+
+
+class RuleEngine:
+    """
+    applies a list of search and replace rules to a text in a single call -
+    the rules are compiled once and a rule is only run by the regex engine if
+    the text contains the literal that each of its matches requires
+    """
+
+    # inline flags change how the literal of a pattern matches
+    inline_flags = re.compile(r"\(\?[aiLmsux-]")
+    # number of hex digits of code point escapes
+    hex_digits = {"x": 2, "u": 4, "U": 8}
+
+    def __init__(self, rules: List[EditRule]):
+        """
+        constructor
+
+        Args:
+            rules(list): the rules to apply in the given order
+        """
+        self.rules = rules
+        self.hits = Counter()
+        self.lock = threading.Lock()
+        self.compiled = []
+        for rule in rules:
+            flags = re.IGNORECASE if rule.ignoreCase else 0
+            if rule.literal:
+                regex = re.compile(re.escape(rule.search), flags)
+                replace = rule.replace.replace("\\", "\\\\")
+                literal = rule.search
+            else:
+                regex = re.compile(rule.search, flags)
+                replace = rule.replace
+                literal = self.get_required_literal(rule.search)
+            if rule.ignoreCase:
+                # case folding of the regex engine differs from str.lower
+                literal = None
+            self.compiled.append((regex, replace, literal))
+
+    @classmethod
+    def of_yaml_file(cls, path: str) -> "RuleEngine":
+        """
+        create a rule engine for the given rules file
+
+        Args:
+            path(str): the path of the YAML rules file
+
+        Returns:
+            RuleEngine: the rule engine
+        """
+        edit_rules = EditRules.load_from_yaml_file(path)
+        return cls(edit_rules.rules)
+
+    @classmethod
+    def get_required_literal(cls, pattern: str) -> Optional[str]:
+        """
+        get the longest literal text that every match of the given regular expression contains
+
+        Args:
+            pattern(str): the regular expression
+
+        Returns:
+            str: the literal or None if no literal is required
+        """
+        if cls.inline_flags.search(pattern):
+            return None
+        runs = []
+        run = []
+        i = 0
+        n = len(pattern)
+
+        def skip_class(j: int) -> int:
+            # j is the index after the opening bracket
+            if j < n and pattern[j] == "^":
+                j += 1
+            if j < n and pattern[j] == "]":
+                j += 1
+            while j < n and pattern[j] != "]":
+                j += 2 if pattern[j] == "\\" else 1
+            return j + 1
+
+        while i < n:
+            c = pattern[i]
+            if c == "\\":
+                escaped = pattern[i + 1 : i + 2]
+                i += 2
+                if escaped and not escaped.isalnum():
+                    run.append(escaped)
+                    continue
+                # character class, anchor, code point or backreference
+                runs.append(run)
+                run = []
+                if escaped in cls.hex_digits:
+                    i += cls.hex_digits[escaped]
+                elif escaped == "N":
+                    close = pattern.find("}", i)
+                    i = close + 1 if close >= 0 else n
+                elif escaped.isdigit():
+                    while i < n and pattern[i].isdigit():
+                        i += 1
+            elif c == "[":
+                runs.append(run)
+                run = []
+                i = skip_class(i + 1)
+            elif c == "(":
+                runs.append(run)
+                run = []
+                depth = 0
+                while i < n:
+                    c = pattern[i]
+                    if c == "\\":
+                        i += 2
+                        continue
+                    if c == "[":
+                        i = skip_class(i + 1)
+                        continue
+                    if c == "(":
+                        depth += 1
+                    elif c == ")":
+                        depth -= 1
+                        if depth == 0:
+                            i += 1
+                            break
+                    i += 1
+            elif c == "|":
+                # alternatives at the top level do not share a literal
+                return None
+            elif c in "*?{":
+                # the preceding character is optional
+                if run:
+                    run.pop()
+                runs.append(run)
+                run = []
+                if c == "{":
+                    close = pattern.find("}", i)
+                    i = close + 1 if close >= 0 else n
+                else:
+                    i += 1
+            elif c == "+":
+                # the preceding character may be repeated
+                runs.append(run)
+                run = []
+                i += 1
+            elif c in ".^$":
+                runs.append(run)
+                run = []
+                i += 1
+            else:
+                run.append(c)
+                i += 1
+        runs.append(run)
+        literal = "".join(max(runs, key=len))
+        return literal if literal else None
+
+    def __call__(self, text: str) -> str:
+        """
+        apply the rules to the given text
+
+        Args:
+            text(str): the text to modify
+
+        Returns:
+            str: the modified text
+        """
+        for index, (regex, replace, literal) in enumerate(self.compiled):
+            if literal is not None and literal not in text:
+                continue
+            text, count = regex.subn(replace, text)
+            if count:
+                with self.lock:
+                    self.hits[index] += count
+        return text
+
+    def get_summary(self) -> str:
+        """
+        get the number of replacements per rule
+
+        Returns:
+            str: one line per rule
+        """
+        lines = []
+        for index, rule in enumerate(self.rules):
+            lines.append(f"rule {index + 1} {rule.search}: {self.hits[index]}")
+        return "\n".join(lines)
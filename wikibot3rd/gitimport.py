@@ -0,0 +1,199 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import datetime
+import io
+import os
+import shutil
+import subprocess
+from typing import Dict, Optional
+
+from git import InvalidGitRepositoryError, NoSuchPathError, Repo
+
+
+class GitFastImport:
+    """
+    stream blobs and commits into a git repository with git fast-import -
+    the objects are written directly to the object database so that
+    neither a working tree nor an index is involved
+    """
+
+    def __init__(self, repoPath: str):
+        """
+        constructor - a bare repository is initialized if there is no repository at the given path yet
+
+        Args:
+            repoPath(str): the path of the git repository
+
+        Raises:
+            ValueError: if the repository has a working tree - fast-import only moves the
+                branch so that the checkout and the index would silently go stale
+        """
+        self.repoPath = repoPath
+        try:
+            self.repo = Repo(repoPath)
+        except (InvalidGitRepositoryError, NoSuchPathError):
+            os.makedirs(repoPath, exist_ok=True)
+            self.repo = Repo.init(repoPath, bare=True)
+        if not self.repo.bare:
+            raise ValueError(
+                f"{repoPath} is not a bare git repository - git fast-import would not update its working tree"
+            )
+        self.ref = self.repo.head.reference.path
+        # an existing branch needs to be continued explicitly
+        self.parent = f"{self.ref}^0" if self.repo.head.is_valid() else None
+        self.mark = 0
+        self.commits = 0
+        self.process = subprocess.Popen(
+            ["git", "fast-import", "--quiet", "--done"],
+            cwd=self.repo.git_dir,
+            stdin=subprocess.PIPE,
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close(complete=exc_type is None)
+
+    def write(self, data: bytes):
+        """
+        write the given raw data to the fast-import stream
+
+        Args:
+            data(bytes): the data
+        """
+        self.process.stdin.write(data)
+
+    def write_data(self, data: bytes):
+        """
+        write a data command with the given content
+
+        Args:
+            data(bytes): the content
+        """
+        self.write(b"data %d\n" % len(data))
+        self.write(data)
+        self.write(b"\n")
+
+    def add_blob(self, data: bytes) -> str:
+        """
+        add a blob with the given content
+
+        Args:
+            data(bytes): the content of the blob
+
+        Returns:
+            str: the mark referring to the blob
+        """
+        return self.add_blob_file(io.BytesIO(data), len(data))
+
+    def add_blob_file(self, fileobj, size: int) -> str:
+        """
+        stream the content of the given file object as a blob
+
+        Args:
+            fileobj(file): the binary file object to read the content from
+            size(int): the size of the content in bytes
+
+        Returns:
+            str: the mark referring to the blob
+        """
+        self.mark += 1
+        mark = f":{self.mark}"
+        self.write(b"blob\nmark %s\ndata %d\n" % (mark.encode(), size))
+        shutil.copyfileobj(fileobj, self.process.stdin)
+        self.write(b"\n")
+        return mark
+
+    @staticmethod
+    def get_ident(name: str, email: str, timestamp: Optional[str] = None) -> str:
+        """
+        get a fast-import identity in raw date format
+
+        Args:
+            name(str): the name
+            email(str): the email address
+            timestamp(str): ISO 8601 timestamp e.g. 2026-10-17T12:00:00Z - None for now
+
+        Returns:
+            str: the identity
+        """
+        if timestamp is None:
+            when = datetime.datetime.now(datetime.timezone.utc)
+        else:
+            when = datetime.datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+        # angle brackets and newlines are not allowed in names
+        for char in "<>\n":
+            name = name.replace(char, "")
+            email = email.replace(char, "")
+        return f"{name} <{email}> {int(when.timestamp())} +0000"
+
+    def commit(
+        self,
+        files: Dict[str, Optional[str]],
+        message: str,
+        name: str = "wikibackup",
+        email: str = "wikibackup@localhost",
+        timestamp: Optional[str] = None,
+    ) -> str:
+        """
+        commit the given file changes on top of the current branch
+
+        Args:
+            files(dict): the blob marks keyed by path - None to delete the path
+            message(str): the commit message
+            name(str): the author name
+            email(str): the author email
+            timestamp(str): the ISO 8601 author timestamp - None for now
+
+        Returns:
+            str: the mark referring to the commit
+        """
+        self.mark += 1
+        mark = f":{self.mark}"
+        author = self.get_ident(name, email, timestamp)
+        committer = self.get_ident("wikibackup", "wikibackup@localhost")
+        lines = [
+            f"commit {self.ref}",
+            f"mark {mark}",
+            f"author {author}",
+            f"committer {committer}",
+        ]
+        self.write(("\n".join(lines) + "\n").encode("utf-8"))
+        self.write_data(message.encode("utf-8"))
+        if self.parent is not None:
+            self.write(f"from {self.parent}\n".encode("utf-8"))
+            self.parent = None
+        for path, blob in files.items():
+            quoted = '"%s"' % path.replace("\\", "\\\\").replace('"', '\\"')
+            if blob is None:
+                self.write(f"D {quoted}\n".encode("utf-8"))
+            else:
+                self.write(f"M 100644 {blob} {quoted}\n".encode("utf-8"))
+        self.write(b"\n")
+        self.commits += 1
+        return mark
+
+    def close(self, complete: bool = True):
+        """
+        finish the fast-import stream
+
+        Args:
+            complete(bool): False to abort the import - objects written so far are discarded
+
+        Raises:
+            Exception: if git fast-import failed
+        """
+        if complete:
+            self.write(b"done\n")
+            self.process.stdin.close()
+            returncode = self.process.wait()
+            if returncode != 0:
+                raise Exception(f"git fast-import failed with exit code {returncode}")
+        else:
+            self.process.kill()
+            self.process.wait()
@@ -0,0 +1,146 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import datetime
+import sqlite3
+import threading
+from typing import Dict, List
+
+
+class JobJournal:
+    """
+    persistent SQLite journal of the status of the pages of a
+    wikipush, wikibackup or wikirestore job to be able to resume
+    an interrupted job and retry failed pages
+    """
+
+    def __init__(self, dbPath: str, job: str):
+        """
+        constructor
+
+        Args:
+            dbPath(str): the path of the SQLite database file
+            job(str): the id of the job e.g. wikipush_smw_test
+        """
+        self.dbPath = dbPath
+        self.job = job
+        self.started = False
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(dbPath, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("""CREATE TABLE IF NOT EXISTS pages (
+            job TEXT NOT NULL,
+            title TEXT NOT NULL,
+            seq INTEGER NOT NULL,
+            status TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            error TEXT,
+            updated TEXT,
+            PRIMARY KEY (job, title)
+            )""")
+        self.connection.commit()
+
+    def start(
+        self, pageTitles: List[str], resume: bool = False, maxAttempts: int = 1
+    ) -> List[str]:
+        """
+        start the job for the given page titles
+
+        Args:
+            pageTitles(list): the page titles of the job
+            resume(bool): if True continue the job recorded in the journal
+            maxAttempts(int): the maximum number of attempts for failed pages on resume
+
+        Returns:
+            list: the page titles that still need to be worked on
+        """
+        self.started = True
+        if resume:
+            pending = self.get_titles(
+                "(status='pending' OR (status='failed' AND attempts<?))",
+                (maxAttempts,),
+            )
+            if pending or self.get_counts():
+                return pending
+        with self.lock:
+            self.connection.execute("DELETE FROM pages WHERE job=?", (self.job,))
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO pages (job,title,seq,status) VALUES (?,?,?,'pending')",
+                [(self.job, title, seq) for seq, title in enumerate(pageTitles)],
+            )
+            self.connection.commit()
+        return list(pageTitles)
+
+    def mark(self, pageTitle: str, ok: bool, error: str = None):
+        """
+        record the outcome of working on the given page
+
+        Args:
+            pageTitle(str): the title of the page
+            ok(bool): True if the page was done successfully
+            error(str): the error message if the page failed
+        """
+        status = "done" if ok else "failed"
+        updated = datetime.datetime.now().isoformat()
+        with self.lock:
+            self.connection.execute(
+                """UPDATE pages SET status=?, attempts=attempts+1, error=?, updated=?
+                WHERE job=? AND title=?""",
+                (status, error, updated, self.job, pageTitle),
+            )
+            self.connection.commit()
+
+    def get_titles(self, condition: str, params: tuple = ()) -> List[str]:
+        """
+        get the page titles of my job matching the given condition in job order
+
+        Args:
+            condition(str): the SQL condition
+            params(tuple): the parameters of the condition
+
+        Returns:
+            list: the matching page titles
+        """
+        with self.lock:
+            cursor = self.connection.execute(
+                f"SELECT title FROM pages WHERE job=? AND {condition} ORDER BY seq",
+                (self.job, *params),
+            )
+            titles = [row[0] for row in cursor.fetchall()]
+        return titles
+
+    def get_failed(self, maxAttempts: int) -> List[str]:
+        """
+        get the titles of the failed pages that may be retried
+
+        Args:
+            maxAttempts(int): the maximum number of attempts per page
+
+        Returns:
+            list: the failed page titles with less than maxAttempts attempts
+        """
+        return self.get_titles("status='failed' AND attempts<?", (maxAttempts,))
+
+    def get_counts(self) -> Dict[str, int]:
+        """
+        get the number of pages by status
+
+        Returns:
+            dict: the counts by status
+        """
+        with self.lock:
+            cursor = self.connection.execute(
+                "SELECT status,count(*) FROM pages WHERE job=? GROUP BY status",
+                (self.job,),
+            )
+            counts = dict(cursor.fetchall())
+        return counts
+
+    def close(self):
+        """
+        close the journal
+        """
+        self.connection.close()
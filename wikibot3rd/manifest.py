@@ -0,0 +1,157 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import json
+import os
+import threading
+from dataclasses import asdict, dataclass
+from typing import Dict, Optional
+
+
+@dataclass
+class ManifestEntry:
+    """
+    the backed up revision of a page
+    """
+
+    revid: Optional[int] = None
+    sha1: Optional[str] = None
+    # path of the backup file relative to the backup directory
+    path: Optional[str] = None
+
+
+class BackupManifest:
+    """
+    manifest of a git backup mapping each page title to the revision id, sha1
+    and file path of its backup - the backed up image files are kept apart
+    from the pages keyed by their path
+    """
+
+    fileName = ".wikibackup.json"
+
+    def __init__(self, backupPath: str):
+        """
+        constructor
+
+        Args:
+            backupPath(str): the backup directory
+        """
+        self.backupPath = backupPath
+        self.entries: Dict[str, ManifestEntry] = {}
+        self.images: Dict[str, ManifestEntry] = {}
+        self.lock = threading.Lock()
+
+    @property
+    def filePath(self) -> str:
+        """
+        the path of the manifest file
+        """
+        return os.path.join(self.backupPath, self.fileName)
+
+    @classmethod
+    def load(cls, backupPath: str) -> "BackupManifest":
+        """
+        load the manifest of the given backup directory
+
+        Args:
+            backupPath(str): the backup directory
+
+        Returns:
+            BackupManifest: the manifest - empty if there is none yet
+        """
+        manifest = cls(backupPath)
+        if os.path.isfile(manifest.filePath):
+            with open(manifest.filePath) as manifestFile:
+                records = json.load(manifestFile)
+            for title, record in records.get("pages", {}).items():
+                manifest.entries[title] = ManifestEntry(**record)
+            for path, record in records.get("images", {}).items():
+                manifest.images[path] = ManifestEntry(**record)
+        return manifest
+
+    def save(self):
+        """
+        save the manifest atomically
+        """
+        os.makedirs(self.backupPath, exist_ok=True)
+        with self.lock:
+            records = {
+                "pages": {
+                    title: asdict(entry)
+                    for title, entry in sorted(self.entries.items())
+                },
+                "images": {
+                    path: asdict(entry) for path, entry in sorted(self.images.items())
+                },
+            }
+        tmpPath = f"{self.filePath}.tmp"
+        with open(tmpPath, "w") as manifestFile:
+            json.dump(records, manifestFile, indent=1)
+        os.replace(tmpPath, self.filePath)
+
+    def get(self, title: str) -> Optional[ManifestEntry]:
+        """
+        get the manifest entry for the given title
+
+        Args:
+            title(str): the page title
+
+        Returns:
+            ManifestEntry: the entry or None if the page has not been backed up
+        """
+        with self.lock:
+            return self.entries.get(title)
+
+    def update(self, title: str, revid: int, sha1: str, path: str):
+        """
+        record the backup of the given revision of a page
+
+        Args:
+            title(str): the page title
+            revid(int): the revision id
+            sha1(str): the sha1 of the revision content
+            path(str): the path of the backup file relative to the backup directory
+        """
+        with self.lock:
+            self.entries[title] = ManifestEntry(revid=revid, sha1=sha1, path=path)
+
+    def get_image(self, path: str) -> Optional[ManifestEntry]:
+        """
+        get the manifest entry for the image file with the given path
+
+        Args:
+            path(str): the path of the image file relative to the backup directory
+
+        Returns:
+            ManifestEntry: the entry or None if the image has not been backed up
+        """
+        with self.lock:
+            return self.images.get(path)
+
+    def update_image(self, path: str, sha1: str):
+        """
+        record the backup of the image file with the given path
+
+        Args:
+            path(str): the path of the image file relative to the backup directory
+            sha1(str): the sha1 of the image file
+        """
+        with self.lock:
+            self.images[path] = ManifestEntry(sha1=sha1, path=path)
+
+    def is_current_revision(self, title: str, revid: int) -> bool:
+        """
+        check whether the given revision of the page has been recorded
+
+        Args:
+            title(str): the page title
+            revid(int): the latest revision id of the page
+
+        Returns:
+            bool: True if the manifest has the given revision
+        """
+        entry = self.get(title)
+        return entry is not None and revid is not None and entry.revid == revid
@@ -19,6 +19,7 @@ except ImportError:
         "fastmcp is required for MCP server. Install with: pip install py-3rdparty-mediawiki[mcp]"
     )
 
+from wikibot3rd.diffengine import DiffEngine
 from wikibot3rd.smw import SMWClient
 from wikibot3rd.version import Version
 from wikibot3rd.wikiclient import WikiClient
@@ -703,13 +704,14 @@ def commit_edit_impl(wiki_id: str, page_title: str, token: str) -> Dict[str, Any
     }
 
 
-def generate_diff(old: str, new: str) -> str:
+def generate_diff(old: str, new: str, max_lines: Optional[int] = 1000) -> str:
     """
-    Generate a simple unified diff-like output.
+    Generate a unified diff of the changed lines.
 
     Args:
         old: Old content.
         new: New content.
+        max_lines: Maximum number of diff lines - None for no limit.
 
     Returns:
         String showing the difference.
@@ -727,8 +729,8 @@ def generate_diff(old: str, new: str) -> str:
     if old == new:
         diff_lines.append("No changes")
     else:
-        diff_lines.append(f"Old content:\n{old}")
-        diff_lines.append(f"New content:\n{new}")
+        diff_engine = DiffEngine(n=3, max_lines=max_lines)
+        diff_lines.extend(diff_engine.iter_diff(old, new))
         diff_lines.append(f"Content changed ({old_len} -> {new_len} lines)")
 
     return "\n".join(diff_lines)
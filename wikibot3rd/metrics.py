@@ -0,0 +1,316 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import contextlib
+import csv
+import json
+import math
+import threading
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass, fields
+from typing import Any, Dict, List, Optional
+
+
+@dataclass
+class PageMetrics:
+    """
+    the performance metrics of working on a single page
+    """
+
+    title: str
+    outcome: str = ""
+    # None if there was no fetch or write for the page e.g. if it was skipped
+    fetch_latency: Optional[float] = None
+    edit_latency: Optional[float] = None
+    bytes: int = 0
+    api_calls: int = 0
+    retries: int = 0
+
+
+class PerformanceReport:
+    """
+    collects per page metrics of a wikipush run - API calls and bytes are
+    counted by a response hook of the requests sessions of the wikis and
+    attributed to the page or the batch lookup the current thread is working on
+    """
+
+    percents = [50, 95, 99]
+
+    def __init__(self):
+        """
+        constructor
+        """
+        self.pages: List[PageMetrics] = []
+        self.batches: List[PageMetrics] = []
+        self.api_calls = 0
+        self.bytes = 0
+        self.retries = 0
+        self.start_time = time.time()
+        self.end_time = None
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def attach(self, site):
+        """
+        count the API calls and bytes transferred of the given mwclient site
+
+        Args:
+            site(Site): the mwclient site
+        """
+        site.connection.hooks["response"].append(self.on_response)
+
+    def on_response(self, response, *_args, **kwargs):
+        """
+        requests response hook
+
+        Args:
+            response(Response): the response
+            **kwargs: the send arguments e.g. stream
+        """
+        sent = response.request.body if response.request is not None else None
+        size = len(sent) if sent is not None and hasattr(sent, "__len__") else 0
+        if kwargs.get("stream"):
+            # do not consume streamed downloads
+            size += int(response.headers.get("Content-Length", 0))
+        else:
+            size += len(response.content)
+        page = self.get_page()
+        with self.lock:
+            self.api_calls += 1
+            self.bytes += size
+            if page is not None:
+                page.api_calls += 1
+                page.bytes += size
+
+    def get_page(self) -> Optional[PageMetrics]:
+        """
+        get the metrics of the page the current thread is working on
+
+        Returns:
+            PageMetrics: the page metrics or None
+        """
+        return getattr(self.local, "page", None)
+
+    @contextlib.contextmanager
+    def page(self, title: str):
+        """
+        collect the metrics of working on the page with the given title
+        in the current thread
+
+        Args:
+            title(str): the title of the page
+        """
+        page = PageMetrics(title)
+        self.local.page = page
+        try:
+            yield page
+        finally:
+            self.local.page = None
+            with self.lock:
+                self.pages.append(page)
+
+    @contextlib.contextmanager
+    def batch(self, title: str):
+        """
+        collect the metrics of a batched lookup for several pages in the
+        current thread - batches are reported apart from the pages
+
+        Args:
+            title(str): the title of the batch
+        """
+        batch = PageMetrics(title, outcome="batch")
+        self.local.page = batch
+        try:
+            yield batch
+        finally:
+            self.local.page = None
+            with self.lock:
+                self.batches.append(batch)
+
+    @contextlib.contextmanager
+    def timed(self, kind: str):
+        """
+        add the time spent in the context to the given latency of the current page
+
+        Args:
+            kind(str): fetch or edit
+        """
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.add_latency(kind, time.monotonic() - start)
+
+    def add_latency(self, kind: str, seconds: float):
+        """
+        add the given latency to the current page
+
+        Args:
+            kind(str): fetch or edit
+            seconds(float): the latency in seconds
+        """
+        page = self.get_page()
+        if page is not None:
+            attr = f"{kind}_latency"
+            setattr(page, attr, (getattr(page, attr) or 0.0) + seconds)
+
+    def set_outcome(self, outcome: str):
+        """
+        set the outcome of the current page
+
+        Args:
+            outcome(str): e.g. created, updated, skipped or failed
+        """
+        page = self.get_page()
+        if page is not None:
+            page.outcome = outcome
+
+    def count_retry(self):
+        """
+        count a retried request
+        """
+        page = self.get_page()
+        with self.lock:
+            self.retries += 1
+            if page is not None:
+                page.retries += 1
+
+    def finish(self):
+        """
+        mark the end of the run
+        """
+        self.end_time = time.time()
+
+    @staticmethod
+    def get_percentile(values: List[float], percent: float) -> float:
+        """
+        get the given percentile of the given values (nearest rank)
+
+        Args:
+            values(list): the values
+            percent(float): the percentile e.g. 95
+
+        Returns:
+            float: the percentile - 0.0 for no values
+        """
+        if not values:
+            return 0.0
+        ordered = sorted(values)
+        rank = max(1, math.ceil(percent * len(ordered) / 100))
+        return ordered[rank - 1]
+
+    def get_latencies(self, kind: str) -> Dict[str, float]:
+        """
+        get the total and the percentiles of the given latency of the pages
+        that had a fetch or write - skipped pages are left out
+
+        Args:
+            kind(str): fetch or edit
+
+        Returns:
+            dict: count, total, p50, p95, p99 and max in seconds
+        """
+        values = [
+            latency
+            for latency in (getattr(page, f"{kind}_latency") for page in self.pages)
+            if latency is not None
+        ]
+        latencies = {"count": len(values), "total": sum(values)}
+        for percent in self.percents:
+            latencies[f"p{percent}"] = self.get_percentile(values, percent)
+        latencies["max"] = max(values) if values else 0.0
+        return latencies
+
+    def get_summary(self) -> Dict[str, Any]:
+        """
+        get the totals of the run
+
+        Returns:
+            dict: the summary
+        """
+        end_time = self.end_time if self.end_time is not None else time.time()
+        summary = {
+            "pages": len(self.pages),
+            "outcomes": dict(Counter(page.outcome for page in self.pages)),
+            # pages without a write
+            "skipped": sum(1 for page in self.pages if page.edit_latency is None),
+            "batches": len(self.batches),
+            "batch_api_calls": sum(batch.api_calls for batch in self.batches),
+            "batch_bytes": sum(batch.bytes for batch in self.batches),
+            "batch_latency": sum(batch.fetch_latency or 0.0 for batch in self.batches),
+            "duration": end_time - self.start_time,
+            "api_calls": self.api_calls,
+            "bytes": self.bytes,
+            "retries": self.retries,
+            "fetch_latency": self.get_latencies("fetch"),
+            "edit_latency": self.get_latencies("edit"),
+        }
+        return summary
+
+    def as_text(self) -> str:
+        """
+        get a one line summary of the run
+
+        Returns:
+            str: the summary text
+        """
+        summary = self.get_summary()
+        text = f"{summary['pages']} pages ({summary['skipped']} skipped) in {summary['duration']:.1f} s, {summary['api_calls']} API calls, {summary['bytes']} bytes, {summary['retries']} retries"
+        for kind in ["fetch", "edit"]:
+            latencies = summary[f"{kind}_latency"]
+            percentiles = "/".join(
+                f"{latencies[f'p{percent}']:.3f}" for percent in self.percents
+            )
+            text += f", {kind} p50/p95/p99 {percentiles} s"
+        if summary["batches"]:
+            text += f", {summary['batches']} batch lookups with {summary['batch_api_calls']} API calls"
+        return text
+
+    def save(self, path: str):
+        """
+        save the report as CSV (one row per page and batch followed by the total and
+        the latency percentiles) or JSON depending on the extension of the given path
+
+        Args:
+            path(str): the path of the report file
+        """
+        summary = self.get_summary()
+        if path.lower().endswith(".csv"):
+            columns = [field.name for field in fields(PageMetrics)]
+            with open(path, "w", newline="") as csv_file:
+                writer = csv.DictWriter(csv_file, fieldnames=columns)
+                writer.writeheader()
+                for page in self.pages + self.batches:
+                    writer.writerow(asdict(page))
+                writer.writerow(
+                    {
+                        "title": "total",
+                        "outcome": len(self.pages),
+                        "fetch_latency": summary["fetch_latency"]["total"],
+                        "edit_latency": summary["edit_latency"]["total"],
+                        "bytes": self.bytes,
+                        "api_calls": self.api_calls,
+                        "retries": self.retries,
+                    }
+                )
+                for percent in self.percents:
+                    key = f"p{percent}"
+                    writer.writerow(
+                        {
+                            "title": key,
+                            "fetch_latency": summary["fetch_latency"][key],
+                            "edit_latency": summary["edit_latency"][key],
+                        }
+                    )
+        else:
+            report = {
+                "summary": summary,
+                "pages": [asdict(page) for page in self.pages],
+                "batches": [asdict(batch) for batch in self.batches],
+            }
+            with open(path, "w") as json_file:
+                json.dump(report, json_file, indent=2)
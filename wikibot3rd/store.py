@@ -0,0 +1,257 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import datetime
+import hashlib
+import io
+import json
+import os
+import tempfile
+import zlib
+from typing import Any, Dict, Iterator, List, Optional
+
+
+class ContentStore:
+    """
+    content addressed backup store - each distinct content is stored once
+    as a compressed object keyed by its sha1 and each backup run writes a
+    snapshot mapping the page titles to their objects
+    """
+
+    chunkSize = 1024 * 1024
+
+    def __init__(self, path: str):
+        """
+        constructor
+
+        Args:
+            path(str): the directory of the store
+        """
+        self.path = path
+        self.objectsPath = os.path.join(path, "objects")
+        self.snapshotsPath = os.path.join(path, "snapshots")
+        self.historyPath = os.path.join(path, "history.jsonl")
+
+    @classmethod
+    def is_store(cls, path: str) -> bool:
+        """
+        check whether the given path is a content store
+
+        Args:
+            path(str): the path to check
+
+        Returns:
+            bool: True if the path has a snapshots directory
+        """
+        return path is not None and os.path.isdir(os.path.join(path, "snapshots"))
+
+    def get_object_path(self, sha1: str) -> str:
+        """
+        get the path of the object with the given sha1
+
+        Args:
+            sha1(str): the hex sha1 of the content
+
+        Returns:
+            str: the object path - fanned out by the first two hex digits
+        """
+        return os.path.join(self.objectsPath, sha1[:2], sha1[2:])
+
+    def has(self, sha1: Optional[str]) -> bool:
+        """
+        check whether the content with the given sha1 is stored
+
+        Args:
+            sha1(str): the hex sha1 of the content
+
+        Returns:
+            bool: True if the object exists
+        """
+        return sha1 is not None and os.path.isfile(self.get_object_path(sha1))
+
+    def put_file(self, fileobj) -> str:
+        """
+        store the content of the given binary file object
+
+        Args:
+            fileobj(file): the file object to read the content from
+
+        Returns:
+            str: the hex sha1 of the content
+        """
+        os.makedirs(self.objectsPath, exist_ok=True)
+        sha1 = hashlib.sha1()
+        compressor = zlib.compressobj()
+        fd, tmpPath = tempfile.mkstemp(prefix=".object.", dir=self.objectsPath)
+        try:
+            with os.fdopen(fd, "wb") as tmpFile:
+                while True:
+                    chunk = fileobj.read(self.chunkSize)
+                    if not chunk:
+                        break
+                    sha1.update(chunk)
+                    tmpFile.write(compressor.compress(chunk))
+                tmpFile.write(compressor.flush())
+            digest = sha1.hexdigest()
+            objectPath = self.get_object_path(digest)
+            if os.path.isfile(objectPath):
+                # identical content is only stored once
+                os.unlink(tmpPath)
+            else:
+                os.makedirs(os.path.dirname(objectPath), exist_ok=True)
+                os.replace(tmpPath, objectPath)
+        except BaseException:
+            if os.path.exists(tmpPath):
+                os.unlink(tmpPath)
+            raise
+        return digest
+
+    def put(self, text: str) -> str:
+        """
+        store the given text
+
+        Args:
+            text(str): the text to store
+
+        Returns:
+            str: the hex sha1 of the utf-8 encoded text
+        """
+        return self.put_file(io.BytesIO(text.encode("utf-8")))
+
+    def get_bytes(self, sha1: str) -> bytes:
+        """
+        get the content with the given sha1
+
+        Args:
+            sha1(str): the hex sha1 of the content
+
+        Returns:
+            bytes: the content
+        """
+        with open(self.get_object_path(sha1), "rb") as objectFile:
+            return zlib.decompress(objectFile.read())
+
+    def get(self, sha1: str) -> str:
+        """
+        get the text with the given sha1
+
+        Args:
+            sha1(str): the hex sha1 of the text
+
+        Returns:
+            str: the text
+        """
+        return self.get_bytes(sha1).decode("utf-8")
+
+    def get_snapshots(self) -> List[str]:
+        """
+        get the names of the snapshots of the store
+
+        Returns:
+            list: the snapshot names - oldest first
+        """
+        snapshots = []
+        if os.path.isdir(self.snapshotsPath):
+            snapshots = sorted(
+                name[: -len(".json")]
+                for name in os.listdir(self.snapshotsPath)
+                if name.endswith(".json")
+            )
+        return snapshots
+
+    def load_snapshot(self, name: str = None) -> Dict[str, Any]:
+        """
+        load the snapshot with the given name
+
+        Args:
+            name(str): the name of the snapshot - None for the latest one
+
+        Returns:
+            dict: the snapshot with the pages and images mapped to their entries - empty if there is no snapshot
+        """
+        if name is None:
+            snapshots = self.get_snapshots()
+            if not snapshots:
+                return {"pages": {}, "images": {}}
+            name = snapshots[-1]
+        with open(os.path.join(self.snapshotsPath, f"{name}.json")) as snapshotFile:
+            snapshot = json.load(snapshotFile)
+        snapshot.setdefault("images", {})
+        return snapshot
+
+    def save_snapshot(self, snapshot: Dict[str, Any], name: str = None) -> str:
+        """
+        save the given snapshot
+
+        Args:
+            snapshot(dict): the snapshot with the pages and images mapped to their entries
+            name(str): the name of the snapshot - default: the current UTC time
+
+        Returns:
+            str: the name of the snapshot
+        """
+        if name is None:
+            name = datetime.datetime.now(datetime.timezone.utc).strftime(
+                "%Y%m%dT%H%M%S%fZ"
+            )
+        os.makedirs(self.snapshotsPath, exist_ok=True)
+        snapshotPath = os.path.join(self.snapshotsPath, f"{name}.json")
+        tmpPath = f"{snapshotPath}.tmp"
+        with open(tmpPath, "w") as snapshotFile:
+            json.dump(snapshot, snapshotFile, indent=1, sort_keys=True)
+        os.replace(tmpPath, snapshotPath)
+        return name
+
+    def append_history(self, records: List[Dict[str, Any]]):
+        """
+        append the given revision records to the history log of the store
+
+        Args:
+            records(list): the revision records with title, revid, timestamp, user, comment and sha1
+        """
+        if not records:
+            return
+        os.makedirs(self.path, exist_ok=True)
+        with open(self.historyPath, "ab+") as historyFile:
+            # terminate a truncated last line of an interrupted run
+            if historyFile.tell() > 0:
+                historyFile.seek(-1, os.SEEK_END)
+                if historyFile.read(1) != b"\n":
+                    historyFile.write(b"\n")
+            for record in records:
+                line = json.dumps(record, sort_keys=True) + "\n"
+                historyFile.write(line.encode("utf-8"))
+
+    def iter_history(self) -> Iterator[Dict[str, Any]]:
+        """
+        stream the revision records of the history log
+
+        Yields:
+            dict: the revision records in the order they have been stored
+        """
+        if os.path.isfile(self.historyPath):
+            with open(self.historyPath) as historyFile:
+                for line in historyFile:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # truncated line of an interrupted run
+                        continue
+                    yield record
+
+    def get_latest_revisions(self) -> Dict[str, Dict[str, Any]]:
+        """
+        get the latest stored revision of each page of the history log
+
+        Returns:
+            dict: the revision records keyed by page title
+        """
+        latest = {}
+        for record in self.iter_history():
+            current = latest.get(record["title"])
+            if current is None or record["revid"] > current["revid"]:
+                latest[record["title"]] = record
+        return latest
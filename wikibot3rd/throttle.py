@@ -0,0 +1,187 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import random
+import threading
+import time
+import typing
+from typing import Optional
+
+import requests
+from mwclient.errors import APIError, MaximumRetriesExceeded
+
+
+class AdaptiveThrottle:
+    """
+    server aware rate control for MediaWiki API requests
+
+    the delay between requests is increased exponentially (with jitter) when
+    the server signals overload by ratelimited/maxlag errors, HTTP 429/503
+    responses or Retry-After headers and decreased again towards the
+    minimum delay given by maxRate when the responses are fast
+    """
+
+    # API error codes that signal that the request should be retried later
+    retry_codes = ["ratelimited", "maxlag", "readonly"]
+    # HTTP status codes that signal overload
+    retry_status = [429, 502, 503, 504]
+
+    def __init__(
+        self,
+        delay: float = 0.0,
+        maxRate: Optional[float] = None,
+        maxDelay: float = 60.0,
+        maxlag: int = 5,
+        maxRetries: int = 5,
+        backoff: float = 2.0,
+        speedup: float = 0.8,
+        fastResponse: float = 1.0,
+        jitter: float = 0.25,
+    ):
+        """
+        constructor
+
+        Args:
+            delay(float): the initial delay between requests in seconds
+            maxRate(float): the maximum number of requests per second (ceiling) - None for no limit
+            maxDelay(float): the maximum delay between requests in seconds
+            maxlag(int): the maxlag parameter to send with write requests
+            maxRetries(int): the maximum number of retries of a throttled request
+            backoff(float): the factor to increase the delay with on overload
+            speedup(float): the factor to decrease the delay with on fast responses
+            fastResponse(float): responses faster than this number of seconds are considered fast
+            jitter(float): the maximum random fraction added to a backoff wait
+        """
+        self.minDelay = 1.0 / maxRate if maxRate else 0.0
+        self.delay = max(delay, self.minDelay)
+        self.maxDelay = maxDelay
+        self.maxlag = maxlag
+        self.maxRetries = maxRetries
+        self.backoff = backoff
+        self.speedup = speedup
+        self.fastResponse = fastResponse
+        self.jitter = jitter
+        self.failures = 0
+        self.retries = 0
+        self.next_time = 0.0
+        self.lock = threading.Lock()
+        # optional callback for each retry e.g. to count retries per page
+        self.on_retry = None
+
+    def wait(self):
+        """
+        wait for the next request slot - concurrent callers are spaced
+        by the current delay
+        """
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_time)
+            self.next_time = start + self.delay
+        if start > now:
+            time.sleep(start - now)
+
+    def on_success(self, latency: float):
+        """
+        ramp up the rate after a successful request
+
+        Args:
+            latency(float): the response time of the request in seconds
+        """
+        with self.lock:
+            self.failures = 0
+            if latency < self.fastResponse:
+                self.delay = max(self.minDelay, self.delay * self.speedup)
+                # avoid creeping towards zero forever
+                if self.delay < 0.01:
+                    self.delay = self.minDelay
+
+    def slow_down(self, retryAfter: float = None) -> float:
+        """
+        back off exponentially after an overload signal
+
+        Args:
+            retryAfter(float): the number of seconds the server asked to wait (if any)
+
+        Returns:
+            float: the number of seconds to wait before retrying
+        """
+        with self.lock:
+            self.failures += 1
+            self.delay = min(self.maxDelay, max(self.delay * self.backoff, 1.0))
+            wait = min(self.maxDelay, self.backoff ** (self.failures - 1))
+            if retryAfter is not None:
+                wait = max(wait, retryAfter)
+            wait += random.uniform(0, self.jitter * wait)
+            self.next_time = max(self.next_time, time.monotonic() + wait)
+        return wait
+
+    def on_server_wait(self, _sleeper: typing.Any, timeout: float):
+        """
+        callback for the retry sleeps of mwclient e.g. on database lag
+
+        Args:
+            _sleeper: the mwclient Sleeper
+            timeout(float): the time mwclient is going to sleep
+        """
+        self.slow_down(timeout)
+
+    def get_retry_after(self, ex: Exception) -> typing.Tuple[bool, Optional[float]]:
+        """
+        check whether the given exception signals overload
+
+        Args:
+            ex(Exception): the exception to check
+
+        Returns:
+            Tuple[bool, Optional[float]]: retryable flag and Retry-After seconds (if any)
+        """
+        retryable = False
+        retryAfter = None
+        if isinstance(ex, APIError):
+            retryable = ex.code in self.retry_codes
+        elif isinstance(ex, MaximumRetriesExceeded):
+            retryable = True
+        elif isinstance(ex, requests.exceptions.HTTPError) and ex.response is not None:
+            retryable = ex.response.status_code in self.retry_status
+            header = ex.response.headers.get("Retry-After")
+            if header is not None:
+                try:
+                    retryAfter = float(header)
+                except ValueError:
+                    pass
+        return retryable, retryAfter
+
+    def call(self, func: typing.Callable, *args, **kwargs) -> typing.Any:
+        """
+        call the given function and retry it with backoff if the
+        server signals overload
+
+        Args:
+            func(Callable): the function performing the request
+            *args: positional arguments for the function
+            **kwargs: keyword arguments for the function
+
+        Returns:
+            the result of the function
+        """
+        attempt = 0
+        while True:
+            start = time.monotonic()
+            try:
+                result = func(*args, **kwargs)
+            except Exception as ex:
+                retryable, retryAfter = self.get_retry_after(ex)
+                if not retryable or attempt >= self.maxRetries:
+                    raise
+                attempt += 1
+                with self.lock:
+                    self.retries += 1
+                if self.on_retry is not None:
+                    self.on_retry()
+                time.sleep(self.slow_down(retryAfter))
+                continue
+            self.on_success(time.monotonic() - start)
+            return result
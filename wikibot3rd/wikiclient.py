@@ -1,4 +1,8 @@
-from typing import Any, Dict, Optional
+import itertools
+import time
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 from urllib.parse import urlparse
 
 from mwclient import Site
@@ -8,6 +12,174 @@ from wikibot3rd.wiki import Wiki
 from wikibot3rd.wikiuser import WikiUser
 
 
+@dataclass
+class PageContent:
+    """
+    the latest revision of a page as retrieved by a batched
+    prop=revisions query
+    """
+
+    title: str
+    exists: bool = False
+    ns: int = 0
+    pageid: Optional[int] = None
+    revid: Optional[int] = None
+    timestamp: Optional[str] = None
+    sha1: Optional[str] = None
+    content: Optional[str] = None
+
+    @classmethod
+    def from_page_record(cls, title: str, record: Dict[str, Any]) -> "PageContent":
+        """
+        create a PageContent from the given page record of an API query result
+
+        Args:
+            title: the requested title
+            record: the page record with an optional revisions list
+
+        Returns:
+            the PageContent for the given record
+        """
+        page_content = cls(
+            title=title,
+            exists="missing" not in record and "invalid" not in record,
+            ns=record.get("ns", 0),
+            pageid=record.get("pageid"),
+        )
+        revisions = record.get("revisions", [])
+        if revisions:
+            revision = revisions[0]
+            # MediaWiki >= 1.32 returns the content in slots
+            slot = revision.get("slots", {}).get("main", revision)
+            page_content.revid = revision.get("revid")
+            page_content.timestamp = revision.get("timestamp")
+            page_content.sha1 = slot.get("sha1", revision.get("sha1"))
+            page_content.content = slot.get("*", slot.get("content"))
+        return page_content
+
+    @classmethod
+    def from_page(cls, page, content: str = None) -> "PageContent":
+        """
+        create a PageContent for the latest revision of the given mwclient page
+
+        Args:
+            page: the mwclient page
+            content: the text of the page
+
+        Returns:
+            the PageContent for the given page
+        """
+        page_content = cls(
+            title=page.name,
+            exists=page.exists,
+            ns=page.namespace,
+            pageid=page.pageid,
+            revid=page.revision or None,
+            content=content,
+        )
+        if page.last_rev_time:
+            page_content.timestamp = time.strftime(
+                "%Y-%m-%dT%H:%M:%SZ", page.last_rev_time
+            )
+        return page_content
+
+    def get_base_params(self) -> Dict[str, Any]:
+        """
+        get the edit parameters that let the wiki detect edit conflicts
+        with changes made after this revision
+
+        Returns:
+            the baserevid and basetimestamp or createonly for a missing page
+        """
+        if not self.exists:
+            return {"createonly": True}
+        params = {}
+        if self.revid:
+            params["baserevid"] = self.revid
+        if self.timestamp:
+            params["basetimestamp"] = self.timestamp
+        return params
+
+
+@dataclass
+class Revision:
+    """
+    a single revision of a page as retrieved by a prop=revisions history query
+    """
+
+    revid: int
+    parentid: Optional[int] = None
+    timestamp: Optional[str] = None
+    user: Optional[str] = None
+    comment: Optional[str] = None
+    sha1: Optional[str] = None
+    content: Optional[str] = None
+
+    @classmethod
+    def from_revision_record(cls, record: Dict[str, Any]) -> "Revision":
+        """
+        create a Revision from the given revision record of an API query result
+
+        Args:
+            record: the revision record
+
+        Returns:
+            the Revision for the given record
+        """
+        slot = record.get("slots", {}).get("main", record)
+        revision = cls(
+            revid=record.get("revid"),
+            parentid=record.get("parentid"),
+            timestamp=record.get("timestamp"),
+            user=record.get("user"),
+            comment=record.get("comment"),
+            sha1=slot.get("sha1", record.get("sha1")),
+            content=slot.get("*", slot.get("content")),
+        )
+        return revision
+
+
+@dataclass
+class PageInfo:
+    """
+    the existence and metadata of a page as retrieved by a batched
+    prop=info query
+    """
+
+    title: str
+    exists: bool = False
+    ns: int = 0
+    pageid: Optional[int] = None
+    lastrevid: Optional[int] = None
+    length: Optional[int] = None
+    contentmodel: Optional[str] = None
+    touched: Optional[str] = None
+
+    @classmethod
+    def from_page_record(cls, title: str, record: Dict[str, Any]) -> "PageInfo":
+        """
+        create a PageInfo from the given page record of an API query result
+
+        Args:
+            title: the requested title
+            record: the page record
+
+        Returns:
+            the PageInfo for the given record
+        """
+        page_info = cls(
+            title=title,
+            exists="missing" not in record and "invalid" not in record,
+            ns=record.get("ns", 0),
+            pageid=record.get("pageid"),
+            lastrevid=record.get("lastrevid"),
+            length=record.get("length"),
+            contentmodel=record.get("contentmodel"),
+            touched=record.get("touched"),
+        )
+        return page_info
+
+
 class WikiClient(Wiki):
     """
     Access MediaWiki via mwclient library.
@@ -176,12 +348,366 @@ class WikiClient(Wiki):
         """Deprecated: Use get_page instead."""
         return self.get_page(pageTitle)
 
+    def get_batch_size(self) -> int:
+        """
+        Get the maximum number of titles per API request for the current user.
+
+        Returns:
+            500 if the user has the apihighlimits right (e.g. bots) else 50
+        """
+        site = self.get_site()
+        rights = getattr(site, "rights", None) or []
+        batch_size = 500 if "apihighlimits" in rights else 50
+        return batch_size
+
+    @staticmethod
+    def get_batches(items: List[Any], batch_size: int) -> Iterator[List[Any]]:
+        """
+        Split the given items into batches.
+
+        Args:
+            items: the items to split - any iterable
+            batch_size: the maximum size of a batch
+
+        Yields:
+            the batches of items
+        """
+        # lazy so that iterators are consumed one batch at a time
+        iterator = iter(items)
+        while True:
+            batch = list(itertools.islice(iterator, batch_size))
+            if not batch:
+                break
+            yield batch
+
+    def query_pages(
+        self, page_titles: List[str], batch_size: Optional[int] = None, **params
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Run an action=query for the given titles in batches - following
+        continuations and merging the page records of all continued responses.
+
+        Args:
+            page_titles: the titles of the pages to query
+            batch_size: number of titles per request - default: get_batch_size()
+            **params: the query parameters e.g. prop="info"
+
+        Returns:
+            the page records keyed by the requested titles (in request order)
+        """
+        if batch_size is None:
+            batch_size = self.get_batch_size()
+        site = self.get_site()
+        page_records = {}
+        for batch in self.get_batches(page_titles, batch_size):
+            records_by_title = {}
+            normalized = {}
+            continue_params = {}
+            while True:
+                result = site.api(
+                    "query", titles="|".join(batch), **params, **continue_params
+                )
+                query = result.get("query", {})
+                for entry in query.get("normalized", []):
+                    normalized[entry["from"]] = entry["to"]
+                for record in query.get("pages", {}).values():
+                    title = record.get("title")
+                    merged = records_by_title.setdefault(title, {})
+                    for key, value in record.items():
+                        if isinstance(value, list) and isinstance(
+                            merged.get(key), list
+                        ):
+                            merged[key].extend(value)
+                        else:
+                            merged[key] = value
+                if "continue" not in result:
+                    break
+                continue_params = result["continue"]
+            for title in batch:
+                record = records_by_title.get(normalized.get(title, title))
+                if record is None:
+                    record = {"title": title, "missing": ""}
+                page_records[title] = record
+        return page_records
+
+    def get_page_infos(
+        self, page_titles: List[str], batch_size: Optional[int] = None
+    ) -> Dict[str, PageInfo]:
+        """
+        Get the existence, page id, latest revision id, length and content model
+        of the given pages with up to batch_size titles per prop=info request.
+
+        Args:
+            page_titles: the titles of the pages
+            batch_size: number of titles per request - default: get_batch_size()
+
+        Returns:
+            the PageInfo keyed by the given page titles
+        """
+        page_records = self.query_pages(page_titles, batch_size=batch_size, prop="info")
+        page_infos = {
+            title: PageInfo.from_page_record(title, record)
+            for title, record in page_records.items()
+        }
+        return page_infos
+
+    def get_page_contents(
+        self,
+        page_titles: List[str],
+        with_content: bool = True,
+        batch_size: Optional[int] = None,
+    ) -> Dict[str, PageContent]:
+        """
+        Get the latest revision of the given pages with up to batch_size
+        titles per prop=revisions request.
+
+        Args:
+            page_titles: the titles of the pages
+            with_content: if False only revid, timestamp and sha1 are fetched
+            batch_size: number of titles per request - default: get_batch_size()
+
+        Returns:
+            the PageContent keyed by the given page titles
+        """
+        rvprop = "ids|timestamp|sha1"
+        if with_content:
+            rvprop += "|content"
+        page_records = self.query_pages(
+            page_titles,
+            batch_size=batch_size,
+            prop="revisions",
+            rvprop=rvprop,
+            rvslots="main",
+        )
+        page_contents = {
+            title: PageContent.from_page_record(title, record)
+            for title, record in page_records.items()
+        }
+        return page_contents
+
+    def get_page_revisions(
+        self, page_title: str, start_revid: Optional[int] = None
+    ) -> Iterator[Revision]:
+        """
+        Stream the revisions of the given page oldest first - following
+        continuations so that only one response is in memory at a time.
+
+        Args:
+            page_title: the title of the page
+            start_revid: the id of the oldest revision to get - default: the first revision
+
+        Yields:
+            the revisions with content - none if the page does not exist
+        """
+        params = {}
+        if start_revid is not None:
+            params["rvstartid"] = start_revid
+        site = self.get_site()
+        continue_params = {}
+        while True:
+            result = site.api(
+                "query",
+                titles=page_title,
+                prop="revisions",
+                rvprop="ids|timestamp|user|comment|sha1|content",
+                rvslots="main",
+                rvlimit="max",
+                rvdir="newer",
+                **params,
+                **continue_params,
+            )
+            for record in result.get("query", {}).get("pages", {}).values():
+                for revision_record in record.get("revisions", []):
+                    yield Revision.from_revision_record(revision_record)
+            if "continue" not in result:
+                break
+            continue_params = result["continue"]
+
+    def export_revisions(
+        self,
+        page_titles: List[str],
+        history: bool = True,
+        offset: Optional[str] = None,
+    ) -> Iterator[Tuple[str, Revision]]:
+        """
+        Stream the revisions of the given pages from Special:Export - the XML
+        is parsed while it is downloaded so that the history never needs to fit into memory.
+
+        Args:
+            page_titles: the titles of the pages
+            history: True for all revisions, False for the current revision only
+            offset: ISO 8601 timestamp - only revisions after it are exported
+
+        Yields:
+            the page title and revision oldest first per page
+        """
+        site = self.get_site()
+        url = f"{site.scheme}://{site.host}{site.path}index{site.ext}"
+        data = {
+            "title": "Special:Export",
+            "action": "submit",
+            "pages": "\n".join(page_titles),
+        }
+        if history:
+            data["history"] = "1"
+        else:
+            data["curonly"] = "1"
+        if offset is not None:
+            data["offset"] = offset
+        response = site.connection.post(url, data=data, stream=True)
+        try:
+            response.raise_for_status()
+            response.raw.decode_content = True
+            yield from self.iter_export_revisions(response.raw)
+        finally:
+            response.close()
+
+    @staticmethod
+    def iter_export_revisions(source) -> Iterator[Tuple[str, Revision]]:
+        """
+        Incrementally parse the given MediaWiki XML export - parsed
+        elements are cleared as soon as their revision has been yielded.
+
+        Args:
+            source: the binary file object or path of the XML export
+
+        Yields:
+            the page title and revision in document order
+        """
+
+        def local_name(tag: str) -> str:
+            return tag.rsplit("}", 1)[-1]
+
+        def child_text(elem, name: str) -> Optional[str]:
+            for child in elem:
+                if local_name(child.tag) == name:
+                    return child.text
+            return None
+
+        root = None
+        title = None
+        for event, elem in ET.iterparse(source, events=("start", "end")):
+            if event == "start":
+                if root is None:
+                    root = elem
+                continue
+            tag = local_name(elem.tag)
+            if tag == "title":
+                title = elem.text
+            elif tag == "revision":
+                contributor = None
+                for child in elem:
+                    if local_name(child.tag) == "contributor":
+                        contributor = child_text(child, "username") or child_text(
+                            child, "ip"
+                        )
+                # the export encodes the sha1 in base 36
+                sha1 = child_text(elem, "sha1")
+                parentid = child_text(elem, "parentid")
+                revision = Revision(
+                    revid=int(child_text(elem, "id")),
+                    parentid=int(parentid) if parentid else None,
+                    timestamp=child_text(elem, "timestamp"),
+                    user=contributor,
+                    comment=child_text(elem, "comment"),
+                    sha1=f"{int(sha1, 36):040x}" if sha1 else None,
+                    content=child_text(elem, "text") or "",
+                )
+                elem.clear()
+                yield title, revision
+            elif tag == "page":
+                root.clear()
+
+    def get_page_dependencies(
+        self,
+        page_titles: List[str],
+        link_namespaces: Optional[List[int]] = None,
+        batch_size: Optional[int] = None,
+    ) -> Dict[str, Optional[List[str]]]:
+        """
+        Get the transcluded pages, images and (optionally) links of the given
+        pages with up to batch_size titles per prop=templates|images|links request.
+
+        Args:
+            page_titles: the titles of the pages
+            link_namespaces: the namespaces of the links to include - None for no links
+            batch_size: number of titles per request - default: get_batch_size()
+
+        Returns:
+            the titles of the pages each given page depends on - None for pages that do not exist
+        """
+        props = ["templates", "images"]
+        params = {"tllimit": "max", "imlimit": "max"}
+        if link_namespaces:
+            props.append("links")
+            params["pllimit"] = "max"
+            params["plnamespace"] = "|".join(str(ns) for ns in link_namespaces)
+        page_records = self.query_pages(
+            page_titles, batch_size=batch_size, prop="|".join(props), **params
+        )
+        dependencies = {}
+        for title, record in page_records.items():
+            if "missing" in record or "invalid" in record:
+                dependencies[title] = None
+                continue
+            dependencies[title] = [
+                entry["title"]
+                for prop in props
+                for entry in record.get(prop, [])
+                if entry["title"] != record.get("title")
+            ]
+        return dependencies
+
+    def get_image_infos(
+        self, file_titles: List[str], batch_size: Optional[int] = None
+    ) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Get the image info of the latest version of the given files
+        with up to batch_size titles per prop=imageinfo request.
+
+        Args:
+            file_titles: the titles of the files e.g. File:Example.png
+            batch_size: number of titles per request - default: get_batch_size()
+
+        Returns:
+            the image info with sha1, size, url, mime and comment keyed by the given
+            file titles - None for files that do not exist
+        """
+        page_records = self.query_pages(
+            file_titles,
+            batch_size=batch_size,
+            prop="imageinfo",
+            iiprop="sha1|size|url|mime|comment",
+        )
+        image_infos = {}
+        for title, record in page_records.items():
+            imageinfo = record.get("imageinfo")
+            image_infos[title] = imageinfo[0] if imageinfo else None
+        return image_infos
+
+    def find_images_by_sha1(self, sha1: str) -> List[str]:
+        """
+        Find the files with the given content hash using list=allimages.
+
+        Args:
+            sha1: the hex SHA-1 of the file content
+
+        Returns:
+            the titles of the files with the given content
+        """
+        site = self.get_site()
+        result = site.api("query", list="allimages", aisha1=sha1, ailimit="max")
+        images = result.get("query", {}).get("allimages", [])
+        titles = [image["title"] for image in images]
+        return titles
+
     def save_page(
         self,
         page_title: str,
         page_content: str,
         page_summary: str,
         section: Optional[str] = None,
+        base: Optional[PageContent] = None,
     ) -> None:
         """
         Save a page with given title and content.
@@ -193,14 +719,114 @@ class WikiClient(Wiki):
             section: MediaWiki section number to edit. None for the full page;
                 "0" = page lead (before the first heading); "1" = first heading;
                 "2" = second heading; ... Use "new" to create a new section.
+            base: The revision the new content was computed from - the edit
+                fails with an edit conflict if the page was changed since.
+                None to overwrite the latest revision.
         """
         page = self.get_page(page_title)
-        page.edit(page_content, page_summary, section=section)
+        params = base.get_base_params() if base is not None else {}
+        page.edit(page_content, page_summary, section=section, **params)
 
     def savePage(self, pageTitle: str, pageContent: str, pageSummary: str) -> None:
         """Deprecated: Use save_page instead."""
         self.save_page(pageTitle, pageContent, pageSummary)
 
+    def edit_page_text(
+        self, page_title: str, text: str, summary: str = "", **params
+    ) -> Dict[str, Any]:
+        """
+        Save the given text with a single action=edit request without
+        loading the page first - the csrf token is cached by mwclient.
+
+        Args:
+            page_title: the title of the page
+            text: the new text of the page
+            summary: the edit summary
+            **params: further edit parameters e.g. maxlag
+
+        Returns:
+            the edit result
+
+        Raises:
+            Exception: if the edit did not succeed
+        """
+        site = self.get_site()
+        result = site.post(
+            "edit",
+            title=page_title,
+            text=text,
+            summary=summary,
+            token=site.get_token("csrf"),
+            **params,
+        )
+        edit = result.get("edit", {})
+        if edit.get("result") != "Success":
+            raise Exception(f"edit of {page_title} failed: {edit}")
+        return edit
+
+    def delete_page(self, page_title: str, reason: str = "") -> Dict[str, Any]:
+        """
+        Delete the page with the given title with a single action=delete request
+        - the csrf token is cached by mwclient.
+
+        Args:
+            page_title: the title of the page
+            reason: the reason for the deletion
+
+        Returns:
+            the delete result
+
+        Raises:
+            mwclient.errors.APIError: e.g. with code missingtitle if the page does not exist
+        """
+        site = self.get_site()
+        result = site.post(
+            "delete", title=page_title, reason=reason, token=site.get_token("csrf")
+        )
+        return result.get("delete", {})
+
+    def get_recent_changes(
+        self,
+        start: Optional[str] = None,
+        newer: bool = True,
+        limit: Optional[int] = None,
+        rctype: str = "edit|new|log",
+    ) -> List[Dict[str, Any]]:
+        """
+        Get the recent changes of the wiki using list=recentchanges.
+
+        Args:
+            start: the ISO timestamp to start from (inclusive) - None for the oldest/latest change
+            newer: if True list the changes in chronological order else the latest first
+            limit: the maximum number of changes - None for all
+            rctype: the types of changes to list
+
+        Returns:
+            the recent change records with title, ids, timestamp and log info
+        """
+        params = {
+            "list": "recentchanges",
+            "rcprop": "title|ids|timestamp|loginfo",
+            "rctype": rctype,
+            "rcdir": "newer" if newer else "older",
+            "rclimit": limit if limit is not None else "max",
+        }
+        if start is not None:
+            params["rcstart"] = start
+        site = self.get_site()
+        changes = []
+        continue_params = {}
+        while True:
+            result = site.api("query", **params, **continue_params)
+            changes.extend(result.get("query", {}).get("recentchanges", []))
+            if limit is not None and len(changes) >= limit:
+                changes = changes[:limit]
+                break
+            if "continue" not in result:
+                break
+            continue_params = result["continue"]
+        return changes
+
     def get_site_info(self, props: str = "general") -> Dict[str, Any]:
         """
         Fetch site information using the MediaWiki API.
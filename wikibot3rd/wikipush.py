@@ -9,38 +9,72 @@ import shutup
 from tqdm import tqdm
 
 shutup.please()
+import contextlib
 import datetime
-
-# from difflib import Differ
-import difflib
+import functools
+import hashlib
 import json
 import os
 import re
 import sys
+import tempfile
+import threading
 import time
 import traceback
 import typing
 from argparse import ArgumentParser, Namespace, RawDescriptionHelpFormatter
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
+from basemkit.yamlable import lod_storable
 from git import Repo
 from lodstorage.query import Query
 from lodstorage.query_cmd import QueryCmd
+from mwclient.errors import APIError, EditError
 from mwclient.image import Image
 
+from wikibot3rd.archive import BackupArchive
+from wikibot3rd.backupindex import BackupIndex, IndexEntry
+from wikibot3rd.diffengine import DiffEngine
+from wikibot3rd.editrules import EditRule, RuleEngine
+from wikibot3rd.gitimport import GitFastImport
+from wikibot3rd.journal import JobJournal
+from wikibot3rd.manifest import BackupManifest
+from wikibot3rd.metrics import PerformanceReport
 from wikibot3rd.selector import Selector
 from wikibot3rd.smw import SMWClient
+from wikibot3rd.store import ContentStore
+from wikibot3rd.throttle import AdaptiveThrottle
 from wikibot3rd.version import Version
-from wikibot3rd.wikiclient import WikiClient
+from wikibot3rd.wikiclient import PageContent, PageInfo, Revision, WikiClient
 from wikibot3rd.wikitext import WikiMarkup, WikiSON
 
 
+@lod_storable
+class SyncState:
+    """
+    the high-water mark of the recent changes of a source wiki
+    that have been synced to a target wiki
+    """
+
+    fromWikiId: str
+    toWikiId: str
+    rcid: int = 0
+    timestamp: Optional[str] = None
+
+
 class WikiPush(object):
     """
     Push pages from one MediaWiki to another
     """
 
+    # log types of recent changes that affect the page with the given title
+    sync_log_types = ["delete", "move", "upload", "import", "merge"]
+    # namespaces of linked pages a page depends on: Property, Form and Concept
+    closure_namespaces = [102, 106, 108]
+
     differ = None
 
     def __init__(
@@ -67,6 +101,28 @@ class WikiPush(object):
         self.args.template = None
         self.fromWiki = None
         self.toWiki = None
+        # thread local log buffer and lock for concurrent work
+        self.log_buffer = threading.local()
+        self.log_lock = threading.Lock()
+        # outcome counts of the last work
+        self.counts = Counter()
+        self.counts_lock = threading.Lock()
+        # optional persistent journal of the page status for resume and retries
+        self.journal = None
+        self.resume = False
+        self.retries = 0
+        # optional adaptive server aware rate control
+        self.rate_control = None
+        # optional per page performance metrics
+        self.report = None
+        # no write limit unless work is done concurrently
+        self.write_limit = contextlib.nullcontext()
+        # images are streamed via a memory buffer that spills to disk above this size
+        self.spool_size = 16 * 1024 * 1024
+        # upload chunk size of the target wiki - None for the mwclient default
+        self.chunk_size = None
+        # number of three-way merges and retries of an edit on edit conflicts
+        self.merge_retries = 3
 
         self.fromWikiId = fromWikiId
         if self.fromWikiId is not None:
@@ -95,16 +151,444 @@ class WikiPush(object):
             msg(str): the message to display
         """
         if self.verbose:
-            print(msg, end=end)
+            lines = getattr(self.log_buffer, "lines", None)
+            if lines is not None:
+                lines.append(f"{msg}{end}")
+            else:
+                print(msg, end=end)
+
+    def run_buffered(self, func: typing.Callable, *args, **kwargs) -> typing.Any:
+        """
+        run the given function with a thread local log buffer and show
+        the buffered log output as a whole when the function is finished
+        so that the output of concurrent tasks does not get interleaved
+
+        Args:
+            func(Callable): the function to call
+            *args: positional arguments for the function
+            **kwargs: keyword arguments for the function
+
+        Returns:
+            the result of the function call
+        """
+        self.log_buffer.lines = []
+        try:
+            return func(*args, **kwargs)
+        finally:
+            output = "".join(self.log_buffer.lines)
+            self.log_buffer.lines = None
+            with self.log_lock:
+                print(output, end="", flush=True)
+
+    def run_tasks(self, func: typing.Callable, items: list, workers: int = 1) -> list:
+        """
+        call func(index,item) for each of the given items - on a bounded pool
+        of worker threads if workers > 1
+
+        Args:
+            func(Callable): the function to call for each item
+            items(list): the items to work on
+            workers(int): the maximum number of concurrent workers
+
+        Returns:
+            list: the results of the function calls in the order of the items
+        """
+        if workers is None or workers <= 1:
+            results = [func(i, item) for i, item in enumerate(items)]
+        else:
+            results = [None] * len(items)
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = {
+                    executor.submit(self.run_buffered, func, i, item): i
+                    for i, item in enumerate(items)
+                }
+                for future in as_completed(futures):
+                    results[futures[future]] = future.result()
+        return results
+
+    def count(self, outcome: str):
+        """
+        count the given outcome of a page activity
+
+        Args:
+            outcome(str): the outcome e.g. created, updated, skipped or failed
+        """
+        with self.counts_lock:
+            self.counts[outcome] += 1
+        if self.report is not None:
+            self.report.set_outcome(outcome)
+
+    def log_counts(self):
+        """
+        show the outcome counts of the last work
+        """
+        counts = ", ".join(
+            f"{outcome}: {count}" for outcome, count in self.counts.items()
+        )
+        self.log(counts)
+
+    def open_journal(
+        self, mode: str, resume: bool = False, retries: int = 0, journalPath: str = None
+    ) -> JobJournal:
+        """
+        open the persistent journal for the job of the given mode
+
+        Args:
+            mode(str): the mode e.g. wikipush, wikibackup or wikirestore
+            resume(bool): True if an interrupted job should be continued
+            retries(int): the number of times failed pages are retried
+            journalPath(str): the path of the journal database - default: ~/.wikijournal/<job>.db
+
+        Returns:
+            JobJournal: the journal
+        """
+        job = "_".join(
+            str(part) for part in [mode, self.fromWikiId, self.toWikiId] if part
+        )
+        if journalPath is None:
+            journalPath = f"{self.getHomePath('.wikijournal')}/{job}.db"
+        self.journal = JobJournal(journalPath, job)
+        self.resume = resume
+        self.retries = retries
+        return self.journal
+
+    def journal_start(self, pageTitles: list) -> list:
+        """
+        start the journal for the given page titles - on resume only the
+        pages that are not done yet are returned
+
+        Args:
+            pageTitles(list): the page titles to work on
+
+        Returns:
+            list: the page titles that still need to be worked on
+        """
+        if self.journal is None or self.journal.started:
+            return pageTitles
+        pageTitles = self.journal.start(
+            list(pageTitles), resume=self.resume, maxAttempts=self.retries + 1
+        )
+        if self.resume:
+            self.log(f"resuming {self.journal.job} with {len(pageTitles)} pages")
+        return pageTitles
+
+    def journal_mark(self, pageTitle: str, ok: bool, error: str = None):
+        """
+        record the outcome for the given page in the journal (if any)
+
+        Args:
+            pageTitle(str): the title of the page
+            ok(bool): True if the page was done successfully
+            error(str): the error message if the page failed
+        """
+        if self.journal is not None:
+            self.journal.mark(pageTitle, ok, error)
+
+    def retry_failed(self, func: typing.Callable[[list], typing.Any]):
+        """
+        retry the failed pages of the journal up to the configured number of retries
+
+        Args:
+            func(Callable): the function to call with the list of page titles to retry
+        """
+        if self.journal is None:
+            return
+        for retry in range(1, self.retries + 1):
+            pageTitles = self.journal.get_failed(maxAttempts=self.retries + 1)
+            if not pageTitles:
+                break
+            self.log(f"retry {retry}/{self.retries} for {len(pageTitles)} failed pages")
+            func(pageTitles)
+
+    def set_write_limit(self, limit: int):
+        """
+        limit the concurrent write operations on the target wiki
+        of this WikiPush for the next run
+
+        Args:
+            limit(int): the maximum number of concurrent writes
+        """
+        self.write_limit = threading.BoundedSemaphore(max(1, limit))
 
     def throttle(self):
         """
         make sure the --throttle parameter is accounted for with an
-        according sleep
+        according sleep - with adaptive rate control wait for the next
+        request slot instead
         """
-        if hasattr(self.args, "throttle") and self.args.throttle:
+        if self.rate_control is not None:
+            self.rate_control.wait()
+        elif hasattr(self.args, "throttle") and self.args.throttle:
             time.sleep(self.args.throttle)
 
+    def enable_rate_control(self, rate_control: AdaptiveThrottle):
+        """
+        use the given adaptive rate control instead of the fixed throttle sleep
+
+        Args:
+            rate_control(AdaptiveThrottle): the rate control to use
+        """
+        self.rate_control = rate_control
+        rate_control.on_retry = self.count_retry
+        for wiki in [self.fromWiki, self.toWiki]:
+            if wiki is not None:
+                # get notified about the retry sleeps of mwclient e.g. on database lag
+                wiki.get_site().sleepers.callback = self.on_server_wait
+
+    def enable_report(self, report: PerformanceReport):
+        """
+        collect per page performance metrics in the given report
+
+        Args:
+            report(PerformanceReport): the report to collect the metrics in
+        """
+        self.report = report
+        for wiki in [self.fromWiki, self.toWiki]:
+            if wiki is not None:
+                site = wiki.get_site()
+                report.attach(site)
+                site.sleepers.callback = self.on_server_wait
+
+    def on_server_wait(self, sleeper, timeout: float):
+        """
+        callback for the retry sleeps of mwclient e.g. on database lag
+
+        Args:
+            sleeper: the mwclient Sleeper
+            timeout(float): the time mwclient is going to sleep
+        """
+        self.count_retry()
+        if self.rate_control is not None:
+            self.rate_control.on_server_wait(sleeper, timeout)
+
+    def count_retry(self):
+        """
+        count a retried request in the performance report
+        """
+        if self.report is not None:
+            self.report.count_retry()
+
+    def measure(self, kind: str):
+        """
+        get a context that adds the time spent in it to the given latency
+        of the current page in the performance report
+
+        Args:
+            kind(str): fetch or edit
+        """
+        if self.report is None:
+            return contextlib.nullcontext()
+        return self.report.timed(kind)
+
+    def measure_page(self, pageTitle: str):
+        """
+        get a context that collects the metrics of working on the given page
+        in the performance report
+
+        Args:
+            pageTitle(str): the title of the page
+        """
+        if self.report is None:
+            return contextlib.nullcontext()
+        return self.report.page(pageTitle)
+
+    def measure_batch(self, title: str):
+        """
+        get a context that collects the metrics of a batched lookup
+        in the performance report
+
+        Args:
+            title(str): the title of the batch
+        """
+        if self.report is None:
+            return contextlib.nullcontext()
+        return self.report.batch(title)
+
+    def save_report(self, path: str):
+        """
+        save the performance report to the given path and show its summary
+
+        Args:
+            path(str): the path of the JSON or CSV report file
+        """
+        self.report.finish()
+        self.report.save(path)
+        self.log(f"performance: {self.report.as_text()}")
+
+    def write(self, func: typing.Callable, *args, **kwargs) -> typing.Any:
+        """
+        perform a write operation on the target wiki within the write limit
+        and - if enabled - with rate control and retries on overload
+
+        Args:
+            func(Callable): the function performing the write
+            *args: positional arguments for the function
+            **kwargs: keyword arguments for the function
+
+        Returns:
+            the result of the function
+        """
+        with self.write_limit:
+            if self.rate_control is None:
+                return func(*args, **kwargs)
+            return self.rate_control.call(func, *args, **kwargs)
+
+    def edit_page(self, page, text: str, summary: str, **kwargs) -> typing.Any:
+        """
+        save the given text to the given page - with maxlag if rate control is enabled
+
+        Args:
+            page(Page): the mwclient page to edit
+            text(str): the new text of the page
+            summary(str): the edit summary
+            **kwargs: further edit parameters
+
+        Returns:
+            the edit result
+        """
+        if self.rate_control is not None and self.rate_control.maxlag:
+            kwargs["maxlag"] = self.rate_control.maxlag
+        return self.write(page.edit, text, summary, **kwargs)
+
+    def save_page_text(self, pageTitle: str, text: str, summary: str, **kwargs):
+        """
+        save the given text to the page with the given title of the target
+        wiki without loading the page first - with maxlag if rate control is enabled
+
+        Args:
+            pageTitle(str): the title of the page
+            text(str): the new text of the page
+            summary(str): the edit summary
+            **kwargs: further edit parameters
+
+        Returns:
+            the edit result
+        """
+        if self.rate_control is not None and self.rate_control.maxlag:
+            kwargs["maxlag"] = self.rate_control.maxlag
+        return self.write(
+            self.toWiki.edit_page_text, pageTitle, text, summary, **kwargs
+        )
+
+    def save_changes(
+        self,
+        save: typing.Callable,
+        text: str,
+        new_text: str,
+        summary: str,
+        **kwargs,
+    ) -> typing.Any:
+        """
+        save only the section that contains the changes of the page with the
+        section parameter - the whole new text is saved if the changes span
+        several sections or the target wiki does not accept the section
+
+        Args:
+            save(Callable): the function saving text and summary e.g. edit_page for a page
+            text(str): the current text of the page
+            new_text(str): the new text of the page
+            summary(str): the edit summary
+            **kwargs: further edit parameters
+
+        Returns:
+            the edit result
+        """
+        section_edit = WikiMarkup.get_section_edit(text, new_text)
+        if section_edit is not None:
+            section, section_text = section_edit
+            try:
+                return save(section_text, summary, section=str(section), **kwargs)
+            except APIError as ex:
+                if ex.code != "nosuchsection":
+                    raise
+        return save(new_text, summary, **kwargs)
+
+    def save_merged(
+        self,
+        save: typing.Callable,
+        base: PageContent,
+        new_text: str,
+        summary: str,
+    ):
+        """
+        save the new text that was computed from the given base revision -
+        if the page was changed in the meantime the latest revision is fetched
+        and merged with the changes of the new text up to merge_retries times
+
+        Args:
+            save(Callable): the function saving text and summary e.g. edit_page for a page
+            base(PageContent): the revision the new text was computed from
+            new_text(str): the new text of the page
+            summary(str): the edit summary
+
+        Raises:
+            Exception: if the changes can't be merged or the retries are exhausted
+        """
+        text = base.content or ""
+        for attempt in range(self.merge_retries + 1):
+            try:
+                self.save_changes(
+                    save, text, new_text, summary, **base.get_base_params()
+                )
+                return
+            except (APIError, EditError) as ex:
+                if not self.is_edit_conflict(ex) or attempt >= self.merge_retries:
+                    raise
+            # fetch only the latest revision of the page
+            latest = self.toWiki.get_page_contents([base.title])[base.title]
+            latest_text = latest.content or ""
+            merged = DiffEngine.merge(text, new_text, latest_text)
+            if merged is None:
+                raise Exception(
+                    f"edit conflict on {base.title} - the changes can't be merged"
+                )
+            if merged == latest_text:
+                # the changes have been made in the meantime
+                return
+            base, text, new_text = latest, latest_text, merged
+
+    @staticmethod
+    def is_edit_conflict(ex: Exception) -> bool:
+        """
+        check whether the given exception of an edit is an edit conflict
+
+        Args:
+            ex(Exception): the exception
+
+        Returns:
+            bool: True if the page was changed or created since the base revision
+        """
+        if isinstance(ex, APIError):
+            return ex.code in ["editconflict", "articleexists"]
+        if not isinstance(ex, EditError) or not ex.args:
+            return False
+        info = ex.args[-1]
+        if isinstance(info, dict):
+            # a failed edit result
+            return info.get("code") == "editconflict"
+        # mwclient raises edit conflicts with the page, summary and the API info
+        return len(ex.args) == 3 and "edit conflict" in str(info).lower()
+
+    def get_page_infos(self, pageTitles: list) -> Dict[str, PageInfo]:
+        """
+        get the existence and metadata of the given pages of the target wiki
+        with batched prop=info requests
+
+        Args:
+            pageTitles(list): the page titles
+
+        Returns:
+            dict: the PageInfo by page title - empty if the lookup failed
+            in which case the pages are checked one by one
+        """
+        page_infos = {}
+        if pageTitles:
+            try:
+                page_infos = self.toWiki.get_page_infos(pageTitles)
+            except Exception as ex:
+                self.show_exception(ex)
+        return page_infos
+
     def extract_template_records(self, pageRecords, template: str) -> list:
         """
         Extract template records from the given pageRecords using batch page retrieval.
@@ -124,23 +608,34 @@ class WikiPush(object):
         """
         dod = {}
         page_titles = list(pageRecords.keys())
+        batch_size = self.fromWiki.get_batch_size()
+        progress = tqdm(total=len(page_titles), disable=not self.args.showProgress)
         # Get multiple pages at once
-        site = self.fromWiki.get_site()
-        # Process each page
-        for page_title in tqdm(page_titles, disable=not self.args.showProgress):
+        for batch in WikiClient.get_batches(page_titles, batch_size):
+            self.throttle()
             try:
-                self.throttle()
-                page = site.pages[page_title]
-                markup = page.text()
-                wiki_markup = WikiMarkup(page.name, markup)
-                records = wiki_markup.extract_template(template)
-                for i, record in enumerate(records):
-                    if record is not None:
-                        key = f"{page_title}/{i}" if i > 0 else page_title
-                        dod[key] = record
+                page_contents = self.fromWiki.get_page_contents(batch)
             except Exception as ex:
-                print(f"❌ {page_title}: {str(ex)}", file=sys.stderr)
-                pass
+                print(f"❌ {batch[0]}...: {str(ex)}", file=sys.stderr)
+                page_contents = {}
+            # Process each page
+            for page_title in batch:
+                progress.update(1)
+                page_content = page_contents.get(page_title)
+                if page_content is None:
+                    continue
+                try:
+                    markup = page_content.content or ""
+                    wiki_markup = WikiMarkup(page_title, markup)
+                    records = wiki_markup.extract_template(template)
+                    for i, record in enumerate(records):
+                        if record is not None:
+                            key = f"{page_title}/{i}" if i > 0 else page_title
+                            dod[key] = record
+                except Exception as ex:
+                    print(f"❌ {page_title}: {str(ex)}", file=sys.stderr)
+                    pass
+        progress.close()
         return dod
 
     def formatQueryResult(
@@ -345,37 +840,136 @@ class WikiPush(object):
                 pagesDict[pageRecord[pageField]] = True
         return list(pagesDict.keys())
 
-    def nuke(self, pageTitles, force=False):
+    def nuke(
+        self,
+        pageTitles,
+        force=False,
+        workers: int = 1,
+        resultsPath: str = None,
+    ) -> Dict[str, List[str]]:
         """
         delete the pages with the given page Titles
 
+        the existence of the pages is looked up in bulk - the deletions
+        run on a bounded pool of workers with adaptive rate control
+
         Args:
             pageTitles(list): a list of page titles to be transfered from the formWiki to the toWiki
             force(bool): True if pages should be actually deleted - dry run only listing pages is default
+            workers(int): the number of pages to delete concurrently
+            resultsPath(str): the path of a JSON file to write the titles by outcome to
+
+        Returns:
+            dict: the page titles by outcome - exists, deleted, missing or failed
         """
+        self.counts = Counter()
         total = len(pageTitles)
         self.log(
             "deleting %d pages in %s (%s)"
             % (total, self.toWikiId, "forced" if force else "dry run")
         )
-        for i, pageTitle in enumerate(pageTitles):
-            try:
-                self.log(
-                    "%d/%d (%4.0f%%): deleting %s ..."
-                    % (i + 1, total, (i + 1) / total * 100, pageTitle),
-                    end="",
-                )
-                pageToBeDeleted = self.toWiki.getPage(pageTitle)
-                if not force:
-                    self.log("👍" if pageToBeDeleted.exists else "👎")
-                else:
-                    pageToBeDeleted.delete("deleted by wiknuke")
-                    self.log("✅")
-            except Exception as ex:
-                self.show_exception(ex)
+        if force and self.rate_control is None:
+            # back off when the wiki signals ratelimited or maxlag
+            self.enable_rate_control(AdaptiveThrottle())
+        self.set_write_limit(workers)
+        page_infos = self.get_page_infos(pageTitles)
+        start_time = time.monotonic()
+
+        def nuke_page(i: int, pageTitle: str) -> str:
+            return self.nuke_page(
+                i, total, pageTitle, page_infos.get(pageTitle), force, start_time
+            )
+
+        outcomes = self.run_tasks(nuke_page, pageTitles, workers=workers)
+        results = {}
+        for pageTitle, outcome in zip(pageTitles, outcomes):
+            results.setdefault(outcome, []).append(pageTitle)
+        duration = time.monotonic() - start_time
+        self.log(
+            "%s in %.1f s (%.1f pages/s)"
+            % (
+                ", ".join(
+                    f"{outcome}: {len(titles)}" for outcome, titles in results.items()
+                ),
+                duration,
+                total / duration if duration > 0 else 0.0,
+            )
+        )
+        if resultsPath is not None:
+            with open(resultsPath, "w") as resultsFile:
+                json.dump(results, resultsFile, indent=2)
+        return results
+
+    def nuke_page(
+        self,
+        i: int,
+        total: int,
+        pageTitle: str,
+        page_info: Optional[PageInfo],
+        force: bool,
+        start_time: float,
+    ) -> str:
+        """
+        delete the page with the given title
+
+        Args:
+            i(int): the index of the page
+            total(int): the total number of pages
+            pageTitle(str): the title of the page
+            page_info(PageInfo): the existence of the page - None if unknown
+            force(bool): True if the page should be actually deleted
+            start_time(float): the monotonic start time of the nuke to show the rate
+
+        Returns:
+            str: the outcome - exists, deleted, missing or failed
+        """
+        try:
+            self.log(
+                "%d/%d (%4.0f%%): deleting %s ..."
+                % (i + 1, total, (i + 1) / total * 100, pageTitle),
+                end="",
+            )
+            if page_info is None:
+                exists = self.toWiki.getPage(pageTitle).exists
+            else:
+                exists = page_info.exists
+            if not exists:
+                outcome = "missing"
+                self.log("👎")
+            elif not force:
+                outcome = "exists"
+                self.log("👍")
+            else:
+                self.throttle()
+                try:
+                    self.write(
+                        self.toWiki.delete_page, pageTitle, "deleted by wikinuke"
+                    )
+                    outcome = "deleted"
+                except APIError as ex:
+                    # deleted in the meantime
+                    if ex.code != "missingtitle":
+                        raise
+                    outcome = "missing"
+                with self.counts_lock:
+                    done = self.counts["deleted"] + self.counts["missing"] + 1
+                elapsed = time.monotonic() - start_time
+                rate = done / elapsed if elapsed > 0 else 0.0
+                self.log(f"{'✅' if outcome == 'deleted' else '👎'} {rate:.1f} pages/s")
+        except Exception as ex:
+            self.show_exception(ex)
+            outcome = "failed"
+        self.count(outcome)
+        return outcome
 
     @staticmethod
-    def getDiff(text: str, newText: str, n: int = 1, forHuman: bool = True) -> str:
+    def getDiff(
+        text: str,
+        newText: str,
+        n: int = 1,
+        forHuman: bool = True,
+        max_lines: Optional[int] = None,
+    ) -> str:
         """
         Compare the two given strings and return the differences
         Args:
@@ -383,31 +977,13 @@ class WikiPush(object):
             newText: new text
             n: The number of context lines
             forHuman: If True update the diff string to be better human-readable
+            max_lines: the maximum number of diff lines - None for no limit
 
         Returns:
             str: difference string
         """
-        # if WikiPush.differ is None:
-        #    WikiPush.differ=Differ()
-        # https://docs.python.org/3/library/difflib.html
-        #  difflib.unified_diff(a, b, fromfile='', tofile='', fromfiledate='', tofiledate='', n=3, lineterm='\n')¶
-        # diffs=WikiPush.differ.compare(,)
-        textLines = text.split("\n")
-        newTextLines = newText.split("\n")
-        diffs = difflib.unified_diff(textLines, newTextLines, n=n)
-        if forHuman:
-            hdiffs = []
-            for line in diffs:
-                unwantedItems = ["@@", "---", "+++"]
-                keep = True
-                for unwanted in unwantedItems:
-                    if unwanted in line:
-                        keep = False
-                if keep:
-                    hdiffs.append(line)
-        else:
-            hdiffs = diffs
-        diffStr = "\n".join(hdiffs)
+        diff_engine = DiffEngine(n=n, forHuman=forHuman, max_lines=max_lines)
+        diffStr = diff_engine.get_diff(text, newText)
         return diffStr
 
     @staticmethod
@@ -429,9 +1005,7 @@ class WikiPush(object):
         if debug:
             print(f"search regex: {search}")
             print(f"replace regex: {replace}")
-        searchRegex = r"%s" % search
-        replaceRegex = r"%s" % replace
-        modify = lambda text: re.sub(searchRegex, replaceRegex, text)
+        modify = RuleEngine([EditRule(search=search, replace=replace)])
         return modify
 
     def edit_page_content(
@@ -442,6 +1016,7 @@ class WikiPush(object):
         modify: typing.Callable[[str], str] = None,
         force: bool = False,
         context: int = 1,
+        page_info: PageInfo = None,
     ) -> str:
         """
         Edit the content of a single page.
@@ -453,27 +1028,55 @@ class WikiPush(object):
         modify (Callable[[str], str]): Function to modify the page content
         force (bool): If True, actually edit the page; if False, perform a dry run
         context (int): The number of context lines for diff
+        page_info (PageInfo): the prefetched existence of the page - if None the page is fetched
 
         Returns:
         str: Status of the edit operation
         """
+        if page_info is not None and not force and not page_info.exists:
+            return "👎"
         page_to_edit = self.toWiki.getPage(page_title)
         if not force and not page_to_edit.exists:
             return "👎"
 
         text = page_to_edit.text()
+        status, new_text = self.get_edit(text, new_text, modify, force, context)
+        if status is None:
+            save = functools.partial(self.edit_page, page_to_edit)
+            base = PageContent.from_page(page_to_edit, text)
+            self.save_merged(save, base, new_text, summary)
+            status = "✅"
+        return status
+
+    def get_edit(
+        self,
+        text: str,
+        new_text: str = None,
+        modify: typing.Callable[[str], str] = None,
+        force: bool = False,
+        context: int = 1,
+    ) -> Tuple[Optional[str], str]:
+        """
+        get the edit of the given text of a page
+
+        Args:
+            text(str): the current text of the page
+            new_text(str): the new text for the page - if None the text is modified
+            modify(Callable): the function to modify the text with
+            force(bool): True if the page is going to be edited
+            context(int): the number of context lines for the diff
+
+        Returns:
+            Tuple[Optional[str], str]: the status - None if the new text needs to be written - and the new text
+        """
         if not new_text:
             new_text = modify(text)
-
         if new_text == text:
-            return "↔"
-
+            return "↔", new_text
         if force:
-            page_to_edit.edit(new_text, summary)
-            return "✅"
-        else:
-            diff_str = self.getDiff(text, new_text, n=context)
-            return f"👍{diff_str}"
+            return None, new_text
+        diff_str = self.getDiff(text, new_text, n=context)
+        return f"👍{diff_str}", new_text
 
     def edit(
         self,
@@ -481,6 +1084,7 @@ class WikiPush(object):
         modify: typing.Callable[[str], str] = None,
         context: int = 1,
         force: bool = False,
+        workers: int = 1,
     ):
         """
         Edit the pages with the given page titles
@@ -490,6 +1094,7 @@ class WikiPush(object):
         modify: String modify function that takes as input the string and returns the modified string
         context: The number of context lines
         force (bool): True if pages should be actually edited - dry run only listing pages is default
+        workers (int): the number of concurrent modifier workers - more than one selects the pipelined edit
         """
         if modify is None:
             raise Exception("wikipush edit needs a modify function!")
@@ -498,7 +1103,10 @@ class WikiPush(object):
         self.log(
             f"editing {total} pages in {self.toWikiId} ({'forced' if force else 'dry run'})"
         )
-
+        if workers is not None and workers > 1:
+            self.edit_pipelined(page_titles, modify, context, force, workers)
+            return
+        page_infos = self.get_page_infos(page_titles)
         for i, page_title in enumerate(page_titles):
             try:
                 self.log(
@@ -507,13 +1115,117 @@ class WikiPush(object):
                 )
 
                 result = self.edit_page_content(
-                    page_title, modify=modify, force=force, context=context
+                    page_title,
+                    modify=modify,
+                    force=force,
+                    context=context,
+                    page_info=page_infos.get(page_title),
                 )
                 self.log(result)
 
             except Exception as ex:
                 self.show_exception(ex)
 
+    def edit_pipelined(
+        self,
+        page_titles: typing.List[str],
+        modify: typing.Callable[[str], str],
+        context: int = 1,
+        force: bool = False,
+        workers: int = 2,
+    ):
+        """
+        Edit the pages with the given page titles in a pipeline - the contents
+        of the next batch are prefetched with a single request while a pool of
+        workers modifies and diffs the pages of the current batch and the
+        writer saves the changed pages and shows the results in page order
+
+        Args:
+            page_titles(list): the titles of the pages to edit
+            modify(Callable): the function to modify the page content with
+            context(int): the number of context lines for the diff
+            force(bool): True if pages should be actually edited
+            workers(int): the number of concurrent modifier workers
+        """
+        total = len(page_titles)
+        batch_size = self.toWiki.get_batch_size() if total > 0 else 1
+        batches = list(WikiClient.get_batches(page_titles, batch_size))
+        offset = 0
+        with (
+            ThreadPoolExecutor(max_workers=1) as fetcher,
+            ThreadPoolExecutor(max_workers=workers) as modifiers,
+        ):
+            fetching = (
+                fetcher.submit(self.toWiki.get_page_contents, batches[0])
+                if batches
+                else None
+            )
+            for b, batch in enumerate(batches):
+                try:
+                    page_contents = fetching.result()
+                except Exception as ex:
+                    self.show_exception(ex)
+                    page_contents = {}
+                if b + 1 < len(batches):
+                    fetching = fetcher.submit(
+                        self.toWiki.get_page_contents, batches[b + 1]
+                    )
+                modifying = [
+                    modifiers.submit(
+                        self.modify_page_content,
+                        page_title,
+                        page_contents.get(page_title),
+                        modify,
+                        force,
+                        context,
+                    )
+                    for page_title in batch
+                ]
+                for j, (page_title, future) in enumerate(zip(batch, modifying)):
+                    i = offset + j
+                    try:
+                        self.log(
+                            f"{i + 1}/{total} ({(i + 1) / total * 100:4.0f}%): editing {page_title} ...",
+                            end="",
+                        )
+                        status, new_text = future.result()
+                        if status is None:
+                            save = functools.partial(self.save_page_text, page_title)
+                            base = page_contents[page_title]
+                            self.save_merged(save, base, new_text, "edited by wikiedit")
+                            status = "✅"
+                        self.log(status)
+                    except Exception as ex:
+                        self.show_exception(ex)
+                offset += len(batch)
+
+    def modify_page_content(
+        self,
+        page_title: str,
+        page_content: Optional[PageContent],
+        modify: typing.Callable[[str], str],
+        force: bool = False,
+        context: int = 1,
+    ) -> Tuple[Optional[str], str]:
+        """
+        modify the prefetched content of the given page
+
+        Args:
+            page_title(str): the title of the page
+            page_content(PageContent): the prefetched content of the page
+            modify(Callable): the function to modify the page content with
+            force(bool): True if the page is going to be edited
+            context(int): the number of context lines for the diff
+
+        Returns:
+            Tuple[Optional[str], str]: the status - None if the new text needs to be written - and the new text
+        """
+        if page_content is None:
+            raise Exception(f"{page_title} could not be fetched")
+        if not force and not page_content.exists:
+            return "👎", None
+        return self.get_edit(page_content.content or "", None, modify, force, context)
+
     def edit_wikison(
         self,
         page_titles: typing.List[str],
@@ -535,12 +1247,17 @@ class WikiPush(object):
         self.log(
             f"""editing {total} pages in {self.toWikiId} ({"forced" if force else "dry run"})"""
         )
+        page_infos = self.get_page_infos(page_titles)
         for i, page_title in enumerate(page_titles, 1):
             try:
                 self.log(
                     f"{i}/{total} ({i/total*100:.2f}%): editing {page_title} ...",
                     end="",
                 )
+                page_info = page_infos.get(page_title)
+                if page_info is not None and not force and not page_info.exists:
+                    self.log("👎")
+                    continue
                 page_to_be_edited = self.toWiki.getPage(page_title)
                 if not force and not page_to_be_edited.exists:
                     self.log("👎")
@@ -553,7 +1270,9 @@ class WikiPush(object):
                     )
                     if new_markup != markup:
                         if force:
-                            page_to_be_edited.edit(new_markup, comment)
+                            save = functools.partial(self.edit_page, page_to_be_edited)
+                            base = PageContent.from_page(page_to_be_edited, markup)
+                            self.save_merged(save, base, new_markup, comment)
                             self.log("✅")
                         else:
                             diff_str = self.getDiff(markup, new_markup, n=3)
@@ -586,67 +1305,862 @@ class WikiPush(object):
             except Exception as ex:
                 self.show_exception(ex)
 
-    def backup(self, pageTitles, backupPath=None, git=False, withImages=False):
+    def backup(
+        self,
+        pageTitles,
+        backupPath=None,
+        git=False,
+        withImages=False,
+        incremental: bool = False,
+        workers: int = 1,
+        backup_format: str = "files",
+        revisions: bool = False,
+    ):
         """
         backup the given page titles
+
+        the revision id, sha1 and path of each backed up page is recorded in the
+        index of the backup directory - files whose content did not change are not rewritten
+
         Args:
             pageTitles(list): a list of page titles to be downloaded from the fromWiki
             git(bool): True if git should be used as a version control system
             withImages(bool): True if the image on a page should also be copied
+            incremental(bool): True if only pages whose latest revision differs from the index should be downloaded
+            workers(int): the number of pages to write concurrently
+            backup_format(str): "files" for one file per page, "archive" to stream the pages into a single
+                compressed archive (.tar.gz, .tar.xz or .zip - default: <backupPath>.tar.gz) or
+                "store" for a content addressed store with a snapshot per run or
+                "git" to stream the pages into a git repository with git fast-import
+            revisions(bool): True to keep every wiki revision - the git format creates a commit per
+                revision and the store format streams the full history from Special:Export
         """
         if backupPath is None:
-            backupPath = self.getHomePath("wikibackup/%s" % self.fromWikiId)
+            # not created here - an archive is written next to the directory
+            backupPath = f"{Path.home()}/wikibackup/{self.fromWikiId}"
+        if backup_format == "store" and revisions:
+            self.backup_history(pageTitles, backupPath, withImages, workers)
+            return
+        if backup_format == "store":
+            self.backup_store(pageTitles, backupPath, withImages, workers)
+            return
+        if backup_format == "git":
+            self.backup_git(pageTitles, backupPath, withImages, revisions)
+            return
         imageBackupPath = "%s/images" % backupPath
+        archive = None
+        index = None
+        if backup_format == "archive":
+            if self.resume:
+                raise Exception("resuming is not supported for archive backups")
+            if BackupArchive.get_compression(backupPath) is None:
+                backupPath = f"{backupPath}.tar.gz"
+            archive = BackupArchive(backupPath, "w")
+            incremental = False
+        else:
+            index = BackupIndex(backupPath)
+            if not index.is_complete():
+                # files of earlier backups need to be restorable and known to incremental runs
+                self.log(f"indexing {backupPath} ...")
+                index.scan()
+        pageTitles = self.journal_start(pageTitles)
+        total = len(pageTitles)
+        self.log(
+            "downloading %d pages from %s to %s%s"
+            % (
+                total,
+                self.fromWikiId,
+                backupPath,
+                " (incremental)" if incremental else "",
+            )
+        )
+
+        def backup_pages(pageTitles: list) -> list:
+            writtenPaths = []
+            total = len(pageTitles)
+            batch_size = self.fromWiki.get_batch_size() if total > 0 else 1
+            for offset, batch in enumerate(
+                WikiClient.get_batches(pageTitles, batch_size)
+            ):
+                writtenPaths.extend(
+                    self.backup_batch(
+                        batch,
+                        offset * batch_size,
+                        total,
+                        backupPath,
+                        imageBackupPath,
+                        withImages,
+                        incremental,
+                        workers,
+                        archive=archive,
+                        index=index,
+                    )
+                )
+                self.throttle()
+            return writtenPaths
+
+        try:
+            writtenPaths = backup_pages(pageTitles)
+            if archive is not None:
+                # failed pages can not be added to the archive later
+                self.retry_failed(backup_pages)
+        except BaseException:
+            if archive is not None:
+                archive.close(complete=False)
+            raise
+        finally:
+            if index is not None:
+                index.close()
+        if archive is not None:
+            archive.close()
+            return
+        if git:
+            self.commit_backup(backupPath, writtenPaths)
+
+    def backup_store(
+        self,
+        pageTitles: list,
+        storePath: str,
+        withImages: bool = False,
+        workers: int = 1,
+    ) -> str:
+        """
+        backup the given page titles to a content addressed store - only
+        contents that are not in the store yet are downloaded and written
+
+        Args:
+            pageTitles(list): a list of page titles to be downloaded from the fromWiki
+            storePath(str): the directory of the store
+            withImages(bool): True if the image on a page should also be copied
+            workers(int): the number of pages to write concurrently
+
+        Returns:
+            str: the name of the snapshot
+        """
+        store = ContentStore(storePath)
+        # pages that are not part of this run keep their latest backup
+        snapshot = store.load_snapshot()
+        snapshot_lock = threading.Lock()
+        pageTitles = self.journal_start(pageTitles)
         total = len(pageTitles)
         self.log(
-            "downloading %d pages from %s to %s" % (total, self.fromWikiId, backupPath)
+            "downloading %d pages from %s to store %s"
+            % (total, self.fromWikiId, storePath)
         )
-        for i, pageTitle in enumerate(pageTitles):
+        batch_size = self.fromWiki.get_batch_size() if total > 0 else 1
+        for offset, batch in enumerate(WikiClient.get_batches(pageTitles, batch_size)):
             try:
-                self.log(
-                    "%d/%d (%4.0f%%): downloading %s ..."
-                    % (i + 1, total, (i + 1) / total * 100, pageTitle),
-                    end="",
+                # the sha1 of the latest revisions tells which contents are needed
+                revisions = self.fromWiki.get_page_contents(batch, with_content=False)
+                needed = [
+                    pageTitle
+                    for pageTitle, revision in revisions.items()
+                    if revision.exists and not store.has(revision.sha1)
+                ]
+                page_contents = (
+                    self.fromWiki.get_page_contents(needed) if needed else {}
                 )
-                page = self.fromWiki.getPage(pageTitle)
-                wikiFilePath = "%s/%s.wiki" % (backupPath, pageTitle)
-                self.ensureParentDirectoryExists(wikiFilePath)
-                with open(wikiFilePath, "w") as wikiFile:
-                    wikiFile.write(page.text())
+            except Exception as ex:
+                self.show_exception(ex)
+                revisions = page_contents = {}
+
+            def store_page(j: int, pageTitle: str) -> bool:
+                return self.store_page(
+                    offset * batch_size + j,
+                    total,
+                    pageTitle,
+                    revisions.get(pageTitle),
+                    page_contents.get(pageTitle),
+                    store,
+                    snapshot,
+                    snapshot_lock,
+                    withImages,
+                )
+
+            self.run_tasks(store_page, batch, workers=workers)
+            self.throttle()
+        name = store.save_snapshot(snapshot)
+        self.log(f"snapshot {name} with {len(snapshot['pages'])} pages")
+        return name
+
+    def backup_history(
+        self,
+        pageTitles: list,
+        storePath: str,
+        withImages: bool = False,
+        workers: int = 1,
+    ) -> str:
+        """
+        backup the full history of the given page titles to a content addressed
+        store by streaming Special:Export - only revisions newer than the latest
+        revision recorded in the snapshot of the store are downloaded
+
+        Args:
+            pageTitles(list): a list of page titles to be downloaded from the fromWiki
+            storePath(str): the directory of the store
+            withImages(bool): True if the image on a page should also be copied
+            workers(int): the number of pages to copy images for concurrently
+
+        Returns:
+            str: the name of the snapshot of the latest revisions
+        """
+        store = ContentStore(storePath)
+        snapshot = store.load_snapshot()
+        snapshot_lock = threading.Lock()
+        # the snapshot records the latest revision of each page - pages of
+        # backups without history have no timestamp and are exported in full
+        latest = {
+            pageTitle: entry
+            for pageTitle, entry in snapshot["pages"].items()
+            if entry.get("timestamp") is not None
+        }
+        pageTitles = self.journal_start(pageTitles)
+        total = len(pageTitles)
+        self.log(
+            "downloading the history of %d pages from %s to store %s"
+            % (total, self.fromWikiId, storePath)
+        )
+        batch_size = self.fromWiki.get_batch_size() if total > 0 else 1
+        try:
+            for offset, batch in enumerate(
+                WikiClient.get_batches(pageTitles, batch_size)
+            ):
+                counts = self.export_history(batch, store, snapshot, latest)
+
+                def store_page(j: int, pageTitle: str) -> bool:
+                    i = offset * batch_size + j
+                    self.log(
+                        "%d/%d (%4.0f%%): downloading %s ..."
+                        % (i + 1, total, (i + 1) / total * 100, pageTitle),
+                        end="",
+                    )
+                    if pageTitle not in latest:
+                        self.log("❌")
+                        self.journal_mark(pageTitle, False, "missing")
+                        return False
+                    if counts.get(pageTitle):
+                        self.log(f"✅ {counts[pageTitle]} revisions")
+                    else:
+                        self.log("↔")
+                    try:
+                        if withImages:
+                            self.store_images(
+                                pageTitle, store, snapshot, snapshot_lock, withImages
+                            )
+                    except Exception as ex:
+                        self.show_exception(ex)
+                        self.journal_mark(pageTitle, False, str(ex))
+                        return False
+                    self.journal_mark(pageTitle, True)
+                    return True
+
+                self.run_tasks(store_page, batch, workers=workers)
+                self.throttle()
+        finally:
+            # an interrupted run keeps the revisions stored so far
+            name = store.save_snapshot(snapshot)
+        self.log(f"snapshot {name} with {len(snapshot['pages'])} pages")
+        return name
+
+    def export_history(
+        self, batch: list, store: ContentStore, snapshot: dict, latest: dict
+    ) -> Dict[str, int]:
+        """
+        stream the revisions of the given batch of page titles that are newer
+        than the given latest revisions into the store
+
+        Args:
+            batch(list): the page titles
+            store(ContentStore): the store
+            snapshot(dict): the snapshot to record the latest revisions in
+            latest(dict): the latest stored revision entry by page title - updated
+
+        Returns:
+            dict: the number of new revisions by page title
+        """
+        counts = {pageTitle: 0 for pageTitle in batch}
+        try:
+            new = [pageTitle for pageTitle in batch if pageTitle not in latest]
+            known = [pageTitle for pageTitle in batch if pageTitle in latest]
+            exports = [(new, None)]
+            if known:
+                # the export offset applies to all pages of a request
+                since = min(latest[pageTitle]["timestamp"] for pageTitle in known)
+                exports.append((known, since))
+            for titles, since in exports:
+                if not titles:
+                    continue
+                records = []
+                try:
+                    for pageTitle, revision in self.fromWiki.export_revisions(
+                        titles, history=True, offset=since
+                    ):
+                        entry = latest.get(pageTitle)
+                        if entry is not None and revision.revid <= entry["revid"]:
+                            continue
+                        record = {
+                            "title": pageTitle,
+                            "revid": revision.revid,
+                            "parentid": revision.parentid,
+                            "timestamp": revision.timestamp,
+                            "user": revision.user,
+                            "comment": revision.comment,
+                            "sha1": store.put(revision.content),
+                        }
+                        records.append(record)
+                        entry = {
+                            "sha1": record["sha1"],
+                            "revid": record["revid"],
+                            "timestamp": record["timestamp"],
+                        }
+                        latest[pageTitle] = entry
+                        snapshot["pages"][pageTitle] = entry
+                        counts[pageTitle] += 1
+                finally:
+                    # keep the revisions streamed before an interruption
+                    store.append_history(records)
+        except Exception as ex:
+            self.show_exception(ex)
+        return counts
+
+    def store_page(
+        self,
+        i: int,
+        total: int,
+        pageTitle: str,
+        revision: Optional[PageContent],
+        page_content: Optional[PageContent],
+        store: ContentStore,
+        snapshot: dict,
+        snapshot_lock: threading.Lock,
+        withImages: bool = False,
+    ) -> bool:
+        """
+        backup the page with the given title to the given content store
+
+        Args:
+            i(int): the index of the page
+            total(int): the total number of pages
+            pageTitle(str): the title of the page
+            revision(PageContent): the latest revision of the page without content
+            page_content(PageContent): the content of the page - None if the content is already stored
+            store(ContentStore): the store
+            snapshot(dict): the snapshot to record the page in
+            snapshot_lock(Lock): the lock for the snapshot
+            withImages(bool): True if the image on a page should also be copied
+
+        Returns:
+            bool: True if the page has been backed up
+        """
+        try:
+            self.log(
+                "%d/%d (%4.0f%%): downloading %s ..."
+                % (i + 1, total, (i + 1) / total * 100, pageTitle),
+                end="",
+            )
+            if revision is None or not revision.exists:
+                self.log("❌")
+                with snapshot_lock:
+                    snapshot["pages"].pop(pageTitle, None)
+                self.journal_mark(pageTitle, False, "missing")
+                return False
+            if page_content is None:
+                sha1 = revision.sha1
+                self.log("↔")
+            else:
+                sha1 = store.put(page_content.content or "")
                 self.log("✅")
-                if isinstance(page, Image):
-                    self.backupImages([page], imageBackupPath)
+            with snapshot_lock:
+                snapshot["pages"][pageTitle] = {"sha1": sha1, "revid": revision.revid}
+            self.journal_mark(pageTitle, True)
+            if revision.ns == 6 or withImages:
+                self.store_images(pageTitle, store, snapshot, snapshot_lock, withImages)
+            return True
+        except Exception as ex:
+            self.show_exception(ex)
+            self.journal_mark(pageTitle, False, str(ex))
+            return False
+
+    def store_images(
+        self,
+        pageTitle: str,
+        store: ContentStore,
+        snapshot: dict,
+        snapshot_lock: threading.Lock,
+        withImages: bool = False,
+    ):
+        """
+        store the image of the File page with the given title and - if
+        withImages is set - the images used on the page
+
+        Args:
+            pageTitle(str): the title of the page
+            store(ContentStore): the store
+            snapshot(dict): the snapshot to record the images in
+            snapshot_lock(Lock): the lock for the snapshot
+            withImages(bool): True if the images on the page should also be copied
+        """
+        page = self.fromWiki.getPage(pageTitle)
+        images = [page] if isinstance(page, Image) else []
+        if withImages:
+            images.extend(page.images())
+        for image in images:
+            imageSha1 = (image.imageinfo or {}).get("sha1")
+            if not store.has(imageSha1):
+                with tempfile.SpooledTemporaryFile(
+                    max_size=self.spool_size
+                ) as imageFile:
+                    image.download(imageFile)
+                    imageFile.seek(0)
+                    imageSha1 = store.put_file(imageFile)
+            with snapshot_lock:
+                snapshot["images"][self.getImageFilename(image)] = imageSha1
+
+    def backup_git(
+        self,
+        pageTitles: list,
+        repoPath: str,
+        withImages: bool = False,
+        revisions: bool = False,
+    ):
+        """
+        backup the given page titles to a git repository by streaming the
+        contents into git fast-import - no working tree is written or scanned
+
+        the manifest in the git directory records the latest revision of each
+        page so that only changed pages are downloaded
+
+        Args:
+            pageTitles(list): a list of page titles to be downloaded from the fromWiki
+            repoPath(str): the path of the git repository - a bare repository is created if needed
+            withImages(bool): True if the image on a page should also be copied
+            revisions(bool): True to create a commit per new wiki revision with the
+                original author, timestamp and comment instead of a single commit per run
+        """
+        with GitFastImport(repoPath) as gitImport:
+            manifest = BackupManifest.load(gitImport.repo.git_dir)
+            pageTitles = self.journal_start(pageTitles)
+            total = len(pageTitles)
+            self.log(
+                "downloading %d pages from %s to git repository %s%s"
+                % (
+                    total,
+                    self.fromWikiId,
+                    repoPath,
+                    " (one commit per revision)" if revisions else "",
+                )
+            )
+            files = {}
+            history = []
+            batch_size = self.fromWiki.get_batch_size() if total > 0 else 1
+            for offset, batch in enumerate(
+                WikiClient.get_batches(pageTitles, batch_size)
+            ):
+                try:
+                    latest = self.fromWiki.get_page_contents(batch, with_content=False)
+                    changed = [
+                        pageTitle
+                        for pageTitle, revision in latest.items()
+                        if revision.exists
+                        and not manifest.is_current_revision(pageTitle, revision.revid)
+                    ]
+                    page_contents = {}
+                    if changed and not revisions:
+                        page_contents = self.fromWiki.get_page_contents(changed)
+                except Exception as ex:
+                    self.show_exception(ex)
+                    latest = page_contents = {}
+                    changed = []
+                for j, pageTitle in enumerate(batch):
+                    self.backup_git_page(
+                        offset * batch_size + j,
+                        total,
+                        pageTitle,
+                        gitImport,
+                        manifest,
+                        latest.get(pageTitle),
+                        page_contents.get(pageTitle),
+                        pageTitle in changed,
+                        files,
+                        history if revisions else None,
+                        withImages,
+                    )
+                self.throttle()
+            # commits need to be in chronological order across all pages
+            for revision, pageTitle, blob in sorted(
+                history, key=lambda item: (item[0].timestamp or "", item[0].revid)
+            ):
+                user = revision.user or "unknown"
+                comment = revision.comment or f"revision {revision.revid}"
+                gitImport.commit(
+                    {f"{pageTitle}.wiki": blob},
+                    f"{pageTitle}: {comment}\n\nrevision {revision.revid} of {self.fromWikiId}\n",
+                    name=user,
+                    email=f"{user}@{self.fromWikiId}",
+                    timestamp=revision.timestamp,
+                )
+            if files:
+                timestamp = datetime.datetime.now().isoformat()
+                gitImport.commit(files, "auto commit by wikibackup at %s" % timestamp)
+            if gitImport.commits == 0:
+                self.log("no changes to commit to git repository")
+            else:
+                self.log(f"{gitImport.commits} commits streamed to git repository")
+        manifest.save()
+
+    def backup_git_page(
+        self,
+        i: int,
+        total: int,
+        pageTitle: str,
+        gitImport: GitFastImport,
+        manifest: BackupManifest,
+        revision: Optional[PageContent],
+        page_content: Optional[PageContent],
+        changed: bool,
+        files: dict,
+        history: Optional[list],
+        withImages: bool = False,
+    ) -> bool:
+        """
+        stream the page with the given title into git fast-import
+
+        Args:
+            i(int): the index of the page
+            total(int): the total number of pages
+            pageTitle(str): the title of the page
+            gitImport(GitFastImport): the fast-import stream
+            manifest(BackupManifest): the manifest of the repository
+            revision(PageContent): the latest revision of the page without content
+            page_content(PageContent): the content of the page if it is needed for a single commit
+            changed(bool): True if the latest revision is not in the repository yet
+            files(dict): the blob marks by path for the commit of this run
+            history(list): the new (revision, title, blob) tuples if there is a commit per revision - None otherwise
+            withImages(bool): True if the image on a page should also be copied
+
+        Returns:
+            bool: True if the page has been backed up
+        """
+        try:
+            self.log(
+                "%d/%d (%4.0f%%): downloading %s ..."
+                % (i + 1, total, (i + 1) / total * 100, pageTitle),
+                end="",
+            )
+            if revision is None or not revision.exists:
+                self.log("❌")
+                self.journal_mark(pageTitle, False, "missing")
+                return False
+            path = f"{pageTitle}.wiki"
+            if not changed:
+                self.log("↔")
+            elif history is not None:
+                entry = manifest.get(pageTitle)
+                start_revid = entry.revid if entry is not None else None
+                new_revisions = 0
+                for page_revision in self.fromWiki.get_page_revisions(
+                    pageTitle, start_revid=start_revid
+                ):
+                    if page_revision.revid == start_revid:
+                        continue
+                    blob = gitImport.add_blob(
+                        (page_revision.content or "").encode("utf-8")
+                    )
+                    # only the metadata is kept for the commits - the content is in the blob
+                    metadata = Revision(
+                        page_revision.revid,
+                        timestamp=page_revision.timestamp,
+                        user=page_revision.user,
+                        comment=page_revision.comment,
+                    )
+                    history.append((metadata, pageTitle, blob))
+                    new_revisions += 1
+                self.log(f"✅ {new_revisions} revisions")
+            else:
+                files[path] = gitImport.add_blob(
+                    (page_content.content or "").encode("utf-8")
+                )
+                self.log("✅")
+            manifest.update(pageTitle, revision.revid, revision.sha1, path)
+            self.journal_mark(pageTitle, True)
+            if revision.ns == 6 or withImages:
+                page = self.fromWiki.getPage(pageTitle)
+                images = [page] if isinstance(page, Image) else []
                 if withImages:
-                    self.backupImages(page.images(), imageBackupPath)
+                    images.extend(page.images())
+                for image in images:
+                    filename = self.getImageFilename(image)
+                    imagePath = f"images/{filename}"
+                    imageSha1 = (image.imageinfo or {}).get("sha1")
+                    entry = manifest.get_image(imagePath)
+                    if entry is not None and imageSha1 and entry.sha1 == imageSha1:
+                        continue
+                    with tempfile.SpooledTemporaryFile(
+                        max_size=self.spool_size
+                    ) as imageFile:
+                        image.download(imageFile)
+                        size = imageFile.tell()
+                        imageFile.seek(0)
+                        files[imagePath] = gitImport.add_blob_file(imageFile, size)
+                    manifest.update_image(imagePath, imageSha1)
+            return True
+        except Exception as ex:
+            self.show_exception(ex)
+            self.journal_mark(pageTitle, False, str(ex))
+            return False
+
+    def commit_backup(self, backupPath: str, writtenPaths: list):
+        """
+        commit the given written paths to the git repository of the backup
+        directory - only these paths are staged instead of rescanning the whole tree
+
+        Args:
+            backupPath(str): the backup directory
+            writtenPaths(list): the paths of the files written in this run in page order
+        """
+        gitPath = "%s/.git" % backupPath
+        if not os.path.isdir(gitPath):
+            self.log("initializing git repository ...")
+            repo = Repo.init(backupPath)
+            # the index database is local state and not part of the backup
+            with open(os.path.join(repo.git_dir, "info", "exclude"), "a") as exclude:
+                exclude.write(f"{BackupIndex.fileName}*\n")
+            # files of earlier runs need to be part of the first commit
+            repo.git.add(all=True)
+        else:
+            repo = Repo(backupPath)
+            relPaths = list(
+                dict.fromkeys(
+                    os.path.relpath(path, backupPath) for path in writtenPaths
+                )
+            )
+            # avoid too long command lines
+            for chunk in WikiClient.get_batches(relPaths, 1000):
+                repo.git.add("--", *chunk)
+        if repo.head.is_valid() and not repo.index.diff("HEAD"):
+            self.log("no changes to commit to git repository")
+            return
+        self.log("committing to git repository")
+        timestamp = datetime.datetime.now().isoformat()
+        repo.index.commit("auto commit by wikibackup at %s" % timestamp)
+
+    def backup_batch(
+        self,
+        batch: list,
+        offset: int,
+        total: int,
+        backupPath: str,
+        imageBackupPath: str,
+        withImages: bool = False,
+        incremental: bool = False,
+        workers: int = 1,
+        archive: BackupArchive = None,
+        index: BackupIndex = None,
+    ) -> list:
+        """
+        backup the given batch of page titles
 
+        Args:
+            batch(list): the page titles of the batch
+            offset(int): the index of the first page of the batch
+            total(int): the total number of pages
+            backupPath(str): the backup directory
+            imageBackupPath(str): the image backup directory
+            withImages(bool): True if the image on a page should also be copied
+            incremental(bool): True if only pages whose revision differs from the index should be downloaded
+            workers(int): the number of pages to write concurrently
+            archive(BackupArchive): the archive to write to instead of files
+            index(BackupIndex): the index of the backup files
+
+        Returns:
+            list: the paths of the files written in page order
+        """
+        unchanged = set()
+        if incremental and index is not None:
+            try:
+                page_infos = self.fromWiki.get_page_infos(batch)
+                unchanged = {
+                    pageTitle
+                    for pageTitle, page_info in page_infos.items()
+                    if page_info.exists
+                    and index.is_current(pageTitle, page_info.lastrevid)
+                }
             except Exception as ex:
                 self.show_exception(ex)
-            self.throttle()
-        if git:
-            gitPath = "%s/.git" % backupPath
-            if not os.path.isdir(gitPath):
-                self.log("initializing git repository ...")
-                repo = Repo.init(backupPath)
+        changed = [pageTitle for pageTitle in batch if pageTitle not in unchanged]
+        try:
+            page_contents = self.fromWiki.get_page_contents(changed) if changed else {}
+        except Exception as ex:
+            self.show_exception(ex)
+            page_contents = {}
+
+        def backup_page(j: int, pageTitle: str) -> list:
+            return self.backup_page(
+                offset + j,
+                total,
+                pageTitle,
+                backupPath,
+                imageBackupPath,
+                page_contents.get(pageTitle),
+                unchanged=pageTitle in unchanged,
+                withImages=withImages,
+                archive=archive,
+                index=index,
+            )
+
+        results = self.run_tasks(backup_page, batch, workers=workers)
+        writtenPaths = [path for paths in results for path in paths]
+        return writtenPaths
+
+    def backup_page(
+        self,
+        i: int,
+        total: int,
+        pageTitle: str,
+        backupPath: str,
+        imageBackupPath: str,
+        page_content: Optional[PageContent],
+        unchanged: bool = False,
+        withImages: bool = False,
+        archive: BackupArchive = None,
+        index: BackupIndex = None,
+    ) -> list:
+        """
+        backup the page with the given title
+
+        Args:
+            i(int): the index of the page
+            total(int): the total number of pages
+            pageTitle(str): the title of the page
+            backupPath(str): the backup directory
+            imageBackupPath(str): the image backup directory
+            page_content(PageContent): the fetched page content
+            unchanged(bool): True if the latest revision is already backed up and indexed
+            withImages(bool): True if the image on a page should also be copied
+            archive(BackupArchive): the archive to write to instead of files
+            index(BackupIndex): the index of the backup files
+
+        Returns:
+            list: the paths of the files written
+        """
+        writtenPaths = []
+        try:
+            self.log(
+                "%d/%d (%4.0f%%): downloading %s ..."
+                % (i + 1, total, (i + 1) / total * 100, pageTitle),
+                end="",
+            )
+            if unchanged:
+                self.log("↔")
+                self.journal_mark(pageTitle, True)
+                return writtenPaths
+            if page_content is None or not page_content.exists:
+                self.log("❌")
+                self.journal_mark(pageTitle, False, "missing")
+                return writtenPaths
+            path = "%s.wiki" % pageTitle
+            wikiFilePath = "%s/%s" % (backupPath, path)
+            entry = index.get(pageTitle) if index is not None else None
+            if archive is not None:
+                archive.add_page(
+                    pageTitle,
+                    page_content.content or "",
+                    page_content.revid,
+                    page_content.sha1,
+                )
+                self.log("✅")
+            elif (
+                entry is not None
+                and page_content.sha1 is not None
+                and entry.sha1 == page_content.sha1
+                and entry.path == path
+                and os.path.isfile(wikiFilePath)
+            ):
+                # same content - keep the file untouched
+                self.log("↔")
             else:
-                repo = Repo(backupPath)
-            self.log("committing to git repository")
-            repo.git.add(all=True)
-            timestamp = datetime.datetime.now().isoformat()
-            repo.index.commit("auto commit by wikibackup at %s" % timestamp)
+                self.writeAtomic(wikiFilePath, page_content.content or "")
+                writtenPaths.append(wikiFilePath)
+                self.log("✅")
+            if index is not None:
+                index.update_file(
+                    pageTitle,
+                    path,
+                    ns=page_content.ns,
+                    sha1=page_content.sha1,
+                    revid=page_content.revid,
+                )
+            self.journal_mark(pageTitle, True)
+            # File namespace
+            if page_content.ns == 6 or withImages:
+                page = self.fromWiki.getPage(pageTitle)
+                if isinstance(page, Image):
+                    writtenPaths.extend(
+                        self.backupImages([page], imageBackupPath, archive)
+                    )
+                if withImages:
+                    writtenPaths.extend(
+                        self.backupImages(page.images(), imageBackupPath, archive)
+                    )
+        except Exception as ex:
+            self.show_exception(ex)
+            self.journal_mark(pageTitle, False, str(ex))
+        return writtenPaths
 
-    def backupImages(self, imageList: list, imageBackupPath: str):
+    def writeAtomic(self, filePath: str, text: str):
+        """
+        write the given text to the given file atomically - readers never
+        see a partially written file
+
+        Args:
+            filePath(str): the path of the file
+            text(str): the text to write
+        """
+        self.ensureParentDirectoryExists(filePath)
+        directory, filename = os.path.split(filePath)
+        fd, tmpPath = tempfile.mkstemp(prefix=f".{filename}.", dir=directory)
+        try:
+            with os.fdopen(fd, "w") as tmpFile:
+                tmpFile.write(text)
+            os.replace(tmpPath, filePath)
+        except BaseException:
+            os.unlink(tmpPath)
+            raise
+
+    def backupImages(
+        self, imageList: list, imageBackupPath: str, archive: BackupArchive = None
+    ) -> list:
         """
         backup the images in the givne imageList
 
         Args:
             imageList(list): the list of images
             imageBackupPath(str): the path to the backup directory
+            archive(BackupArchive): the archive to stream the images to instead of files
+
+        Returns:
+            list: the paths of the image files written
         """
+        imagePaths = []
         for image in imageList:
             try:
+                if archive is not None:
+                    filename = self.getImageFilename(image)
+                    with tempfile.SpooledTemporaryFile(
+                        max_size=self.spool_size
+                    ) as imageFile:
+                        image.download(imageFile)
+                        size = imageFile.tell()
+                        imageFile.seek(0)
+                        archive.add_file(
+                            f"{archive.imagePrefix}{filename}", imageFile, size
+                        )
+                    continue
                 imagePath, filename = self.downloadImage(image, imageBackupPath)
+                imagePaths.append(imagePath)
             except Exception as ex:
                 self.handleException(ex)
+        return imagePaths
 
     def work(
         self,
@@ -656,6 +2170,9 @@ class WikiPush(object):
         force: bool = False,
         ignore: bool = False,
         withImages: bool = False,
+        workers: int = 1,
+        targetWorkers: int = None,
+        skipUnchanged: bool = False,
     ) -> list:
         """
         work on the given page titles
@@ -667,69 +2184,434 @@ class WikiPush(object):
             force(bool): True if pages should be overwritten if they exist
             ignore(bool): True if warning for images should be ignored (e.g if they exist)
             withImages(bool): True if the image on a page should also be copied
+            workers(int): the number of pages to work on concurrently
+            targetWorkers(int): the maximum number of concurrent writes to the target wiki - default: workers
+            skipUnchanged(bool): True if existing pages should only be overwritten if their content differs
         Returns:
             list: a list of pageTitles for which the activity failed
         """
-        failed = []
+        self.counts = Counter()
+        pageTitles = self.journal_start(pageTitles)
         total = len(pageTitles)
         self.log(f"{activity} {total} pages from {self.fromWikiId} to {self.toWikiId}")
-        for i, pageTitle in enumerate(pageTitles):
-            try:
-                percent = (i + 1) / total * 100
-                self.log(
-                    f"{i+1}/{total} ({percent:4.0f}%): {activity} ... {pageTitle}",
-                    end="",
-                )
-                page = self.fromWiki.getPage(pageTitle)
-                if page.exists:
-                    # is this an image?
-                    if isinstance(page, Image):
-                        self.pushImages([page], ignore=ignore)
-                    else:
-                        newPage = self.toWiki.getPage(pageTitle)
-                        if not newPage.exists or force:
-                            try:
-                                newPage.edit(page.text(), comment)
-                                self.log("✅")
-                                pageOk = True
-                            except Exception as ex:
-                                pageOk = self.handleException(ex, ignore)
-                                if not pageOk:
-                                    failed.append(pageTitle)
-                            if withImages and pageOk:
-                                self.pushImages(page.images(), ignore=ignore)
-                        else:
-                            self.log("👎")
+        if targetWorkers is None:
+            targetWorkers = workers
+        self.set_write_limit(targetWorkers)
+        failed = []
+        pageTitles = list(pageTitles)
+        batch_size = self.fromWiki.get_batch_size() if total > 0 else 1
+        for offset, batch in enumerate(WikiClient.get_batches(pageTitles, batch_size)):
+            target_contents = {}
+            target_infos = {}
+            # the requests of the batched lookups are not attributed to single pages
+            with self.measure_batch(f"batch {offset + 1}"), self.measure("fetch"):
+                try:
+                    page_contents = self.fromWiki.get_page_contents(batch)
+                except Exception as ex:
+                    # fall back to fetching page by page
+                    self.show_exception(ex)
+                    page_contents = {}
+                if skipUnchanged:
+                    try:
+                        # only the sha1 of the target pages is needed
+                        target_contents = self.toWiki.get_page_contents(
+                            batch, with_content=False
+                        )
+                    except Exception as ex:
+                        self.show_exception(ex)
                 else:
-                    self.log("❌")
-                    failed.append(pageTitle)
-            except Exception as ex:
-                self.show_exception(ex)
-                failed.append(pageTitle)
-            self.throttle()
+                    target_infos = self.get_page_infos(batch)
+
+            def work_page(j: int, pageTitle: str) -> bool:
+                with self.measure_page(pageTitle):
+                    ok = self.work_page(
+                        offset * batch_size + j,
+                        total,
+                        pageTitle,
+                        activity,
+                        comment,
+                        force,
+                        ignore,
+                        withImages,
+                        page_content=page_contents.get(pageTitle),
+                        target_content=target_contents.get(pageTitle),
+                        skipUnchanged=skipUnchanged,
+                        target_info=target_infos.get(pageTitle),
+                    )
+                self.journal_mark(pageTitle, ok)
+                self.throttle()
+                return ok
+
+            results = self.run_tasks(work_page, batch, workers=workers)
+            failed.extend(pageTitle for pageTitle, ok in zip(batch, results) if not ok)
+        self.log_counts()
         return failed
 
-    def push(self, pageTitles, force=False, ignore=False, withImages=False) -> list:
+    def work_page(
+        self,
+        i: int,
+        total: int,
+        pageTitle: str,
+        activity: str,
+        comment: str,
+        force: bool,
+        ignore: bool,
+        withImages: bool,
+        page_content: Optional[PageContent] = None,
+        target_content: Optional[PageContent] = None,
+        skipUnchanged: bool = False,
+        target_info: Optional[PageInfo] = None,
+    ) -> bool:
+        """
+        work on the page with the given title
+
+        Args:
+            i(int): the index of the page
+            total(int): the total number of pages
+            pageTitle(str): the title of the page
+            activity(str): the activity to perform
+            comment(str): the comment to display
+            force(bool): True if pages should be overwritten if they exist
+            ignore(bool): True if warning for images should be ignored (e.g if they exist)
+            withImages(bool): True if the image on a page should also be copied
+            page_content(PageContent): the prefetched source page content - if None the page is fetched
+            target_content(PageContent): the prefetched target page revision (sha1) for skipUnchanged
+            skipUnchanged(bool): True if existing pages should only be overwritten if their content differs
+            target_info(PageInfo): the prefetched existence of the target page - if None the page is fetched
+
+        Returns:
+            bool: False if the activity failed
+        """
+        pageOk = True
+        try:
+            percent = (i + 1) / total * 100
+            self.log(
+                f"{i+1}/{total} ({percent:4.0f}%): {activity} ... {pageTitle}",
+                end="",
+            )
+            page = None
+            # pages in the File namespace need the image to be transferred
+            if page_content is None or page_content.ns == 6:
+                with self.measure("fetch"):
+                    page = self.fromWiki.getPage(pageTitle)
+                exists = page.exists
+            else:
+                exists = page_content.exists
+            if exists:
+                # is this an image?
+                if isinstance(page, Image):
+                    self.pushImages([page], ignore=ignore)
+                else:
+                    if (
+                        skipUnchanged
+                        and page_content is not None
+                        and target_content is not None
+                        and target_content.exists
+                        and page_content.sha1 is not None
+                        and page_content.sha1 == target_content.sha1
+                    ):
+                        self.log("↔")
+                        self.count("skipped")
+                        return pageOk
+                    if (
+                        target_info is not None
+                        and target_info.exists
+                        and not force
+                        and not skipUnchanged
+                    ):
+                        # no need to fetch a page that will not be overwritten
+                        self.log("👎")
+                        self.count("exists")
+                        return pageOk
+                    if target_content is not None:
+                        target_exists = target_content.exists
+                    elif target_info is not None:
+                        target_exists = target_info.exists
+                    else:
+                        target_exists = None
+                    if page_content is not None and target_exists is not None:
+                        # write the prefetched content without a target page lookup
+                        save = functools.partial(self.save_page_text, pageTitle)
+                    else:
+                        with self.measure("fetch"):
+                            newPage = self.toWiki.getPage(pageTitle)
+                        target_exists = newPage.exists
+                        save = functools.partial(self.edit_page, newPage)
+                    if not target_exists or force or skipUnchanged:
+                        outcome = "updated" if target_exists else "created"
+                        if page_content is not None:
+                            text = page_content.content or ""
+                        else:
+                            with self.measure("fetch"):
+                                text = page.text()
+                        try:
+                            with self.measure("edit"):
+                                save(text, comment)
+                            self.log("✅")
+                            self.count(outcome)
+                        except Exception as ex:
+                            pageOk = self.handleException(ex, ignore)
+                            self.count(outcome if pageOk else "failed")
+                        if withImages and pageOk:
+                            if page is None:
+                                page = self.fromWiki.getPage(pageTitle)
+                            self.pushImages(page.images(), ignore=ignore)
+                    else:
+                        self.log("👎")
+                        self.count("exists")
+            else:
+                self.log("❌")
+                self.count("failed")
+                pageOk = False
+        except Exception as ex:
+            self.show_exception(ex)
+            self.count("failed")
+            pageOk = False
+        return pageOk
+
+    def push(
+        self,
+        pageTitles,
+        force=False,
+        ignore=False,
+        withImages=False,
+        workers: int = 1,
+        targetWorkers: int = None,
+        skipUnchanged: bool = False,
+        closure: bool = False,
+    ) -> list:
         """
         push the given page titles
 
         Args:
-            pageTitles(list): a list of page titles to be transfered from the formWiki to the toWiki
-            force(bool): True if pages should be overwritten if they exist
+            pageTitles(list): a list of page titles to be transfered from the formWiki to the toWiki
+            force(bool): True if pages should be overwritten if they exist
+            ignore(bool): True if warning for images should be ignored (e.g if they exist)
+            withImages(bool): True if the image on a page should also be copied
+            workers(int): the number of pages to push concurrently
+            targetWorkers(int): the maximum number of concurrent writes to the target wiki - default: workers
+            skipUnchanged(bool): True if existing pages should only be overwritten if their content differs
+            closure(bool): True if the templates, modules, forms, properties, images and transcluded pages
+                the given pages depend on should also be pushed (in dependency order)
+        Returns:
+            list: a list of pageTitles for which the activity failed
+        """
+        comment = f"pushed from {self.fromWikiId} by wikipush"
+        if closure and pageTitles:
+            total = len(pageTitles)
+            pageTitles = self.get_closure(pageTitles)
+            self.log(
+                f"closure of {total} pages in {self.fromWikiId} has {len(pageTitles)} pages"
+            )
+        return self.work(
+            pageTitles,
+            activity="copying",
+            comment=comment,
+            force=force,
+            ignore=ignore,
+            withImages=withImages,
+            workers=workers,
+            targetWorkers=targetWorkers,
+            skipUnchanged=skipUnchanged,
+        )
+
+    def get_closure(self, pageTitles: list) -> list:
+        """
+        get the transitive closure of the pages the given pages depend on
+        in dependency order - the dependencies are looked up in batches
+        level by level and each page is only looked up once
+
+        Args:
+            pageTitles(list): the page titles to start with
+
+        Returns:
+            list: the given and all existing dependent page titles - dependencies first
+        """
+        dependencies = {}
+        frontier = list(dict.fromkeys(pageTitles))
+        while frontier:
+            records = self.fromWiki.get_page_dependencies(
+                frontier, link_namespaces=self.closure_namespaces
+            )
+            dependencies.update(records)
+            frontier = list(
+                dict.fromkeys(
+                    dependency
+                    for pageDependencies in records.values()
+                    if pageDependencies
+                    for dependency in pageDependencies
+                    if dependency not in dependencies
+                )
+            )
+        # depth first post order - cycles e.g. of recursive templates are cut
+        closure = []
+        visited = set()
+        for root in pageTitles:
+            if root in visited:
+                continue
+            visited.add(root)
+            stack = [(root, iter(dependencies.get(root) or []))]
+            while stack:
+                pageTitle, pending = stack[-1]
+                for dependency in pending:
+                    if dependency not in visited:
+                        visited.add(dependency)
+                        stack.append(
+                            (dependency, iter(dependencies.get(dependency) or []))
+                        )
+                        break
+                else:
+                    stack.pop()
+                    # missing dependencies are left out - the given pages are always kept
+                    if dependencies.get(pageTitle) is not None or not stack:
+                        closure.append(pageTitle)
+        return closure
+
+    def getSyncStatePath(self) -> str:
+        """
+        get the path of the sync state file for my source and target wiki
+        """
+        syncPath = self.getHomePath(".wikisync")
+        return f"{syncPath}/{self.fromWikiId}_{self.toWikiId}.yaml"
+
+    def get_sync_titles(self, changes: List[dict]) -> List[str]:
+        """
+        get the titles of the pages affected by the given recent changes
+        including the targets of moves
+
+        Args:
+            changes(list): the recent change records
+
+        Returns:
+            list: the affected page titles in the order of the changes
+        """
+        titles = {}
+        for change in changes:
+            if change.get("type") == "log":
+                if change.get("logtype") not in self.sync_log_types:
+                    continue
+                if change.get("logtype") == "move":
+                    logparams = change.get("logparams", {})
+                    # MediaWiki < 1.25 has the move target in the move element
+                    move = change.get("move", {})
+                    target = logparams.get("target_title", move.get("new_title"))
+                    if target:
+                        titles[target] = True
+            if "title" in change:
+                titles[change["title"]] = True
+        return list(titles.keys())
+
+    def sync(
+        self,
+        since: str = None,
+        ignore: bool = False,
+        withImages: bool = False,
+        workers: int = 1,
+        targetWorkers: int = None,
+        statePath: str = None,
+    ) -> list:
+        """
+        sync the pages changed in the source wiki since the last sync
+        to the target wiki based on the recent changes of the source wiki.
+        Changed, created, moved and uploaded pages are pushed, pages that
+        have been deleted are deleted in the target wiki.
+
+        Args:
+            since(str): ISO timestamp to sync from - default: the high-water mark of the last sync
             ignore(bool): True if warning for images should be ignored (e.g if they exist)
             withImages(bool): True if the image on a page should also be copied
+            workers(int): the number of pages to push concurrently
+            targetWorkers(int): the maximum number of concurrent writes to the target wiki - default: workers
+            statePath(str): the path of the sync state file - default: getSyncStatePath()
+
         Returns:
-            list: a list of pageTitles for which the activity failed
+            list: a list of pageTitles for which the sync failed
         """
-        comment = f"pushed from {self.fromWikiId} by wikipush"
-        return self.work(
-            pageTitles,
-            activity="copying",
-            comment=comment,
-            force=force,
-            ignore=ignore,
-            withImages=withImages,
+        if statePath is None:
+            statePath = self.getSyncStatePath()
+        if os.path.isfile(statePath):
+            state = SyncState.load_from_yaml_file(statePath)
+        else:
+            state = SyncState(fromWikiId=self.fromWikiId, toWikiId=self.toWikiId)
+        if since is None:
+            since = state.timestamp
+        if since is None:
+            latest = self.fromWiki.get_recent_changes(newer=False, limit=1)
+            if latest:
+                state.rcid = latest[0]["rcid"]
+                state.timestamp = latest[0]["timestamp"]
+            state.save_to_yaml_file(statePath)
+            self.log(
+                f"no sync high-water mark for {self.fromWikiId} to {self.toWikiId} yet - recorded {state.timestamp}"
+            )
+            self.log(
+                "use wikipush for the initial copy or --since to sync earlier changes"
+            )
+            return []
+        changes = self.fromWiki.get_recent_changes(start=since)
+        # the start timestamp is inclusive
+        changes = [
+            change
+            for change in changes
+            if since != state.timestamp or change.get("rcid", 0) > state.rcid
+        ]
+        titles = self.get_sync_titles(changes)
+        self.log(
+            f"syncing {len(changes)} changes of {len(titles)} pages since {since} from {self.fromWikiId} to {self.toWikiId}"
         )
+        failed = []
+        if titles:
+            source_contents = self.fromWiki.get_page_contents(
+                titles, with_content=False
+            )
+            pushTitles = [title for title in titles if source_contents[title].exists]
+            deleteTitles = [
+                title for title in titles if not source_contents[title].exists
+            ]
+            if pushTitles:
+                failed.extend(
+                    self.work(
+                        pushTitles,
+                        activity="syncing",
+                        comment=f"synced from {self.fromWikiId} by wikisync",
+                        ignore=ignore,
+                        withImages=withImages,
+                        workers=workers,
+                        targetWorkers=targetWorkers,
+                        skipUnchanged=True,
+                    )
+                )
+            if deleteTitles:
+                target_contents = self.toWiki.get_page_contents(
+                    deleteTitles, with_content=False
+                )
+                deleteTitles = [
+                    title for title in deleteTitles if target_contents[title].exists
+                ]
+                for i, title in enumerate(deleteTitles):
+                    try:
+                        self.log(
+                            f"{i+1}/{len(deleteTitles)}: deleting {title} ...", end=""
+                        )
+                        page = self.toWiki.getPage(title)
+                        self.write(
+                            page.delete,
+                            f"deleted in {self.fromWikiId} - synced by wikisync",
+                        )
+                        self.log("✅")
+                    except Exception as ex:
+                        self.show_exception(ex)
+                        failed.append(title)
+        if failed:
+            self.log(
+                f"❌ {len(failed)} pages failed - keeping the high-water mark {state.timestamp}"
+            )
+        elif changes:
+            last = max(changes, key=lambda change: change.get("rcid", 0))
+            state.rcid = last["rcid"]
+            state.timestamp = last["timestamp"]
+            state.save_to_yaml_file(statePath)
+        return failed
 
     def ensureParentDirectoryExists(self, filePath: str):
         """
@@ -768,17 +2650,29 @@ class WikiPush(object):
         """
         push the images in the given image List
 
+        files that already exist byte-for-byte on the target wiki are skipped
+        before any download - the sha1 of the source and target files
+        are looked up in batches - copies under other names are reported by
+        the duplicate warning of the upload
+
         Args:
             imageList(list): a list of images to be pushed
             ignore(bool): True to upload despite any warnings.
         """
+        imageList = list(imageList)
+        source_sha1s, target_infos = self.get_image_sha1s(imageList)
         for image in imageList:
             try:
                 self.log("%scopying image %s ..." % (delim, image.name), end="")
-                imagePath, filename = self.downloadImage(image)
+                sha1 = source_sha1s.get(image.name)
+                target_info = target_infos.get(image.name)
+                if sha1 and target_info and target_info.get("sha1") == sha1:
+                    self.log("↔")
+                    continue
+                filename = self.getImageFilename(image)
                 description = image.imageinfo["comment"]
                 try:
-                    self.uploadImage(imagePath, filename, description, ignore)
+                    self.transferImage(image, filename, description, ignore)
                     self.log("✅")
                 except Exception as ex:
                     self.handleAPIWarnings(ex.args[0], ignoreExists=ignore)
@@ -789,6 +2683,43 @@ class WikiPush(object):
             except Exception as ex:
                 self.handleException(ex, ignore)
 
+    def get_image_sha1s(self, imageList: list) -> typing.Tuple[dict, dict]:
+        """
+        get the sha1 of the given source images and the image info of the
+        files with the same names on the target wiki in batches
+
+        Args:
+            imageList(list): a list of source images
+
+        Returns:
+            Tuple[dict, dict]: the source sha1 by image name and the target image info
+            by image name (None if the file does not exist on the target)
+        """
+        source_sha1s = {}
+        target_infos = {}
+        if not imageList:
+            return source_sha1s, target_infos
+        try:
+            names = []
+            for image in imageList:
+                names.append(image.name)
+                # images retrieved by mwclient usually come with their imageinfo
+                sha1 = (image.imageinfo or {}).get("sha1")
+                if sha1:
+                    source_sha1s[image.name] = sha1
+            lookup = [name for name in names if name not in source_sha1s]
+            if lookup:
+                for name, info in self.fromWiki.get_image_infos(lookup).items():
+                    if info and info.get("sha1"):
+                        source_sha1s[name] = info["sha1"]
+            target_infos = self.toWiki.get_image_infos(names)
+        except Exception as ex:
+            # without the pre-check every image is transferred
+            if self.debug:
+                self.show_exception(ex)
+            return {}, {}
+        return source_sha1s, target_infos
+
     def show_exception(self, ex: Exception):
         """
         Show the given exception and, if debug mode is on, show the traceback.
@@ -859,13 +2790,15 @@ class WikiPush(object):
         self.log("%s:%s" % (marker, msg))
         return marker == "👀"
 
-    def downloadImage(self, image, downloadPath=None):
+    def getImageFilename(self, image) -> str:
         """
-        download the given image
+        get the filename of the given image without the namespace prefix
 
         Args:
-            image(image): the image to download
-            downloadPath(str): the path to download to if None getDownloadPath will be used
+            image(image): the image
+
+        Returns:
+            str: the filename
         """
         original_filename = image.name
         prefixes = ["File", "Datei", "Fichier", "Archivo", "Файл", "文件", "ファイル"]
@@ -875,13 +2808,32 @@ class WikiPush(object):
                 break
         else:
             filename = original_filename  # Fallback in case no prefix matches
+        return filename
 
+    def downloadImage(self, image, downloadPath=None):
+        """
+        download the given image
+
+        Args:
+            image(image): the image to download
+            downloadPath(str): the path to download to if None getDownloadPath will be used
+        """
+        filename = self.getImageFilename(image)
         if downloadPath is None:
             downloadPath = self.getDownloadPath()
         imagePath = "%s/%s" % (downloadPath, filename)
         self.ensureParentDirectoryExists(imagePath)
-        with open(imagePath, "wb") as imageFile:
-            image.download(imageFile)
+        # download to a temporary file first to never leave a partial image behind
+        fd, tmpPath = tempfile.mkstemp(
+            prefix=f".{os.path.basename(imagePath)}.", dir=os.path.dirname(imagePath)
+        )
+        try:
+            with os.fdopen(fd, "wb") as imageFile:
+                image.download(imageFile)
+            os.replace(tmpPath, imagePath)
+        except BaseException:
+            os.unlink(tmpPath)
+            raise
         return imagePath, filename
 
     def uploadImage(self, imagePath, filename, description, ignoreExists=False):
@@ -895,30 +2847,87 @@ class WikiPush(object):
             ignoreExists(bool): True if it should be ignored if the image exists
         """
         with open(imagePath, "rb") as imageFile:
-            warnings = None
-            response = self.toWiki.site.upload(
-                imageFile, filename, description, ignoreExists
-            )
-            if "warnings" in response:
-                warnings = response["warnings"]
-            if "upload" in response and "warnings" in response["upload"]:
-                warningsDict = response["upload"]["warnings"]
-                warnings = []
-                for item in warningsDict.items():
-                    warnings.append(str(item))
-            if warnings:
-                raise Exception(warnings)
-
-    def restore(self, pageTitles=None, backupPath=None, listFile=None, stdIn=False):
+            self.uploadImageFile(imageFile, filename, description, ignoreExists)
+
+    def transferImage(self, image, filename, description, ignoreExists=False):
+        """
+        stream the given image from the source to the target wiki without
+        a download file - the content is buffered in memory and only spilled to a
+        temporary file if it is larger than the spool size - only the upload
+        is a write so that a retry uploads the buffered content again
+
+        Args:
+            image(image): the image to transfer
+            filename(str): the filename to use
+            description(str): the description to use
+            ignoreExists(bool): True if it should be ignored if the image exists
+        """
+        with tempfile.SpooledTemporaryFile(max_size=self.spool_size) as imageFile:
+            with self.measure("fetch"):
+                image.download(imageFile)
+
+            def upload():
+                imageFile.seek(0)
+                self.uploadImageFile(imageFile, filename, description, ignoreExists)
+
+            with self.measure("edit"):
+                self.write(upload)
+
+    def uploadImageFile(self, imageFile, filename, description, ignoreExists=False):
+        """
+        upload the content of the given file object - files larger than the
+        chunk size are uploaded in chunks by mwclient
+
+        Args:
+            imageFile(file): the file object to upload
+            filename(str): the filename to use
+            description(str): the description to use
+            ignoreExists(bool): True if it should be ignored if the image exists
+        """
+        site = self.toWiki.site
+        if self.chunk_size is not None:
+            site.chunk_size = self.chunk_size
+        warnings = None
+        response = site.upload(imageFile, filename, description, ignoreExists)
+        if "warnings" in response:
+            warnings = response["warnings"]
+        if "upload" in response and "warnings" in response["upload"]:
+            warningsDict = response["upload"]["warnings"]
+            warnings = []
+            for item in warningsDict.items():
+                warnings.append(str(item))
+        if warnings:
+            raise Exception(warnings)
+
+    def restore(
+        self,
+        pageTitles=None,
+        backupPath=None,
+        listFile=None,
+        stdIn=False,
+        snapshot: str = None,
+        workers: int = 1,
+        namespaces: List[int] = None,
+        prefix: str = None,
+        since: float = None,
+    ):
         """
         restore given page titles from local backup
-        If no page titles are given the whole backup is restored.
+        If no page titles are given the whole backup is restored - for a backup
+        directory the titles are streamed from its index and may be filtered.
+
+        pages whose text is identical to the current text of the target wiki are skipped
 
         Args:
             pageTitles(list): a list of pageTitles to be restored to toWiki. If None -> full restore of backup
-            backupPath(str): path to backup location
+            backupPath(str): path to backup location - a directory, an archive or a content store
             listFile:
             stdIn:
+            snapshot(str): the snapshot to restore from a content store - None for the latest
+            workers(int): the number of pages to restore concurrently
+            namespaces(list): only restore pages of the given namespace numbers
+            prefix(str): only restore pages whose title starts with the given prefix
+            since(float): only restore backup files modified since the given time in seconds since the epoch
         """
         if stdIn:
             backupPath = os.path.dirname(pageTitles[0].strip())
@@ -935,35 +2944,272 @@ class WikiPush(object):
         else:
             if backupPath is None:
                 backupPath = self.getHomePath(f"wikibackup/{self.toWikiId}")
-            if pageTitles is None:
-                pageTitles = []
-                for path, subdirs, files in os.walk(backupPath):
-                    for name in files:
-                        filename = os.path.join(path, name)[len(backupPath) + 1 :]
-                        if filename.endswith(".wiki"):
-                            pageTitles.append(filename[: -len(".wiki")])
-        total = len(pageTitles)
+            if (
+                pageTitles is None
+                and not BackupArchive.is_archive(backupPath)
+                and not ContentStore.is_store(backupPath)
+            ):
+                self.restore_indexed(backupPath, namespaces, prefix, since, workers)
+                return
+        if BackupArchive.is_archive(backupPath):
+            self.restore_archive(pageTitles, backupPath, workers)
+            return
+        if ContentStore.is_store(backupPath):
+            self.restore_store(pageTitles, backupPath, snapshot, workers)
+            return
+        pageTitles = self.journal_start(pageTitles)
+        pages = (
+            (pageTitle, None, f"{backupPath}/{pageTitle}.wiki", None)
+            for pageTitle in pageTitles
+        )
+        self.restore_pages(pages, len(pageTitles), backupPath, workers)
+
+    def restore_indexed(
+        self,
+        backupPath: str,
+        namespaces: List[int] = None,
+        prefix: str = None,
+        since: float = None,
+        workers: int = 1,
+    ):
+        """
+        restore the pages of the given backup directory streaming the titles
+        from its index - files that are not in the index yet e.g. of a backup
+        made before there was an index are added by a single scan first
+
+        Args:
+            backupPath(str): the backup directory
+            namespaces(list): only restore pages of the given namespace numbers
+            prefix(str): only restore pages whose title starts with the given prefix
+            since(float): only restore backup files modified since the given time in seconds since the epoch
+            workers(int): the number of pages to restore concurrently
+        """
+        if not os.path.isdir(backupPath):
+            self.restore_pages([], 0, backupPath, workers)
+            return
+        index = BackupIndex(backupPath)
+        try:
+            if not index.is_complete():
+                self.log(f"indexing {backupPath} ...")
+                index.scan()
+            total = index.count(namespaces, prefix, since)
+            entries = index.iter_entries(namespaces, prefix, since)
+            if self.journal is not None and not self.journal.started:
+                # the journal needs all titles to be able to resume
+                pageTitles = self.journal_start([entry.title for entry in entries])
+                total = len(pageTitles)
+                entries = (
+                    index.get(pageTitle) or IndexEntry(pageTitle, f"{pageTitle}.wiki")
+                    for pageTitle in pageTitles
+                )
+
+            def iter_pages():
+                for entry in entries:
+                    wikiFilePath = os.path.join(backupPath, entry.path)
+                    sha1 = entry.sha1
+                    # the file might have been changed after the backup
+                    if sha1 is not None and (
+                        not os.path.isfile(wikiFilePath)
+                        or os.path.getmtime(wikiFilePath) != entry.mtime
+                    ):
+                        sha1 = None
+                    yield entry.title, None, wikiFilePath, sha1
+
+            self.restore_pages(iter_pages(), total, backupPath, workers)
+        finally:
+            index.close()
+
+    def restore_archive(
+        self, pageTitles: Optional[list], archivePath: str, workers: int = 1
+    ):
+        """
+        restore the given page titles from the given backup archive - the
+        archive is read as a stream without extracting it
+
+        Args:
+            pageTitles(list): the page titles to restore - if None all pages of the archive are restored
+            archivePath(str): the path of the archive
+            workers(int): the number of pages to restore concurrently
+        """
+        archive = BackupArchive(archivePath)
+        if pageTitles is None:
+            if self.journal is None:
+                # restore everything in a single pass over the archive
+                pages = (
+                    (pageTitle, page_content, None, None)
+                    for pageTitle, page_content in archive.iter_pages()
+                )
+                self.restore_pages(pages, None, archivePath, workers)
+                return
+            # the journal needs the page titles up front
+            pageTitles = list(archive.get_index().keys())
+        pageTitles = self.journal_start(pageTitles)
+        pending = set(pageTitles)
+
+        def iter_pages():
+            for pageTitle, page_content in archive.iter_pages():
+                if pageTitle in pending:
+                    pending.discard(pageTitle)
+                    yield pageTitle, page_content, None, None
+            for pageTitle in pageTitles:
+                if pageTitle in pending:
+                    yield pageTitle, None, None, None
+
+        self.restore_pages(iter_pages(), len(pageTitles), archivePath, workers)
+
+    def restore_store(
+        self,
+        pageTitles: Optional[list],
+        storePath: str,
+        snapshot: str = None,
+        workers: int = 1,
+    ):
+        """
+        restore the given page titles from the given snapshot of a content store
+
+        Args:
+            pageTitles(list): the page titles to restore - if None all pages of the snapshot are restored
+            storePath(str): the directory of the store
+            snapshot(str): the name of the snapshot - None for the latest
+            workers(int): the number of pages to restore concurrently
+        """
+        store = ContentStore(storePath)
+        entries = store.load_snapshot(snapshot)["pages"]
+        if pageTitles is None:
+            pageTitles = list(entries.keys())
+        pageTitles = self.journal_start(pageTitles)
+
+        def iter_pages():
+            for pageTitle in pageTitles:
+                entry = entries.get(pageTitle)
+                page_content = store.get(entry["sha1"]) if entry is not None else None
+                yield pageTitle, page_content, None, None
+
+        self.restore_pages(iter_pages(), len(pageTitles), storePath, workers)
+
+    def restore_pages(
+        self,
+        pages: typing.Iterable[Tuple[str, Optional[str], Optional[str], Optional[str]]],
+        total: Optional[int],
+        backupPath: str,
+        workers: int = 1,
+    ) -> Counter:
+        """
+        restore the given pages batch by batch - the sha1 and revision of the current
+        text of the pages of a batch are looked up in the target wiki in bulk
+        and only pages whose backup differs are written on a bounded pool of workers
+        without a further lookup
+
+        Args:
+            pages(Iterable): the (title, wiki markup, backup file path, sha1) of each page - either the markup or
+                the path is given, the sha1 of the backup text if it is known
+            total(int): the number of pages - None if it is not known up front
+            backupPath(str): the backup location to show
+            workers(int): the number of pages to restore concurrently
+
+        Returns:
+            Counter: the number of restored, skipped and failed pages
+        """
+        self.counts = Counter()
         self.log(
-            "restoring %d pages from %s to %s" % (total, backupPath, self.toWikiId)
+            "restoring %s pages from %s to %s"
+            % ("all" if total is None else total, backupPath, self.toWikiId)
         )
-        for i, pageTitle in enumerate(pageTitles):
+        batch_size = self.toWiki.get_batch_size() if total != 0 else 1
+        offset = 0
+        for batch in WikiClient.get_batches(pages, batch_size):
             try:
+                current = self.toWiki.get_page_contents(
+                    [page[0] for page in batch],
+                    with_content=False,
+                )
+            except Exception as ex:
+                self.show_exception(ex)
+                current = {}
+
+            def restore_page(j: int, page: tuple):
+                pageTitle, page_content, wikiFilePath, sha1 = page
+                self.restore_page(
+                    offset + j,
+                    total,
+                    pageTitle,
+                    page_content=page_content,
+                    wikiFilePath=wikiFilePath,
+                    target=current.get(pageTitle),
+                    sha1=sha1,
+                )
+
+            self.run_tasks(restore_page, batch, workers=workers)
+            offset += len(batch)
+        self.log(
+            "restored: %d, skipped: %d, failed: %d"
+            % (self.counts["restored"], self.counts["skipped"], self.counts["failed"])
+        )
+        return self.counts
+
+    def restore_page(
+        self,
+        i: int,
+        total: Optional[int],
+        pageTitle: str,
+        page_content: str = None,
+        wikiFilePath: str = None,
+        target: Optional[PageContent] = None,
+        sha1: str = None,
+    ) -> bool:
+        """
+        restore the page with the given title
+
+        Args:
+            i(int): the index of the page
+            total(int): the total number of pages - None if it is not known
+            pageTitle(str): the title of the page
+            page_content(str): the wiki markup to restore
+            wikiFilePath(str): the backup file to read the wiki markup from if no page_content is given
+            target(PageContent): the current revision of the page in the target wiki - the page is skipped if its sha1
+                matches and the page is saved based on this revision
+            sha1(str): the known sha1 of the backup text - the backup file is not read if it matches the target
+
+        Returns:
+            bool: True if the page has been restored or is already up to date
+        """
+        try:
+            target_sha1 = target.sha1 if target is not None else None
+            if total is None:
+                self.log("%d: restore %s ..." % (i + 1, pageTitle), end="")
+            else:
                 self.log(
                     "%d/%d (%4.0f%%): restore %s ..."
                     % (i + 1, total, (i + 1) / total * 100, pageTitle),
                     end="",
                 )
-                wikiFilePath = f"{backupPath}/{pageTitle}.wiki"
+            if page_content is None and (sha1 is None or sha1 != target_sha1):
+                if wikiFilePath is None:
+                    raise Exception(f"{pageTitle} is not in the backup")
                 with open(wikiFilePath, mode="r") as wikiFile:
                     page_content = wikiFile.read()
-                    page = self.toWiki.getPage(pageTitle)
-                    page.edit(
-                        page_content,
-                        f"modified through wikirestore by {self.toWiki.wikiUser.user}",
-                    )
+            if page_content is not None:
+                sha1 = hashlib.sha1(page_content.encode("utf-8")).hexdigest()
+            if target_sha1 is not None and sha1 == target_sha1:
+                self.log("↔")
+                self.count("skipped")
+            else:
+                base_params = target.get_base_params() if target is not None else {}
+                self.save_page_text(
+                    pageTitle,
+                    page_content,
+                    f"modified through wikirestore by {self.toWiki.wikiUser.user}",
+                    **base_params,
+                )
                 self.log("✅")
-            except Exception as ex:
-                self.show_exception(ex)
+                self.count("restored")
+            self.journal_mark(pageTitle, True)
+            return True
+        except Exception as ex:
+            self.show_exception(ex)
+            self.count("failed")
+            self.journal_mark(pageTitle, False, str(ex))
+            return False
 
 
 __version__ = Version.version
@@ -999,6 +3245,10 @@ def mainRestore(argv=None):
     main(argv, mode="wikirestore")
 
 
+def mainSync(argv=None):
+    main(argv, mode="wikisync")
+
+
 def main(argv=None, mode="wikipush"):  # IGNORE:C0111
     """main program."""
 
@@ -1032,6 +3282,7 @@ def main(argv=None, mode="wikipush"):  # IGNORE:C0111
         str(__date__),
     )
 
+    wikipush = None
     try:
         # Setup argument parser
         parser = ArgumentParser(
@@ -1054,6 +3305,25 @@ def main(argv=None, mode="wikipush"):  # IGNORE:C0111
             default=0.0,
             help="Time in seconds to sleep between requests to comply with API limits (default: %(default)s)",
         )
+        parser.add_argument(
+            "--adaptive",
+            dest="adaptive",
+            action="store_true",
+            help="adapt the delay between requests to the server load starting with the --throttle delay",
+        )
+        parser.add_argument(
+            "--maxRate",
+            dest="maxRate",
+            type=float,
+            help="maximum number of requests per second for --adaptive (default: no limit)",
+        )
+        parser.add_argument(
+            "--maxlag",
+            dest="maxlag",
+            type=int,
+            default=5,
+            help="maxlag in seconds to send with write requests for --adaptive (default: %(default)s)",
+        )
         if mode == "wikipush":
             parser.add_argument(
                 "-l",
@@ -1086,13 +3356,82 @@ def main(argv=None, mode="wikipush"):  # IGNORE:C0111
                 action="store_true",
                 help="copy images on the given pages",
             )
+            parser.add_argument(
+                "--workers",
+                dest="workers",
+                type=int,
+                default=1,
+                help="number of pages to push concurrently (default: %(default)s)",
+            )
+            parser.add_argument(
+                "--targetWorkers",
+                dest="targetWorkers",
+                type=int,
+                help="maximum number of concurrent writes to the target wiki (default: number of workers)",
+            )
+            parser.add_argument(
+                "-su",
+                "--skipUnchanged",
+                dest="skipUnchanged",
+                action="store_true",
+                help="overwrite existing pages only if their content differs (compares revision sha1)",
+            )
+            parser.add_argument(
+                "--closure",
+                dest="closure",
+                action="store_true",
+                help="also push the templates, modules, forms, properties, images and transcluded pages the pages depend on",
+            )
+        elif mode == "wikisync":
+            parser.add_argument(
+                "-l",
+                "--login",
+                dest="login",
+                action="store_true",
+                help="login to source wiki for access permission",
+            )
+            parser.add_argument(
+                "-s", "--source", dest="source", help="source wiki id", required=True
+            )
+            parser.add_argument(
+                "--since",
+                dest="since",
+                help="ISO timestamp of the recent changes to sync from (default: high-water mark of the last sync)",
+            )
+            parser.add_argument(
+                "-i",
+                "--ignore",
+                dest="ignore",
+                action="store_true",
+                help="ignore upload warnings e.g. duplicate images",
+            )
+            parser.add_argument(
+                "-wi",
+                "--withImages",
+                dest="withImages",
+                action="store_true",
+                help="copy images on the given pages",
+            )
+            parser.add_argument(
+                "--workers",
+                dest="workers",
+                type=int,
+                default=1,
+                help="number of pages to push concurrently (default: %(default)s)",
+            )
+            parser.add_argument(
+                "--targetWorkers",
+                dest="targetWorkers",
+                type=int,
+                help="maximum number of concurrent writes to the target wiki (default: number of workers)",
+            )
         elif mode == "wikibackup":
             parser.add_argument(
                 "-g",
                 "--git",
                 dest="git",
                 action="store_true",
-                help="use git for version control",
+                help="use git for version control of the backup directory - only the written files are staged; use --format git to stream into a bare repository without a working tree",
             )
             parser.add_argument(
                 "-l",
@@ -1117,6 +3456,32 @@ def main(argv=None, mode="wikipush"):  # IGNORE:C0111
                 help="path where the backup should be stored",
                 required=False,
             )
+            parser.add_argument(
+                "--format",
+                dest="backupFormat",
+                choices=["files", "archive", "store", "git"],
+                default="files",
+                help="files: one .wiki file per page, archive: a single compressed archive at the backupPath - .tar.gz, .tar.xz or .zip, store: content addressed store with a snapshot per run, git: stream into a git repository with git fast-import (default: %(default)s)",
+            )
+            parser.add_argument(
+                "--revisions",
+                dest="revisions",
+                action="store_true",
+                help="keep every wiki revision - with --format git a commit per revision with the original author and timestamp, with --format store the full history streamed from Special:Export",
+            )
+            parser.add_argument(
+                "--incremental",
+                dest="incremental",
+                action="store_true",
+                help="only download pages whose latest revision differs from the backup index",
+            )
+            parser.add_argument(
+                "--workers",
+                dest="workers",
+                type=int,
+                default=1,
+                help="number of pages to write concurrently (default: %(default)s)",
+            )
         elif mode == "wikinuke":
             parser.add_argument(
                 "-f",
@@ -1125,6 +3490,18 @@ def main(argv=None, mode="wikipush"):  # IGNORE:C0111
                 action="store_true",
                 help="force to delete pages - default is 'dry' run only listing pages",
             )
+            parser.add_argument(
+                "--workers",
+                dest="workers",
+                type=int,
+                default=1,
+                help="number of pages to delete concurrently (default: %(default)s)",
+            )
+            parser.add_argument(
+                "--results",
+                dest="results",
+                help="path of a JSON file to write the deleted, missing and failed titles to",
+            )
         elif mode == "wikiedit":
             parser.add_argument(
                 "--search", dest="search", help="search pattern", required=False
@@ -1132,6 +3509,19 @@ def main(argv=None, mode="wikipush"):  # IGNORE:C0111
             parser.add_argument(
                 "--replace", dest="replace", help="replace pattern", required=False
             )
+            parser.add_argument(
+                "--workers",
+                dest="workers",
+                type=int,
+                default=1,
+                help="number of pages to modify concurrently - more than one prefetches the contents in batches and pipelines the edits (default: %(default)s)",
+            )
+            parser.add_argument(
+                "--rules",
+                dest="rules",
+                help="YAML file with a list of search/replace rules to apply in one pass - rules: [{search: ..., replace: ..., literal: false, ignoreCase: false}]",
+                required=False,
+            )
             parser.add_argument(
                 "--context",
                 dest="context",
@@ -1214,7 +3604,7 @@ def main(argv=None, mode="wikipush"):  # IGNORE:C0111
             parser.add_argument(
                 "--backupPath",
                 dest="backupPath",
-                help="path the backup is stored",
+                help="path the backup is stored - a directory or a .tar.gz, .tar.xz or .zip archive",
                 required=False,
             )
             parser.add_argument(
@@ -1227,6 +3617,35 @@ def main(argv=None, mode="wikipush"):  # IGNORE:C0111
                 action="store_true",
                 help="login to source wiki for access permission",
             )
+            parser.add_argument(
+                "--snapshot",
+                dest="snapshot",
+                help="snapshot to restore if the backupPath is a content store (default: latest)",
+            )
+            parser.add_argument(
+                "--workers",
+                dest="workers",
+                type=int,
+                default=1,
+                help="number of pages to restore concurrently (default: %(default)s)",
+            )
+            parser.add_argument(
+                "--namespace",
+                dest="namespaces",
+                type=int,
+                nargs="+",
+                help="only restore pages of the given namespace numbers from the backup index",
+            )
+            parser.add_argument(
+                "--prefix",
+                dest="prefix",
+                help="only restore pages whose title starts with the given prefix",
+            )
+            parser.add_argument(
+                "--modifiedSince",
+                dest="modifiedSince",
+                help="only restore backup files modified since the given ISO date/time",
+            )
             parser.add_argument(
                 "-stdinp",
                 dest="stdinp",
@@ -1278,6 +3697,44 @@ def main(argv=None, mode="wikipush"):  # IGNORE:C0111
                 help="Divide the query into equidistant subintervals to limit the result size of the individual queries",
                 required=False,
             )
+        if mode in ["wikipush", "wikisync"]:
+            parser.add_argument(
+                "--spoolSize",
+                dest="spoolSize",
+                type=float,
+                default=16,
+                help="size in MB up to which images are transferred in memory before spilling to a temporary file (default: %(default)s)",
+            )
+            parser.add_argument(
+                "--chunkSize",
+                dest="chunkSize",
+                type=float,
+                help="size in MB above which images are uploaded in chunks (default: 1)",
+            )
+            parser.add_argument(
+                "--report",
+                dest="report",
+                help="path of a JSON or CSV (.csv) file to write a per page performance report to",
+            )
+        if mode in ["wikipush", "wikibackup", "wikirestore"]:
+            parser.add_argument(
+                "--resume",
+                dest="resume",
+                action="store_true",
+                help="resume the last interrupted job from its journal - opens the journal",
+            )
+            parser.add_argument(
+                "--retries",
+                dest="retries",
+                type=int,
+                default=0,
+                help="number of times failed pages are retried - needs a journal which is opened if retries are requested (default: %(default)s)",
+            )
+            parser.add_argument(
+                "--journal",
+                dest="journal",
+                help="path of the job journal database - opens the journal (default: ~/.wikijournal/<mode>_<source>_<target>.db)",
+            )
         if mode in ["wikiquery"]:
             parser.add_argument("--title", help="the title for the query")
         if not mode in ["wikibackup", "wikiquery"]:
@@ -1289,8 +3746,12 @@ def main(argv=None, mode="wikipush"):  # IGNORE:C0111
         if hasattr(args, "queryDivision"):
             if args.queryDivision < 1:
                 raise ValueError("queryDivision argument must be greater equal 1")
+        if mode == "wikibackup" and args.git and args.backupFormat != "files":
+            parser.error(
+                f"--git can not be combined with --format {args.backupFormat} - use --format git for a git repository"
+            )
 
-        if mode == "wikipush":
+        if mode in ["wikipush", "wikisync"]:
             wikipush = WikiPush(
                 args.source, args.target, login=args.login, debug=args.debug
             )
@@ -1315,12 +3776,48 @@ def main(argv=None, mode="wikipush"):  # IGNORE:C0111
             queryWiki = wikipush.toWiki
         # make the full args available to wikipush
         wikipush.args = args
+        if args.adaptive:
+            wikipush.enable_rate_control(
+                AdaptiveThrottle(
+                    delay=args.throttle, maxRate=args.maxRate, maxlag=args.maxlag
+                )
+            )
+        if mode in ["wikipush", "wikisync"]:
+            wikipush.spool_size = int(args.spoolSize * 1024 * 1024)
+            if args.chunkSize is not None:
+                wikipush.chunk_size = int(args.chunkSize * 1024 * 1024)
+            if args.report:
+                wikipush.enable_report(PerformanceReport())
+        if mode in ["wikipush", "wikibackup", "wikirestore"] and (
+            args.resume or args.journal or args.retries > 0
+        ):
+            # the journal is opt-in
+            wikipush.open_journal(
+                mode,
+                resume=args.resume,
+                retries=args.retries,
+                journalPath=args.journal,
+            )
         if mode == "wikiupload":
             wikipush.upload(args.files, args.force)
+        elif mode == "wikisync":
+            wikipush.sync(
+                since=args.since,
+                ignore=args.ignore,
+                withImages=args.withImages,
+                workers=args.workers,
+                targetWorkers=args.targetWorkers,
+            )
+            if args.report:
+                wikipush.save_report(args.report)
         else:
             pages = None
             if args.pages:
                 pages = args.pages
+            elif getattr(args, "resume", False) and mode != "wikirestore":
+                # the page titles are taken from the journal
+                if args.query is None and args.queryName is None:
+                    pages = []
             elif hasattr(args, "stdinp"):
                 if args.stdinp:
                     pages = sys.stdin.readlines()
@@ -1374,6 +3871,25 @@ def main(argv=None, mode="wikipush"):  # IGNORE:C0111
                         pageTitles=None,
                         backupPath=args.backupPath,
                         listFile=args.listFile,
+                        snapshot=args.snapshot,
+                        workers=args.workers,
+                        namespaces=args.namespaces,
+                        prefix=args.prefix,
+                        since=(
+                            datetime.datetime.fromisoformat(
+                                args.modifiedSince
+                            ).timestamp()
+                            if args.modifiedSince
+                            else None
+                        ),
+                    )
+                    wikipush.retry_failed(
+                        lambda pageTitles: wikipush.restore(
+                            pageTitles,
+                            backupPath=args.backupPath,
+                            snapshot=args.snapshot,
+                            workers=args.workers,
+                        )
                     )
                 else:
                     raise Exception(
@@ -1391,24 +3907,59 @@ def main(argv=None, mode="wikipush"):  # IGNORE:C0111
                     if pages == "Q":  # If GUI window is closed, end the program
                         sys.exit(0)
                 if mode == "wikipush":
-                    wikipush.push(
-                        pages,
-                        force=args.force,
-                        ignore=args.ignore,
-                        withImages=args.withImages,
-                    )
+
+                    def push(pageTitles, closure=False):
+                        return wikipush.push(
+                            pageTitles,
+                            force=args.force,
+                            ignore=args.ignore,
+                            withImages=args.withImages,
+                            workers=args.workers,
+                            targetWorkers=args.targetWorkers,
+                            skipUnchanged=args.skipUnchanged,
+                            closure=closure,
+                        )
+
+                    push(pages, closure=args.closure)
+                    wikipush.retry_failed(push)
+                    if args.report:
+                        wikipush.save_report(args.report)
                 elif mode == "wikibackup":
-                    wikipush.backup(
+
+                    def backup(pageTitles):
+                        wikipush.backup(
+                            pageTitles,
+                            git=args.git,
+                            withImages=args.withImages,
+                            backupPath=args.backupPath,
+                            incremental=args.incremental,
+                            workers=args.workers,
+                            backup_format=args.backupFormat,
+                            revisions=args.revisions,
+                        )
+
+                    backup(pages)
+                    wikipush.retry_failed(backup)
+                elif mode == "wikinuke":
+                    wikipush.nuke(
                         pages,
-                        git=args.git,
-                        withImages=args.withImages,
-                        backupPath=args.backupPath,
+                        force=args.force,
+                        workers=args.workers,
+                        resultsPath=args.results,
                     )
-                elif mode == "wikinuke":
-                    wikipush.nuke(pages, force=args.force)
                 elif mode == "wikiedit":
-                    # two modes search&replace and WikiSON property edit
-                    if args.search or args.replace:
+                    # three modes rules file, search&replace and WikiSON property edit
+                    if args.rules:
+                        modify = RuleEngine.of_yaml_file(args.rules)
+                        wikipush.edit(
+                            pages,
+                            modify=modify,
+                            context=args.context,
+                            force=args.force,
+                            workers=args.workers,
+                        )
+                        wikipush.log(modify.get_summary())
+                    elif args.search or args.replace:
                         # search&replace
                         if args.search and args.replace:
                             modify = WikiPush.getModify(
@@ -1419,6 +3970,7 @@ def main(argv=None, mode="wikipush"):  # IGNORE:C0111
                                 modify=modify,
                                 context=args.context,
                                 force=args.force,
+                                workers=args.workers,
                             )
                         else:
                             raise Exception(
@@ -1441,7 +3993,22 @@ def main(argv=None, mode="wikipush"):  # IGNORE:C0111
 
                 elif mode == "wikirestore":
                     wikipush.restore(
-                        pages, backupPath=args.backupPath, stdIn=args.stdinp
+                        pages,
+                        backupPath=args.backupPath,
+                        stdIn=args.stdinp,
+                        snapshot=args.snapshot,
+                        workers=args.workers,
+                    )
+                    backupPath = args.backupPath
+                    if args.stdinp:
+                        backupPath = os.path.dirname(pages[0].strip())
+                    wikipush.retry_failed(
+                        lambda pageTitles: wikipush.restore(
+                            pageTitles,
+                            backupPath=backupPath,
+                            snapshot=args.snapshot,
+                            workers=args.workers,
+                        )
                     )
                 else:
                     raise Exception("undefined wikipush mode %s" % mode)
@@ -1456,6 +4023,9 @@ def main(argv=None, mode="wikipush"):  # IGNORE:C0111
         if args.debug:
             print(traceback.format_exc())
         return 2
+    finally:
+        if wikipush is not None and wikipush.journal is not None:
+            wikipush.journal.close()
 
 
 if __name__ == "__main__":
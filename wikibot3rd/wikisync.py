@@ -0,0 +1,12 @@
+"""
+Created on 2026-10-17
+
+@author: wf
+"""
+
+import sys
+
+import wikibot3rd.wikipush
+
+if __name__ == "__main__":
+    sys.exit(wikibot3rd.wikipush.mainSync())
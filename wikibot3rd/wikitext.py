@@ -3,6 +3,7 @@ Created on 2023-02-24
   @author: tholzheim
 """
 
+import re
 import typing
 import warnings
 
@@ -218,6 +219,85 @@ class WikiMarkup:
                 lod.append(records)
         return lod
 
+    # lines that look like a heading without parsing
+    heading_line = re.compile(r"^=.*=[ \t]*$", re.MULTILINE)
+
+    @classmethod
+    def get_section_spans(
+        cls, wiki_markup: str
+    ) -> typing.Optional[typing.List[typing.Tuple[int, int]]]:
+        """
+        Get the spans of the sections of the given markup in the numbering of
+        the MediaWiki edit API - index 0 is the page lead
+
+        Args:
+            wiki_markup: the wiki markup
+
+        Returns:
+            list of (start, end) tuples or None if the numbering is ambiguous
+            e.g. because of headings in comments, nowiki tags or templates
+        """
+        sections = wtp.parse(wiki_markup).sections
+        if len(cls.heading_line.findall(wiki_markup)) != len(sections) - 1:
+            return None
+        return [section.span for section in sections]
+
+    @classmethod
+    def get_section_edit(
+        cls, wiki_markup: str, new_wiki_markup: str
+    ) -> typing.Optional[typing.Tuple[int, str]]:
+        """
+        Get the smallest section that contains all changes between the given
+        markups - saving its new text with the section parameter gives the
+        same page as saving the new markup as a whole
+
+        Args:
+            wiki_markup: the current wiki markup of the page
+            new_wiki_markup: the new wiki markup of the page
+
+        Returns:
+            tuple of the section number and the new section text or None if
+            the whole page needs to be saved
+        """
+        if wiki_markup == new_wiki_markup:
+            return None
+        spans = cls.get_section_spans(wiki_markup)
+        if not spans:
+            return None
+        length = len(wiki_markup)
+        limit = min(length, len(new_wiki_markup))
+        prefix = 0
+        while prefix < limit and wiki_markup[prefix] == new_wiki_markup[prefix]:
+            prefix += 1
+        suffix = 0
+        limit -= prefix
+        while (
+            suffix < limit
+            and wiki_markup[length - 1 - suffix] == new_wiki_markup[-1 - suffix]
+        ):
+            suffix += 1
+        change_end = length - suffix
+        delta = len(new_wiki_markup) - length
+        best = None
+        for index, (start, end) in enumerate(spans):
+            if start <= prefix and change_end <= end:
+                if best is None or end - start < spans[best][1] - spans[best][0]:
+                    best = index
+        if best is None:
+            return None
+        start, end = spans[best]
+        if start == 0 and end == length:
+            # the section is the whole page
+            return None
+        section_text = new_wiki_markup[start : end + delta]
+        if end < length:
+            # MediaWiki strips trailing whitespace of the section text and
+            # separates it from the next heading with an empty line
+            stripped = section_text.rstrip()
+            if section_text != (stripped + "\n\n" if stripped else ""):
+                return None
+        return best, section_text
+
     def __str__(self) -> str:
         return self.wiki_markup
 